@@ -1,11 +1,8 @@
 from PyQt5 import QtWidgets
 from PyQt5.QtCore import pyqtSignal
-import uuid
-from models.employee import Employee
-from globals import employee_objects
-from db import Database
-import hashlib
+from services import BankService, ServiceError
 import traceback
+import workers
 
 class AddEmployeeWindow(QtWidgets.QWidget):
     employee_added = pyqtSignal()
@@ -13,6 +10,7 @@ class AddEmployeeWindow(QtWidgets.QWidget):
     def __init__(self, db):
         super().__init__()
         self.db = db
+        self.service = BankService(db)
         self.setWindowTitle("Add New Employee")
         self.setGeometry(100, 100, 400, 500)
         self.init_ui()
@@ -76,46 +74,21 @@ class AddEmployeeWindow(QtWidgets.QWidget):
             email = self.email_input.text().strip()
             phone = self.phone_input.text().strip()
 
-            # Validate inputs
-            if not all([name, national_id, username, password, position]):
-                self.status_label.setText("Please fill all required fields!")
-                return
-            if len(national_id) != 14 or not national_id.isdigit():
-                self.status_label.setText("National ID must be exactly 14 digits!")
-                return
-            if any(emp.employeeUserName == username for emp in employee_objects.values()):
-                self.status_label.setText("Username already exists!")
-                return
-            if not email or "@" not in email or "." not in email.split("@")[1]:
-                self.status_label.setText("Invalid email format!")
-                return
-            if not phone or not phone.isdigit() or len(phone) < 10 or len(phone) > 11:
-                self.status_label.setText("Phone must be 10-11 digits!")
-                return
-
-            # Generate unique ID
-            employee_id = str(uuid.uuid4())
-            print(f"Generated EmployeeID: {employee_id}, Length: {len(employee_id)}")
-
-            # Hash password with MD5
-            hashed_password = hashlib.md5(password.encode('utf-8')).hexdigest()
-            print(f"Hashed password for {username}: {hashed_password}")
-
-            # Create employee object
-            employee = Employee(name, national_id, employee_id, position, email, phone)
-            employee.set_credentials(username, hashed_password)
-
-            # Save to database
-            self.db.save_employee(employee)
-            print(f"Saved employee {username} to database")
-
-            # Update global dictionary
-            employee_objects[employee_id] = employee
-            print(f"Added employee {username} to employee_objects")
-
-            self.status_label.setText("Employee added successfully!")
-            self.clear_fields()
-            self.employee_added.emit()
+            # Validate, hash the password and save, off the GUI thread
+            def saved(employee):
+                print(f"Saved employee {username} to database with EmployeeID: {employee.employeeID}")
+
+                self.status_label.setText("Employee added successfully!")
+                self.clear_fields()
+                self.employee_added.emit()
+
+            def failed(e):
+                self.status_label.setText(str(e) if isinstance(e, ServiceError) else f"Error: {str(e)}")
+                print(f"Error saving employee: {str(e)}")
+
+            self.status_label.setText("Saving employee...")
+            workers.run_in_background(self.service.create_employee, name, national_id, username, password, position,
+                                      email, phone, on_success=saved, on_error=failed, busy=(self.add_button,))
         except Exception as e:
             self.status_label.setText(f"Error: {str(e)}")
             print(f"Error in add_new_employee: {str(e)}")
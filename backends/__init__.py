@@ -0,0 +1,29 @@
+import os
+import sqlite3
+from backends.sqlite_backend import SQLiteBackend
+
+try:
+    import mysql.connector
+    _MYSQL_ERRORS = (mysql.connector.Error,)
+    _MYSQL_DATA_ERRORS = (mysql.connector.IntegrityError, mysql.connector.DataError)
+except ImportError:
+    _MYSQL_ERRORS = ()
+    _MYSQL_DATA_ERRORS = ()
+
+# Every driver error the Database methods catch, whichever backend is active.
+DB_ERRORS = (sqlite3.Error,) + _MYSQL_ERRORS
+# Errors caused by the rows themselves (duplicate keys, bad values): retrying
+# the same statement cannot succeed.
+DB_DATA_ERRORS = (sqlite3.IntegrityError, sqlite3.DataError, sqlite3.InterfaceError) + _MYSQL_DATA_ERRORS
+
+
+def create_backend(name=None, pool_size=None):
+    """Build the storage backend named by DB_BACKEND ("mysql", the default, or "sqlite")."""
+    name = (name or os.getenv('DB_BACKEND', 'mysql')).lower()
+    if name == "sqlite":
+        return SQLiteBackend(pool_size)
+    if name == "mysql":
+        # Imported here so the SQLite backend works without mysql-connector.
+        from backends.mysql_backend import MySQLBackend
+        return MySQLBackend(pool_size)
+    raise ValueError(f"Unknown DB_BACKEND {name!r} (use 'mysql' or 'sqlite')")
@@ -0,0 +1,268 @@
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+import mysql.connector
+from mysql.connector import pooling
+from mysql.connector.errors import NotSupportedError, PoolError
+
+# Debit and credit in one statement. The balance check happens in SQL, so two
+# terminals moving money out of the same account cannot overdraw it.
+TRANSFER_FUNDS = '''
+    UPDATE account src JOIN account dst ON dst.AccountID = %s
+    SET src.Balance = src.Balance - %s, dst.Balance = dst.Balance + %s
+    WHERE src.AccountID = %s AND src.Balance >= %s
+'''
+
+
+class MySQLCursor:
+    """mysql-connector cursor that can also run the backend's named prepared statements."""
+
+    def __init__(self, backend, conn, cursor):
+        self._backend = backend
+        self._conn = conn
+        self._cursor = cursor
+        # The cursor that ran the last statement; results are read from it.
+        self._last = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql, params)
+        self._last = self._cursor
+        return self
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(sql, rows)
+        self._last = self._cursor
+        return self
+
+    def execute_prepared(self, name, params=()):
+        """Run a registered statement, prepared on the server the first time this connection uses it."""
+        sql = self._backend.statements[name]
+        if not self._backend.prepared:
+            return self.execute(sql, params)
+        self._last = self._backend.prepared_cursor(self._conn, name)
+        try:
+            self._last.execute(sql, params)
+        except self._backend.errors:
+            # The statement handle may be gone (reconnect, server restart); prepare it afresh next time.
+            self._backend.forget_prepared(self._conn, name)
+            raise
+        return self
+
+    def executemany_prepared(self, name, rows):
+        # Multi-row INSERTs are faster through executemany(), which rewrites
+        # them into one statement; this is for UPDATEs run once per row.
+        for params in rows:
+            self.execute_prepared(name, params)
+        return self
+
+    def fetchone(self):
+        return self._last.fetchone()
+
+    def fetchmany(self, size):
+        return self._last.fetchmany(size)
+
+    def fetchall(self):
+        return self._last.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._last.rowcount
+
+    @property
+    def description(self):
+        return self._last.description
+
+    def close(self):
+        # Prepared cursors stay open with their connection.
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._last)
+
+
+class MySQLBackend:
+    """MySQL server through mysql-connector, pooled unless DB_POOL_SIZE is 0."""
+
+    name = "mysql"
+    errors = (mysql.connector.Error,)
+    # Change-tracking column, part of new tables (see migrations/).
+    sync_column = "updatedAt TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)"
+
+    def __init__(self, pool_size=None):
+        # Named SQL run through MySQLCursor.execute_prepared; Database adds its own.
+        self.statements = {"transfer_funds": TRANSFER_FUNDS}
+        self.prepared = os.getenv('DB_PREPARED', '1') == '1'
+        # Prepared cursors per physical connection, by statement name.
+        self._prepared_cursors = weakref.WeakKeyDictionary()
+        self._prepared_lock = threading.Lock()
+        settings = dict(
+            host=os.getenv('DB_HOST'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_DATABASE'),
+            port=int(os.getenv('DB_PORT', 3306)),
+            # Prefer the C extension; fall back to the pure-Python protocol.
+            use_pure=not mysql.connector.HAVE_CEXT,
+            connection_timeout=10
+        )
+        # Identifies the database, e.g. to tell whether a snapshot belongs to it.
+        self.source = f"mysql://{settings['host']}:{settings['port']}/{settings['database']}"
+        if pool_size is None:
+            pool_size = int(os.getenv('DB_POOL_SIZE', 5))
+        self.pool_size = pool_size
+        # Seconds a thread waits for a pooled connection before giving up.
+        self.pool_timeout = float(os.getenv('DB_POOL_TIMEOUT', 30))
+        self._free = threading.BoundedSemaphore(pool_size) if pool_size > 0 else None
+        if pool_size > 0:
+            # Resetting the session on checkout would deallocate the connection's
+            # prepared statements, so it is turned off; nothing here relies on
+            # session state.
+            self.pool = pooling.MySQLConnectionPool(pool_name="banksystem", pool_size=pool_size,
+                                                    pool_reset_session=False, **settings)
+            self.conn = None
+        else:
+            self.pool = None
+            self.conn = mysql.connector.connect(**settings)
+        # Serializes use of the single shared connection when not pooled.
+        self._conn_lock = threading.RLock()
+
+    @contextmanager
+    def connection(self):
+        if self.pool is not None:
+            # get_connection() raises at once when every connection is checked
+            # out, so callers queue on the semaphore instead.
+            if not self._free.acquire(timeout=self.pool_timeout):
+                raise PoolError(f"No pooled connection free after {self.pool_timeout:g} s (DB_POOL_SIZE={self.pool_size})")
+            try:
+                conn = self.pool.get_connection()
+                try:
+                    yield conn
+                finally:
+                    conn.close()
+            finally:
+                self._free.release()
+        else:
+            with self._conn_lock:
+                yield self.conn
+
+    def cursor(self, conn, dictionary=False, stream=False):
+        if stream:
+            # Unbuffered: rows stay on the server until fetched.
+            return MySQLCursor(self, conn, conn.cursor(buffered=False))
+        return MySQLCursor(self, conn, conn.cursor(dictionary=dictionary))
+
+    def _physical(self, conn):
+        # A pooled connection is a fresh wrapper on every checkout around the
+        # same physical connection, which is what owns the statements. The
+        # connector only exposes it as the private _cnx (tests/test_mysql_backend.py
+        # pins this down); keying on the wrapper instead would prepare every
+        # statement again on each checkout and leak the cursors.
+        if not isinstance(conn, pooling.PooledMySQLConnection):
+            return conn
+        # Read from the instance: the wrapper's __getattr__ forwards to _cnx
+        # and would recurse if it were gone.
+        physical = vars(conn).get("_cnx")
+        if physical is None:
+            raise NotSupportedError(f"mysql-connector {mysql.connector.__version__} pooled connections have no _cnx; "
+                                    "set DB_PREPARED=0")
+        return physical
+
+    def prepared_cursor(self, conn, name):
+        physical = self._physical(conn)
+        with self._prepared_lock:
+            cursors = self._prepared_cursors.get(physical)
+            if cursors is None:
+                cursors = self._prepared_cursors[physical] = {}
+        # Only the thread holding the connection touches its cursors.
+        cursor = cursors.get(name)
+        if cursor is None:
+            cursor = cursors[name] = conn.cursor(prepared=True)
+        return cursor
+
+    def forget_prepared(self, conn, name):
+        cursors = self._prepared_cursors.get(self._physical(conn), {})
+        cursor = cursors.pop(name, None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except self.errors:
+                pass
+
+    def begin(self, conn, write=True):
+        # autocommit is off, so the first statement opens the transaction.
+        pass
+
+    def transfer(self, cursor, from_account_id, to_account_id, amount):
+        cursor.execute_prepared("transfer_funds", (to_account_id, amount, amount, from_account_id, amount))
+        return cursor.rowcount == 2
+
+    def lock_balances(self, cursor, account_ids):
+        placeholders = ", ".join(["%s"] * len(account_ids))
+        cursor.execute(f"SELECT AccountID, Balance FROM account WHERE AccountID IN ({placeholders}) FOR UPDATE", account_ids)
+        return cursor.fetchall()
+
+    def has_column(self, cursor, table, column):
+        cursor.execute("SELECT COUNT(*) FROM information_schema.COLUMNS "
+                       "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s", (table, column))
+        return cursor.fetchone()[0] > 0
+
+    def indexes(self, cursor, table):
+        """{index name: (columns, unique)} for a table."""
+        cursor.execute("SELECT INDEX_NAME, COLUMN_NAME, NON_UNIQUE FROM information_schema.STATISTICS "
+                       "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY INDEX_NAME, SEQ_IN_INDEX", (table,))
+        found = {}
+        for name, column, non_unique in cursor.fetchall():
+            columns, unique = found.get(name, ((), not non_unique))
+            found[name] = (columns + (column,), unique)
+        return found
+
+    def add_index(self, cursor, table, name, columns, unique=False):
+        cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON `{table}` ({', '.join(columns)})")
+
+    def add_sync_column(self, cursor, table):
+        cursor.execute(f"ALTER TABLE `{table}` ADD COLUMN {self.sync_column}")
+
+    def money_to_cents(self, cursor, table, column):
+        # DECIMAL is exact in MySQL; amounts stay in currency units.
+        pass
+
+    def track_updates(self, cursor, table):
+        # ON UPDATE keeps the column current; the sync only needs it indexed.
+        if not any(columns[0] == "updatedAt" for columns, _ in self.indexes(cursor, table).values()):
+            self.add_index(cursor, table, f"idx_{table}_updatedAt", ("updatedAt",))
+
+    def reserve_ids(self, cursor, name, count):
+        """First of `count` values taken from an id_sequence counter, or None if there is no such counter."""
+        # LAST_INSERT_ID(expr) hands the new value back to this connection
+        # only; the row lock serialises concurrent reservations.
+        cursor.execute("UPDATE id_sequence SET nextValue = LAST_INSERT_ID(nextValue + %s) WHERE name = %s", (count, name))
+        if cursor.rowcount != 1:
+            return None
+        cursor.execute("SELECT LAST_INSERT_ID()")
+        return cursor.fetchone()[0] - count
+
+    def explain(self, cursor, sql, params=()):
+        """(plan lines, True if every table is read through an index) for one statement."""
+        cursor.execute("EXPLAIN " + sql, params)
+        columns = [column[0] for column in cursor.description]
+        plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        lines = [f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']} {row.get('Extra') or ''}".rstrip()
+                 for row in plan]
+        return lines, all(row["key"] is not None and row["type"] != "ALL" for row in plan)
+
+    def close(self):
+        with self._prepared_lock:
+            cursors = [cursor for named in self._prepared_cursors.values() for cursor in named.values()]
+            self._prepared_cursors.clear()
+        for cursor in cursors:
+            try:
+                cursor.close()
+            except self.errors:
+                pass
+        if self.pool is not None:
+            # The connector has no public call for this; it disconnects every
+            # idle pooled connection, which at shutdown is all of them.
+            self.pool._remove_connections()
+        if self.conn is not None:
+            self.conn.close()
@@ -0,0 +1,272 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+NOW = "(strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))"
+
+# SQLite has no ON UPDATE, so a trigger bumps updatedAt instead.
+TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_updatedAt AFTER UPDATE ON `{table}`
+    FOR EACH ROW WHEN NEW.updatedAt = OLD.updatedAt
+    BEGIN
+        UPDATE `{table}` SET updatedAt = {now} WHERE rowid = NEW.rowid;
+    END
+'''
+UPDATED_AT_INDEX = "CREATE INDEX IF NOT EXISTS idx_{table}_updatedAt ON `{table}` (updatedAt)"
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA foreign_keys = ON",
+)
+
+DEBIT = "UPDATE account SET Balance = Balance - ? WHERE AccountID = ? AND Balance >= ?"
+CREDIT = "UPDATE account SET Balance = Balance + ? WHERE AccountID = ?"
+
+CENTS = Decimal("0.01")
+# SQLite has no exact decimal type: DECIMAL(15, 2) columns would hold binary
+# floats. Money is stored as integer cents instead, so Balance + delta and
+# Balance >= amount are exact integer arithmetic. db.py passes every amount
+# as a Decimal; SQLiteCursor converts on the way in and out. (sqlite3's
+# register_adapter/register_converter would do it for every connection in
+# the process, not just ours.)
+MONEY_COLUMNS = frozenset(("Balance", "amount"))
+
+
+def to_cents(value):
+    return int(value.scaleb(2).to_integral_value(ROUND_HALF_UP))
+
+
+def from_cents(value):
+    return Decimal(str(value)).scaleb(-2).quantize(CENTS)
+
+
+def adapt(value):
+    if isinstance(value, Decimal):
+        return to_cents(value)
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    return value
+
+
+def adapt_params(params):
+    return tuple(adapt(value) for value in params)
+
+
+@lru_cache(maxsize=512)
+def translate(sql):
+    # The shared SQL uses the MySQL "%s" paramstyle.
+    return sql.replace("%s", "?")
+
+
+class SQLiteCursor:
+    """sqlite3 cursor that accepts the %s placeholders used throughout db.py and stores money as cents."""
+
+    def __init__(self, cursor, statements, dictionary=False):
+        self._cursor = cursor
+        self._statements = statements
+        # Dictionary rows are converted by _dict_row.
+        self._dictionary = dictionary
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(translate(sql), adapt_params(params))
+        return self
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(translate(sql), (adapt_params(row) for row in rows))
+        return self
+
+    def execute_prepared(self, name, params=()):
+        # sqlite3 already reuses compiled statements from the connection's cache.
+        return self.execute(self._statements[name], params)
+
+    def executemany_prepared(self, name, rows):
+        return self.executemany(self._statements[name], rows)
+
+    def _money_positions(self):
+        if self._dictionary or self._cursor.description is None:
+            return ()
+        return [index for index, column in enumerate(self._cursor.description) if column[0] in MONEY_COLUMNS]
+
+    def _convert(self, rows):
+        positions = self._money_positions()
+        if not positions:
+            return rows
+        converted = []
+        for row in rows:
+            row = list(row)
+            for index in positions:
+                if row[index] is not None:
+                    row[index] = from_cents(row[index])
+            converted.append(tuple(row))
+        return converted
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return row if row is None else self._convert([row])[0]
+
+    def fetchmany(self, size):
+        return self._convert(self._cursor.fetchmany(size))
+
+    def fetchall(self):
+        return self._convert(self._cursor.fetchall())
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(500)
+            if not rows:
+                return
+            yield from rows
+
+
+def _dict_row(cursor, row):
+    return {column[0]: from_cents(value) if column[0] in MONEY_COLUMNS and value is not None else value
+            for column, value in zip(cursor.description, row)}
+
+
+class SQLiteBackend:
+    """Embedded SQLite database file, created on first use (Database.migrate() adds the tables).
+
+    Every thread gets its own connection; in WAL mode readers never block the
+    single writer. sqlite3 keeps compiled statements in a per-connection
+    cache, so repeated SQL is only prepared once (DB_PREPARED=0 turns the
+    cache off, for comparison).
+    """
+
+    name = "sqlite"
+    errors = (sqlite3.Error,)
+    # Change-tracking column, part of new tables (see migrations/).
+    sync_column = f"updatedAt TIMESTAMP NOT NULL DEFAULT {NOW}"
+
+    def __init__(self, pool_size=None, path=None):
+        self.statements = {}
+        self.prepared = os.getenv('DB_PREPARED', '1') == '1'
+        self.path = path or os.getenv('SQLITE_PATH', 'bank_system.db')
+        self.source = f"sqlite://{os.path.abspath(self.path)}"
+        if pool_size is None:
+            pool_size = int(os.getenv('DB_POOL_SIZE', 5))
+        self.pool_size = pool_size
+        self.timeout = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)) / 1000
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.RLock()
+        # An in-memory database only exists inside one connection, so it is
+        # shared by all threads under a lock.
+        self._shared = self._open() if self.path == ":memory:" else None
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False,
+                               cached_statements=512 if self.prepared else 0)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        if self._shared is not None:
+            with self._lock:
+                yield self._shared
+            return
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+        yield conn
+
+    def cursor(self, conn, dictionary=False, stream=False):
+        # sqlite3 cursors already step through results lazily.
+        cursor = conn.cursor()
+        if dictionary:
+            cursor.row_factory = _dict_row
+        return SQLiteCursor(cursor, self.statements, dictionary)
+
+    def begin(self, conn, write=True):
+        # Writers take the write lock up front so read-check-write sequences
+        # cannot interleave with another writer; readers use a deferred BEGIN
+        # and, under WAL, never wait for a writer.
+        conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+
+    def transfer(self, cursor, from_account_id, to_account_id, amount):
+        # No UPDATE ... JOIN in SQLite: two statements inside the caller's
+        # BEGIN IMMEDIATE transaction, rolled back by the caller on failure.
+        cursor.execute(DEBIT, (amount, from_account_id, amount))
+        if cursor.rowcount != 1:
+            return False
+        cursor.execute(CREDIT, (amount, to_account_id))
+        return cursor.rowcount == 1
+
+    def lock_balances(self, cursor, account_ids):
+        # BEGIN IMMEDIATE already holds the database write lock.
+        placeholders = ", ".join(["?"] * len(account_ids))
+        cursor.execute(f"SELECT AccountID, Balance FROM account WHERE AccountID IN ({placeholders})", account_ids)
+        return cursor.fetchall()
+
+    def has_column(self, cursor, table, column):
+        cursor.execute(f"PRAGMA table_info(`{table}`)")
+        return any(row[1] == column for row in cursor.fetchall())
+
+    def indexes(self, cursor, table):
+        """{index name: (columns, unique)} for a table."""
+        cursor.execute(f"PRAGMA index_list(`{table}`)")
+        found = {}
+        for _, name, unique, *_ in cursor.fetchall():
+            cursor.execute(f"PRAGMA index_info(`{name}`)")
+            found[name] = (tuple(info[2] for info in sorted(cursor.fetchall())), bool(unique))
+        return found
+
+    def add_index(self, cursor, table, name, columns, unique=False):
+        cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON `{table}` ({', '.join(columns)})")
+
+    def add_sync_column(self, cursor, table):
+        # Only needed for files created before updatedAt was part of SCHEMA.
+        # ALTER TABLE cannot add a column with a non-constant default.
+        cursor.execute(f"ALTER TABLE `{table}` ADD COLUMN updatedAt TIMESTAMP NOT NULL DEFAULT '1970-01-01 00:00:00.000'")
+        cursor.execute(f"UPDATE `{table}` SET updatedAt = {NOW}")
+
+    def money_to_cents(self, cursor, table, column):
+        cursor.execute(f"UPDATE `{table}` SET {column} = CAST(ROUND({column} * 100) AS INTEGER) WHERE {column} IS NOT NULL")
+
+    def track_updates(self, cursor, table):
+        cursor.execute(TRIGGER.format(table=table, now=NOW))
+        cursor.execute(UPDATED_AT_INDEX.format(table=table))
+
+    def reserve_ids(self, cursor, name, count):
+        """First of `count` values taken from an id_sequence counter, or None if there is no such counter."""
+        # BEGIN IMMEDIATE holds the write lock from the UPDATE to the commit.
+        cursor.execute("UPDATE id_sequence SET nextValue = nextValue + ? WHERE name = ?", (count, name))
+        if cursor.rowcount != 1:
+            return None
+        cursor.execute("SELECT nextValue FROM id_sequence WHERE name = ?", (name,))
+        return cursor.fetchone()[0] - count
+
+    def explain(self, cursor, sql, params=()):
+        """(plan lines, True if every table is searched through an index) for one statement."""
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        lines = [row[3] for row in cursor.fetchall()]
+        # SCAN reads the whole table (or index); a temp B-tree means sorting rows the index did not order.
+        return lines, not any(line.startswith("SCAN") or "TEMP B-TREE" in line for line in lines)
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
@@ -0,0 +1 @@
+"""Benchmarks for the hot paths. Run with `python -m benchmarks --help`."""
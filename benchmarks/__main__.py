@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+from datetime import datetime
+from db import Database
+from benchmarks import datagen
+from benchmarks.runner import Suite, save_results, compare
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Time the Bank System hot paths.")
+    parser.add_argument("--scale", choices=sorted(datagen.SCALES), default="1k", help="number of synthetic customers")
+    parser.add_argument("--generate", action="store_true", help="insert the synthetic data set before running")
+    parser.add_argument("--transactions-per-customer", type=int, default=5)
+    parser.add_argument("--logs-per-customer", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per benchmark (cheap ones run more)")
+    parser.add_argument("--only", nargs="*", help="run only these benchmarks")
+    parser.add_argument("--output", help="JSON results file (default benchmarks/results/<scale>-<time>.json)")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p50 slowdown reported as a regression")
+    parser.add_argument("--cleanup", action="store_true", help="delete the synthetic data afterwards")
+    args = parser.parse_args()
+
+    db = Database()
+    try:
+        db.migrate()
+        if args.generate:
+            print(f"Generating {args.scale} data set...")
+            counts = datagen.generate(db, datagen.SCALES[args.scale], args.transactions_per_customer, args.logs_per_customer)
+            print("  " + ", ".join(f"{table}: {count}" for table, count in counts.items()))
+        db.load_data()
+        results = Suite(db, repeat=args.repeat).run(args.only)
+        db.flush()
+
+        output = args.output
+        if not output:
+            os.makedirs(os.path.join("benchmarks", "results"), exist_ok=True)
+            output = os.path.join("benchmarks", "results", f"{args.scale}-{datetime.now():%Y%m%d-%H%M%S}.json")
+        save_results(results, output, args.scale)
+        print(f"Results written to {output}")
+
+        regressions = compare(results, args.compare, args.threshold) if args.compare else []
+        if args.cleanup:
+            datagen.cleanup(db)
+    finally:
+        db.close()
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
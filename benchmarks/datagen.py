@@ -0,0 +1,113 @@
+import random
+import uuid
+from datetime import datetime, timedelta
+import credentials
+from id_allocator import account_number, card_number
+from db import (INSERT_CUSTOMER, INSERT_ACCOUNT, INSERT_DEBIT_CARD, INSERT_EMPLOYEE, INSERT_TRANSACTION,
+                INSERT_ACTIVITY_LOG, to_money)
+
+# Every generated username starts with this, so the data can be removed again.
+PREFIX = "bench_"
+PASSWORD = "benchpass"
+SCALES = {"1k": 1000, "100k": 100000, "1M": 1000000}
+TRANSACTION_TYPES = ("Transfer", "Deposit", "Withdrawal")
+ACTION_TYPES = ("Login", "Transfer", "Deposit", "Withdrawal", "ChangePassword")
+
+
+def password_hash(password=PASSWORD):
+    # One hash (and so one salt) shared by every generated user; hashing a
+    # million passwords would dominate generation time.
+    return credentials.hash_password(password)
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(db, sql, rows, chunk_size):
+    count = 0
+    for chunk in _chunks(rows, chunk_size):
+        with db.transaction() as cursor:
+            cursor.executemany(sql, chunk)
+        count += len(chunk)
+    return count
+
+
+def generate(db, customers, transactions_per_customer=5, logs_per_customer=2, employees=None, seed=1, chunk_size=10000):
+    """Insert a synthetic data set straight into the schema and return the row counts per table.
+
+    Customer, account and card IDs are reserved from the ID sequences. Customers get
+    username bench_<customerID> and password "benchpass"; employees get
+    bench_e<n>, and the first one is a manager.
+    """
+    rng = random.Random(seed)
+    employees = employees or max(5, customers // 1000)
+    first_customer_id = db.reserve_ids("customer", customers)
+    first_account_id = db.reserve_ids("account", customers)
+    first_card = db.reserve_ids("card", customers)
+    hashed = password_hash()
+    now = datetime.now().replace(microsecond=0)
+    counts = {}
+
+    def customer_rows():
+        for i in range(customers):
+            customer_id = first_customer_id + i
+            yield (customer_id, f"{PREFIX}{customer_id}", hashed, f"Customer {customer_id}",
+                   str(rng.randrange(10 ** 13, 10 ** 14)), f"{PREFIX}{customer_id}@example.com", str(first_account_id + i))
+
+    def account_rows():
+        for i in range(customers):
+            yield (str(first_account_id + i), rng.choice(("Saving", "Current")), to_money(rng.uniform(100, 100000)),
+                   account_number(first_account_id + i))
+
+    def card_rows():
+        for i in range(customers):
+            expiry = (now + timedelta(days=rng.randrange(365, 5 * 365))).date().isoformat()
+            yield (card_number(first_card + i), f"{rng.randrange(10000):04d}", expiry, "Active", first_customer_id + i)
+
+    def employee_rows():
+        for i in range(employees):
+            yield (f"B{i:07d}", f"{PREFIX}e{i}", hashed, f"Employee {i}", str(rng.randrange(10 ** 13, 10 ** 14)),
+                   "Manager" if i == 0 else "Teller", f"{PREFIX}e{i}@example.com", f"0100{i:07d}")
+
+    def transaction_rows():
+        for i in range(customers * transactions_per_customer):
+            when = now - timedelta(seconds=rng.randrange(365 * 86400))
+            yield (str(uuid.UUID(int=rng.getrandbits(128), version=4)), rng.choice(TRANSACTION_TYPES),
+                   to_money(rng.uniform(1, 5000)), when.isoformat(), first_customer_id + rng.randrange(customers))
+
+    def activity_log_rows():
+        for i in range(customers * logs_per_customer):
+            when = now - timedelta(seconds=rng.randrange(365 * 86400))
+            yield (str(uuid.UUID(int=rng.getrandbits(128), version=4)), "Customer", str(first_customer_id + rng.randrange(customers)),
+                   rng.choice(ACTION_TYPES), to_money(rng.uniform(0, 5000)), when.isoformat())
+
+    counts["customer"] = _insert(db, INSERT_CUSTOMER, customer_rows(), chunk_size)
+    counts["account"] = _insert(db, INSERT_ACCOUNT, account_rows(), chunk_size)
+    counts["debitcard"] = _insert(db, INSERT_DEBIT_CARD, card_rows(), chunk_size)
+    counts["employee"] = _insert(db, INSERT_EMPLOYEE, employee_rows(), chunk_size)
+    counts["transaction"] = _insert(db, INSERT_TRANSACTION, transaction_rows(), chunk_size)
+    counts["activitylog"] = _insert(db, INSERT_ACTIVITY_LOG, activity_log_rows(), chunk_size)
+    return counts
+
+
+def cleanup(db):
+    """Delete everything generate() inserted."""
+    # Plain subqueries instead of DELETE ... JOIN so this runs on every backend.
+    customers = "SELECT customerID FROM customer WHERE SUBSTR(customerUserName, 1, %s) = %s"
+    prefix = (len(PREFIX), PREFIX)
+    with db.transaction() as cursor:
+        cursor.execute(f"DELETE FROM `transaction` WHERE customerID IN ({customers})", prefix)
+        cursor.execute(f"DELETE FROM activitylog WHERE userType = 'Customer' AND userID IN ({customers})", prefix)
+        cursor.execute(f"DELETE FROM debitcard WHERE customerID IN ({customers})", prefix)
+        cursor.execute("DELETE FROM account WHERE AccountID IN (SELECT customerAccountID FROM customer "
+                       "WHERE SUBSTR(customerUserName, 1, %s) = %s)", prefix)
+        cursor.execute("DELETE FROM customer WHERE SUBSTR(customerUserName, 1, %s) = %s", prefix)
+        cursor.execute("DELETE FROM employee WHERE SUBSTR(employeeUserName, 1, %s) = %s", prefix)
@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+
+
+async def client(host, port, token, requests, latencies, errors):
+    # One keep-alive connection sending requests back to back.
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for method, path, body in requests:
+            payload = json.dumps(body).encode("utf-8") if body is not None else b""
+            started = time.perf_counter()
+            writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                         f"Authorization: Bearer {token}\r\n"
+                         f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload)
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if not head.startswith(b"HTTP/1.1 2"):
+                errors.append(head.split(b"\r\n", 1)[0].decode("latin-1"))
+    finally:
+        writer.close()
+
+
+def plan(accounts, count, write_ratio, seed):
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        if len(accounts) > 1 and rng.random() < write_ratio:
+            source, target = rng.sample(accounts, 2)
+            requests.append(("POST", "/transfers", {"from_account": source, "to_account": target, "amount": "0.01"}))
+        else:
+            requests.append(("GET", f"/accounts/{rng.choice(accounts)}/balance", None))
+    return requests
+
+
+async def run(host, port, token, accounts, total, connections, write_ratio, seed):
+    per_connection = max(1, total // connections)
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(host, port, token, plan(accounts, per_connection, write_ratio, seed + i), latencies, errors)
+                           for i in range(connections)))
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.http_load",
+                                     description="Load test a running `python -m services serve`.")
+    parser.add_argument("accounts", nargs="+", help="account IDs to query and transfer between")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--write-ratio", type=float, default=0.0, help="share of requests that are 1-cent transfers")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--token", default=os.getenv('API_TOKEN', ''),
+                        help="operator token (API_TOKEN), or an employee session token from /login")
+    args = parser.parse_args()
+
+    latencies, errors, elapsed = asyncio.run(run(args.host, args.port, args.token, args.accounts, args.requests, args.connections,
+                                                 args.write_ratio, args.seed))
+    print(f"{len(latencies)} requests over {args.connections} connections in {elapsed:.2f} s: "
+          f"{len(latencies) / elapsed:,.0f} requests/s")
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"  p50 {cuts[49]:.2f} ms  p95 {cuts[94]:.2f} ms  p99 {cuts[98]:.2f} ms  errors {len(errors)}")
+    if errors:
+        print(f"  first error: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+import credentials
+
+PASSWORD = "benchpass"
+
+
+def rate(fn, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return count / (time.perf_counter() - started)
+
+
+async def verify_concurrently(service, stored, count):
+    results = await asyncio.gather(*(service.verify_async(PASSWORD, stored) for _ in range(count)))
+    assert all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.logins", description="Password verifications per second.")
+    parser.add_argument("--logins", type=int, default=200, help="verifications per measurement")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="credential worker processes")
+    args = parser.parse_args()
+
+    stored = credentials.hash_password(PASSWORD)
+    legacy = hashlib.md5(PASSWORD.encode('utf-8')).hexdigest()
+    print(f"Hash format: {stored.split('$')[0]} ({stored.count('$') + 1} fields), {os.cpu_count()} cores")
+    print(f"  legacy MD5, inline:      {rate(lambda: credentials.verify_password(PASSWORD, legacy), args.logins * 100):>10,.0f} logins/s")
+    inline = rate(lambda: credentials.verify_password(PASSWORD, stored), args.logins)
+    print(f"  KDF, inline (one core):  {inline:>10,.1f} logins/s")
+
+    service = credentials.CredentialService(args.workers)
+    try:
+        # Start the workers before timing.
+        asyncio.run(verify_concurrently(service, stored, args.workers))
+        started = time.perf_counter()
+        asyncio.run(verify_concurrently(service, stored, args.logins))
+        pooled = args.logins / (time.perf_counter() - started)
+    finally:
+        service.close()
+    cores = min(args.workers, os.cpu_count() or 1)
+    print(f"  KDF, pool of {args.workers:<3} workers: {pooled:>10,.1f} logins/s ({pooled / cores:,.1f} per core)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import gc
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models.transaction import Transaction
+
+
+class DictTransaction:
+    # Layout of models.Transaction before it was slotted: per-instance
+    # __dict__, categorical strings kept per row, dates kept as text.
+    def __init__(self, transactionID, transactionType, amount, transactionDate, customerID):
+        self.transactionID = transactionID
+        self.transactionType = transactionType
+        self.amount = amount
+        self.transactionDate = transactionDate
+        self.customerID = customerID
+
+
+def sample_rows(count):
+    start = datetime(2024, 1, 1)
+    types = ("Transfer", "Deposit", "Withdrawal")
+    for i in range(count):
+        # Fresh strings per row, as the DB driver returns them.
+        yield (str(uuid.uuid4()), "".join(list(types[i % 3])), Decimal("10.00") + i % 1000,
+               (start + timedelta(seconds=i)).isoformat(), 100000 + i % 5000)
+
+
+def measure(cls, count):
+    """Bytes per row retained after loading `count` rows into `cls` objects."""
+    gc.collect()
+    tracemalloc.start()
+    objects = [cls(*row) for row in sample_rows(count)]
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return used / count
+
+
+if __name__ == "__main__":
+    count = 200000
+    before = measure(DictTransaction, count)
+    after = measure(Transaction, count)
+    print(f"Transaction rows held in memory ({count} rows):")
+    print(f"  dict-based:  {before:8.1f} bytes/row")
+    print(f"  slotted:     {after:8.1f} bytes/row")
+    print(f"  saving:      {100 * (1 - after / before):8.1f} %")
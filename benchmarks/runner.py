@@ -0,0 +1,259 @@
+import json
+import math
+import platform
+import random
+import time
+import tracemalloc
+from datetime import datetime
+import bulk_transfers
+from globals import customer_objects, employee_objects, clear_all
+from services import BankService
+from benchmarks.datagen import PREFIX, PASSWORD
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def measure(fn, repeat=20, setup=None, warmup=1):
+    """Time `fn` and return p50/p95/p99/mean in milliseconds plus peak traced memory.
+
+    Timings are taken without tracemalloc (it slows allocation down a lot);
+    peak memory comes from one extra traced run.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "runs": repeat,
+        "p50_ms": round(percentile(samples, 50), 4),
+        "p95_ms": round(percentile(samples, 95), 4),
+        "p99_ms": round(percentile(samples, 99), 4),
+        "mean_ms": round(sum(samples) / len(samples), 4),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+class Suite:
+    """The hot-path benchmarks, run against a Database that already holds benchmark data."""
+
+    def __init__(self, db, repeat=20, seed=1):
+        self.db = db
+        self.service = BankService(db)
+        self.repeat = repeat
+        self.rng = random.Random(seed)
+
+    def bench_customers(self):
+        return [c for c in customer_objects.values() if str(c.customerUserName).startswith(PREFIX)]
+
+    def run(self, only=None):
+        benchmarks = [
+            ("load_data", self.load_data),
+            ("login_customer_lookup", lambda: self.login_lookup("customer")),
+            ("login_employee_lookup", lambda: self.login_lookup("employee")),
+            ("login_customer", lambda: self.login("customer")),
+            ("login_employee", lambda: self.login("employee")),
+            ("transfer_funds", self.transfer_funds),
+            ("adjust_balance", self.adjust_balance),
+            ("bulk_transfer_100", self.bulk_transfer),
+            ("load_customers", self.load_customers),
+            ("load_transactions_cold", self.load_transactions_cold),
+            ("load_transactions_warm", self.load_transactions_warm),
+            ("transaction_page_cold", self.transaction_page_cold),
+            ("transaction_page_warm", self.transaction_page_warm),
+            ("transaction_page_older", self.transaction_page_older),
+            ("customer_id_generation", self.id_generation),
+        ]
+        results = {}
+        for name, bench in benchmarks:
+            if only and name not in only:
+                continue
+            print(f"Running {name}...")
+            result = bench()
+            if result is None:
+                print("  skipped")
+                continue
+            results[name] = result
+            print(f"  p50 {result['p50_ms']:.3f} ms  p95 {result['p95_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms  "
+                  f"peak {result['peak_kb']:.0f} KiB")
+        return results
+
+    def load_data(self):
+        result = measure(self.db.load_data, repeat=max(3, self.repeat // 10), setup=clear_all, warmup=0)
+        # Later benchmarks need the registries filled again.
+        self.db.load_data()
+        return result
+
+    def login_usernames(self, role):
+        if role == "customer":
+            return [c.customerUserName for c in self.bench_customers()]
+        return [e.employeeUserName for e in employee_objects.values() if str(e.employeeUserName).startswith(PREFIX)]
+
+    def login_lookup(self, role):
+        """Times only the username lookup of a login, without the password hash check."""
+        usernames = self.login_usernames(role)
+        if not usernames:
+            return None
+        return measure(lambda: self.service._login_user(role, self.rng.choice(usernames)), repeat=self.repeat)
+
+    def login(self, role):
+        """Times a whole login; dominated by the password KDF, see login_*_lookup for the lookup alone."""
+        usernames = self.login_usernames(role)
+        if not usernames:
+            return None
+        return measure(lambda: self.service.login(role, self.rng.choice(usernames), PASSWORD), repeat=self.repeat)
+
+    def account_pair(self):
+        customers = self.bench_customers()
+        if len(customers) < 2:
+            return None
+        source, target = self.rng.sample(customers, 2)
+        return str(source.customerAccountID), str(target.customerAccountID)
+
+    def transfer_funds(self):
+        # The path behind TransferDialog, EmployeeDashboard.transfer_money and
+        # CustomerDashboard.transfer_money. Money goes back and forth by a cent.
+        pair = self.account_pair()
+        if pair is None:
+            return None
+        direction = [0]
+
+        def transfer():
+            source, target = pair if direction[0] % 2 == 0 else pair[::-1]
+            direction[0] += 1
+            self.db.transfer_funds(source, target, "0.01")
+
+        return measure(transfer, repeat=self.repeat)
+
+    def adjust_balance(self):
+        pair = self.account_pair()
+        if pair is None:
+            return None
+        sign = [1]
+
+        def adjust():
+            self.db.adjust_balance(pair[0], sign[0] * 0.01)
+            sign[0] = -sign[0]
+
+        return measure(adjust, repeat=self.repeat)
+
+    def bulk_transfer(self):
+        customers = self.bench_customers()
+        if len(customers) < 2:
+            return None
+
+        def records():
+            for line in range(100):
+                source, target = self.rng.sample(customers, 2)
+                yield line + 1, {"from_account": source.customerAccountID, "to_account": target.customerAccountID, "amount": "0.01"}
+
+        def apply():
+            bulk_transfers.apply_payments(self.db, bulk_transfers.validate_payments(records()))
+
+        return measure(apply, repeat=max(3, self.repeat // 4))
+
+    def load_customers(self):
+        # EmployeeDashboard.load_customers hands every customer to the table model.
+        try:
+            from table_models import CustomerTableModel
+        except ImportError:
+            return None
+        model = CustomerTableModel()
+        return measure(lambda: model.set_rows(customer_objects.values()), repeat=self.repeat)
+
+    def cold_history(self, fn):
+        """Times fn(customer_id) for a random bench customer whose cached history was just dropped."""
+        customers = self.bench_customers()
+        if not customers:
+            return None
+        picked = []
+
+        def setup():
+            picked[:] = [str(self.rng.choice(customers).customerID)]
+            self.db.history.invalidate(picked[0])
+
+        return measure(lambda: fn(picked[0]), repeat=self.repeat, setup=setup)
+
+    def load_transactions_cold(self):
+        return self.cold_history(lambda customer_id: list(self.db.history.transactions_for(customer_id)))
+
+    def load_transactions_warm(self):
+        customers = self.bench_customers()
+        if not customers:
+            return None
+        customer_id = str(customers[0].customerID)
+        return measure(lambda: list(self.db.history.transactions_for(customer_id)), repeat=self.repeat * 10)
+
+    def transaction_page_cold(self):
+        return self.cold_history(self.db.history.transaction_page)
+
+    def transaction_page_warm(self):
+        customers = self.bench_customers()
+        if not customers:
+            return None
+        customer_id = str(customers[0].customerID)
+        return measure(lambda: self.db.history.transaction_page(customer_id), repeat=self.repeat * 10)
+
+    def transaction_page_older(self):
+        # The second page is never cached: a keyset seek past the first.
+        customers = self.bench_customers()
+        if not customers:
+            return None
+        customer_id = str(customers[0].customerID)
+        first_page = self.db.history.transaction_page(customer_id)
+        if not first_page:
+            return None
+        last = first_page[-1]
+        before = (last.transactionDate, last.transactionID)
+        return measure(lambda: self.db.history.transaction_page(customer_id, before), repeat=self.repeat)
+
+    def id_generation(self):
+        return measure(self.db.ids.new_customer_ids, repeat=self.repeat * 50)
+
+
+def save_results(results, path, scale):
+    document = {
+        "scale": scale,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "customers": len(customer_objects),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+
+
+def compare(results, baseline_path, threshold=0.10):
+    """Print p50/p95 changes against a saved run. Returns the names that regressed by more than `threshold`."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    print(f"Compared with {baseline_path}:")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        line = f"  {name:<24}"
+        for key in ("p50_ms", "p95_ms"):
+            before, after = baseline[name][key], result[key]
+            change = (after - before) / before if before else 0.0
+            line += f" {key} {before:.3f} -> {after:.3f} ({change:+.0%})"
+            if key == "p50_ms" and change > threshold:
+                regressions.append(name)
+        print(line + ("  REGRESSION" if name in regressions else ""))
+    return regressions
@@ -0,0 +1,80 @@
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime
+from backends import create_backend
+from db import STATEMENTS
+from models.fields import format_datetime
+from benchmarks.runner import percentile
+
+
+def sample_ids(backend):
+    with backend.connection() as conn:
+        cursor = backend.cursor(conn)
+        try:
+            cursor.execute("SELECT customerID, customerAccountID FROM customer WHERE customerAccountID IS NOT NULL LIMIT 1")
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+    if row is None:
+        raise SystemExit("No customers in the database; run `python -m benchmarks --generate` first.")
+    return str(row[0]), str(row[1])
+
+
+def time_statements(prepared, count):
+    """Per-statement latencies (ms) for each hot statement, text or prepared protocol."""
+    backend = create_backend(pool_size=1)
+    backend.prepared = prepared
+    backend.statements.update(STATEMENTS)
+    customer_id, account_id = sample_ids(backend)
+    now = format_datetime(datetime.now().replace(microsecond=0))
+    cases = {
+        "adjust_balance": lambda: ("adjust_balance", (0, account_id, 0)),
+        "insert_activity_log": lambda: ("insert_activity_log", (str(uuid.uuid4()), "Customer", customer_id, "Bench", 0, now)),
+        "transactions_by_customer": lambda: ("transactions_by_customer", (customer_id,)),
+    }
+    samples = {}
+    try:
+        with backend.connection() as conn:
+            cursor = backend.cursor(conn)
+            try:
+                backend.begin(conn)
+                for case, params in cases.items():
+                    samples[case] = []
+                    # The first run prepares the statement; it is not timed.
+                    for run in range(count + 1):
+                        name, args = params()
+                        started = time.perf_counter()
+                        cursor.execute_prepared(name, args)
+                        if cursor.description:
+                            cursor.fetchall()
+                        if run:
+                            samples[case].append((time.perf_counter() - started) * 1000)
+            finally:
+                # Nothing is kept: the balance change is zero and the log rows go away.
+                conn.rollback()
+                cursor.close()
+    finally:
+        backend.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.statements",
+                                     description="Per-statement latency of the hot SQL, text protocol vs prepared.")
+    parser.add_argument("--count", type=int, default=2000, help="executions per statement")
+    args = parser.parse_args()
+
+    text = time_statements(False, args.count)
+    prepared = time_statements(True, args.count)
+    print(f"{'statement':<26}{'text p50':>10}{'prepared p50':>14}{'text mean':>11}{'prepared mean':>15}")
+    for case in text:
+        before, after = text[case], prepared[case]
+        print(f"{case:<26}{percentile(before, 50):>10.4f}{percentile(after, 50):>14.4f}"
+              f"{statistics.mean(before):>11.4f}{statistics.mean(after):>15.4f}  "
+              f"({statistics.mean(before) / statistics.mean(after):.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import csv
+import json
+import os
+import uuid
+from datetime import datetime
+from decimal import InvalidOperation
+from db import TransferError, to_money
+from models.transaction import Transaction
+from globals import account_objects, find_account_by_number, find_customer_by_account_id
+
+
+class PaymentResult:
+    def __init__(self, line, from_account, to_account, amount, status="pending", message=""):
+        self.line = line
+        self.from_account = from_account
+        self.to_account = to_account
+        self.amount = amount
+        self.status = status
+        self.message = message
+
+
+class MalformedRecord:
+    """Stands in for a line that could not be parsed, so it is reported instead of aborting the import."""
+
+    def __init__(self, message):
+        self.message = message
+
+    def get(self, key, default=None):
+        return default
+
+
+def parse_json_record(line):
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return MalformedRecord(f"Malformed JSON: {str(e)}")
+    if not isinstance(record, dict):
+        return MalformedRecord("Record is not a JSON object")
+    return record
+
+
+def read_records(path):
+    """Yield (line_number, record) pairs from a CSV or JSON-lines file; unparsable lines give a MalformedRecord."""
+    if os.path.splitext(path)[1].lower() in (".jsonl", ".ndjson", ".json"):
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_number, parse_json_record(line)
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            while True:
+                try:
+                    row = next(reader)
+                except StopIteration:
+                    return
+                except csv.Error as e:
+                    yield reader.line_num, MalformedRecord(f"Malformed CSV: {str(e)}")
+                    continue
+                yield reader.line_num, row
+
+
+def read_payments(path):
+    """Yield (line_number, record) pairs from a CSV or JSON-lines payment file.
+
+    Each record has from_account, to_account and amount. Accounts may be given
+    either as AccountID or as AccountNumber.
+    """
+    return read_records(path)
+
+
+def resolve_account(reference):
+    reference = str(reference or "").strip()
+    account = account_objects.get(reference)
+    if account is None:
+        account = find_account_by_number(reference)
+    return account
+
+
+def validate_payments(records):
+    """Check every payment against the in-memory accounts before anything is written.
+
+    Balances are projected line by line, so a file that would overdraw an
+    account part-way through is caught here. Returns the list of results; the
+    ones still "pending" are valid.
+    """
+    projected = {}
+    results = []
+    for line_number, record in records:
+        result = PaymentResult(line_number, record.get("from_account"), record.get("to_account"), record.get("amount"))
+        results.append(result)
+        if isinstance(record, MalformedRecord):
+            result.status, result.message = "rejected", record.message
+            continue
+        try:
+            amount = to_money(record.get("amount"))
+        except (InvalidOperation, TypeError, ValueError):
+            amount = None
+        # NaN survives quantize() and then fails every comparison.
+        if amount is None or not amount.is_finite():
+            result.status, result.message = "rejected", "Invalid amount"
+            continue
+        source = resolve_account(record.get("from_account"))
+        target = resolve_account(record.get("to_account"))
+        if amount <= 0:
+            result.status, result.message = "rejected", "Amount must be positive"
+        elif source is None:
+            result.status, result.message = "rejected", "Unknown source account"
+        elif target is None:
+            result.status, result.message = "rejected", "Unknown target account"
+        elif source is target:
+            result.status, result.message = "rejected", "Source and target are the same account"
+        else:
+            source_id, target_id = str(source.AccountID), str(target.AccountID)
+            available = projected.get(source_id, to_money(source.Balance))
+            if available < amount:
+                result.status, result.message = "rejected", "Insufficient funds"
+                continue
+            projected[source_id] = available - amount
+            projected[target_id] = projected.get(target_id, to_money(target.Balance)) + amount
+            result.from_account, result.to_account, result.amount = source_id, target_id, amount
+    return results
+
+
+def apply_payments(db, results, chunk_size=None):
+    """Write the valid payments in chunks, one DB transaction per chunk."""
+    chunk_size = chunk_size or int(os.getenv('BULK_CHUNK_SIZE', 1000))
+    pending = [result for result in results if result.status == "pending"]
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        deltas = {}
+        transactions = []
+        now = datetime.now().replace(microsecond=0)
+        for result in chunk:
+            deltas[result.from_account] = deltas.get(result.from_account, 0) - result.amount
+            deltas[result.to_account] = deltas.get(result.to_account, 0) + result.amount
+            owner = find_customer_by_account_id(result.from_account)
+            if owner is not None:
+                transactions.append(Transaction(str(uuid.uuid4()), "Transfer", result.amount, now, owner.customerID))
+        try:
+            db.apply_transfer_batch(deltas, transactions)
+        except TransferError as e:
+            for result in chunk:
+                result.status, result.message = "failed", f"Chunk rolled back: {str(e)}"
+            continue
+        except Exception as e:
+            for result in chunk:
+                result.status, result.message = "failed", f"Database error: {str(e)}"
+            continue
+        for result in chunk:
+            result.status = "applied"
+    return results
+
+
+def import_payment_file(db, path, chunk_size=None):
+    results = validate_payments(read_payments(path))
+    return apply_payments(db, results, chunk_size)
+
+
+def summarize(results):
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    return counts
+
+
+def write_report(results, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["line", "from_account", "to_account", "amount", "status", "message"])
+        for result in results:
+            writer.writerow([result.line, result.from_account, result.to_account, result.amount, result.status, result.message])
@@ -0,0 +1,215 @@
+import threading
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def available():
+    return np is not None
+
+
+class TransactionColumns:
+    """Array-backed copy of the transaction table for reports.
+
+    Each column is a NumPy array: amount in cents, timestamp in seconds, a
+    small type code, a dense customer code and the transaction ID as 36 bytes
+    (transactionID is a VARCHAR(36) UUID). Type names and customer IDs live in
+    side tables. Rows are only ever appended, so readers work on a snapshot of
+    the first `n` rows without holding the lock.
+    """
+
+    COLUMNS = ("amount", "timestamp", "type_code", "customer_code", "transaction_ids")
+
+    def __init__(self, capacity=1024):
+        self._lock = threading.Lock()
+        self.n = 0
+        self.amount = np.zeros(capacity, dtype=np.int64)
+        self.timestamp = np.zeros(capacity, dtype="datetime64[s]")
+        self.type_code = np.zeros(capacity, dtype=np.int16)
+        self.customer_code = np.zeros(capacity, dtype=np.int32)
+        self.transaction_ids = np.zeros(capacity, dtype="S36")
+        self.type_names = []
+        self.customer_ids = []
+        self._type_codes = {}
+        self._customer_codes = {}
+
+    def __len__(self):
+        return self.n
+
+    def clear(self):
+        with self._lock:
+            self.n = 0
+
+    def state(self):
+        """Plain-data copy of the store, for the snapshot."""
+        with self._lock:
+            n = self.n
+            state = {name: getattr(self, name)[:n].copy() for name in self.COLUMNS}
+            state.update(n=n, type_names=list(self.type_names), customer_ids=list(self.customer_ids))
+            return state
+
+    @classmethod
+    def from_state(cls, state):
+        columns = cls(max(1024, state["n"]))
+        n = columns.n = state["n"]
+        for name in cls.COLUMNS:
+            getattr(columns, name)[:n] = state[name]
+        columns.type_names = state["type_names"]
+        columns.customer_ids = state["customer_ids"]
+        columns._type_codes = {name: code for code, name in enumerate(columns.type_names)}
+        columns._customer_codes = {customer_id: code for code, customer_id in enumerate(columns.customer_ids)}
+        return columns
+
+    def _code(self, codes, names, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def _grow(self, needed):
+        capacity = len(self.amount)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.n] = column[:self.n]
+            setattr(self, name, grown)
+
+    def append_rows(self, rows):
+        """Append (transactionID, transactionType, amount, transactionDate, customerID) tuples."""
+        if not rows:
+            return
+        ids, types, amounts, dates, customers = zip(*rows)
+        amount = np.rint(np.array([float(a or 0) for a in amounts]) * 100).astype(np.int64)
+        timestamp = self._timestamps(dates)
+        transaction_ids = self._ids(ids)
+        with self._lock:
+            type_code = np.array([self._code(self._type_codes, self.type_names, t) for t in types], dtype=np.int16)
+            customer_code = np.array([self._code(self._customer_codes, self.customer_ids, str(c)) for c in customers],
+                                     dtype=np.int32)
+            start, end = self.n, self.n + len(rows)
+            self._grow(end)
+            self.amount[start:end] = amount
+            self.timestamp[start:end] = timestamp
+            self.type_code[start:end] = type_code
+            self.customer_code[start:end] = customer_code
+            self.transaction_ids[start:end] = transaction_ids
+            self.n = end
+
+    def append_transactions(self, transactions):
+        self.append_rows([(t.transactionID, t.transactionType, t.amount, t.transactionDate, t.customerID)
+                          for t in transactions])
+
+    def merge_rows(self, rows):
+        """Append rows from an incremental sync, skipping IDs that are already stored.
+
+        A duplicate carries the same transactionDate as the stored copy, so only
+        stored rows at or after the oldest incoming date need checking.
+        """
+        if not rows:
+            return
+        incoming = self._timestamps([row[3] for row in rows])
+        n, timestamp, ids = self._snapshot("timestamp", "transaction_ids")
+        if not np.isnat(incoming).any():
+            ids = ids[timestamp >= incoming.min()]
+        known = np.isin(self._ids([row[0] for row in rows]), ids)
+        self.append_rows([row for row, stored in zip(rows, known) if not stored])
+
+    def _ids(self, ids):
+        return np.array([str(i).encode("ascii") for i in ids], dtype="S36")
+
+    def _timestamps(self, dates):
+        try:
+            return np.array([d.isoformat() if isinstance(d, datetime) else d for d in dates], dtype="datetime64[s]")
+        except ValueError:
+            result = np.full(len(dates), np.datetime64("NaT"), dtype="datetime64[s]")
+            for i, d in enumerate(dates):
+                try:
+                    result[i] = np.datetime64(d.isoformat() if isinstance(d, datetime) else d, "s")
+                except (TypeError, ValueError):
+                    pass
+            return result
+
+    def _snapshot(self, *columns):
+        with self._lock:
+            n = self.n
+            return (n,) + tuple(getattr(self, name)[:n] for name in columns)
+
+    def _mask(self, timestamp, type_code, transaction_type, start, end, dated=False):
+        # None means "every row", which lets unfiltered reports skip the copy.
+        mask = None
+        if dated or start is not None or end is not None:
+            mask = ~np.isnat(timestamp)
+        if transaction_type is not None:
+            code = self._type_codes.get(transaction_type, -1)
+            mask = type_code == code if mask is None else mask & (type_code == code)
+        if start is not None:
+            mask &= timestamp >= np.datetime64(start, "s")
+        if end is not None:
+            mask &= timestamp < np.datetime64(end, "s")
+        return mask
+
+    def _group(self, codes, amount, mask, size):
+        if mask is not None:
+            codes, amount = codes[mask], amount[mask]
+        return np.bincount(codes, weights=amount, minlength=size), np.bincount(codes, minlength=size)
+
+    def totals_by_customer(self, transaction_type=None, start=None, end=None):
+        """Return {customerID: (total, count)} for the matching transactions."""
+        n, amount, timestamp, type_code, customer_code = self._snapshot("amount", "timestamp", "type_code", "customer_code")
+        mask = self._mask(timestamp, type_code, transaction_type, start, end)
+        sums, counts = self._group(customer_code, amount, mask, len(self.customer_ids))
+        return {self.customer_ids[code]: (float(sums[code]) / 100, int(counts[code])) for code in np.nonzero(counts)[0]}
+
+    def top_customers(self, limit=10, transaction_type=None, start=None, end=None):
+        """Return [(customerID, total, count)] for the `limit` customers with the largest total."""
+        n, amount, timestamp, type_code, customer_code = self._snapshot("amount", "timestamp", "type_code", "customer_code")
+        mask = self._mask(timestamp, type_code, transaction_type, start, end)
+        sums, counts = self._group(customer_code, amount, mask, len(self.customer_ids))
+        return [(self.customer_ids[code], float(sums[code]) / 100, int(counts[code]))
+                for code in self._top_indices(sums, limit) if counts[code]]
+
+    def volume_by_period(self, unit="D", transaction_type=None, start=None, end=None):
+        """Return [(period_start, total, count)] bucketed by a NumPy datetime unit ("h", "D", "W", "M", "Y")."""
+        n, amount, timestamp, type_code = self._snapshot("amount", "timestamp", "type_code")
+        mask = self._mask(timestamp, type_code, transaction_type, start, end, dated=True)
+        timestamp, amount = timestamp[mask], amount[mask]
+        if not len(timestamp):
+            return []
+        buckets = timestamp.astype(f"datetime64[{unit}]").astype(np.int64)
+        first = buckets.min()
+        sums, counts = self._group(buckets - first, amount, None, 0)
+        return [(np.datetime64(int(first + i), unit).item(), float(sums[i]) / 100, int(counts[i]))
+                for i in np.nonzero(counts)[0]]
+
+    def totals_by_type(self, start=None, end=None):
+        """Return {transactionType: (total, count)}."""
+        n, amount, timestamp, type_code = self._snapshot("amount", "timestamp", "type_code")
+        mask = self._mask(timestamp, type_code, None, start, end)
+        sums, counts = self._group(type_code, amount, mask, len(self.type_names))
+        return {self.type_names[code]: (float(sums[code]) / 100, int(counts[code])) for code in np.nonzero(counts)[0]}
+
+    def largest(self, limit=10, transaction_type=None, start=None, end=None):
+        """Return the `limit` largest transactions as (transactionID, type, amount, date, customerID) tuples."""
+        n, amount, timestamp, type_code, customer_code, ids = self._snapshot("amount", "timestamp", "type_code", "customer_code",
+                                                                            "transaction_ids")
+        mask = self._mask(timestamp, type_code, transaction_type, start, end)
+        rows = np.arange(n) if mask is None else np.nonzero(mask)[0]
+        top = rows[self._top_indices(amount[rows], limit)]
+        return [(ids[i].decode("ascii"), self.type_names[type_code[i]], float(amount[i]) / 100, timestamp[i].item(),
+                 self.customer_ids[customer_code[i]]) for i in top]
+
+    def _top_indices(self, values, limit):
+        # argpartition picks the top `limit` in linear time; only those are sorted.
+        if len(values) > limit:
+            candidates = np.argpartition(values, -limit)[-limit:]
+        else:
+            candidates = np.arange(len(values))
+        return candidates[np.argsort(values[candidates])[::-1]]
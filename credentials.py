@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import hmac
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# scrypt cost: 128 * r * n bytes = 16 MiB of memory and tens of milliseconds per hash.
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+# Used instead when the OpenSSL build has no scrypt.
+PBKDF2_ITERATIONS = 600000
+SALT_BYTES = 16
+LEGACY_MD5 = re.compile(r"[0-9a-f]{32}")
+
+
+def _md5(text):
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+def hash_password(password):
+    """Salted scrypt hash, stored as scrypt$n$r$p$salt$hash (PBKDF2-SHA256 if scrypt is unavailable)."""
+    salt = os.urandom(SALT_BYTES)
+    if hasattr(hashlib, "scrypt"):
+        digest = hashlib.scrypt(password.encode('utf-8'), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P,
+                                maxmem=256 * SCRYPT_R * SCRYPT_N, dklen=32)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode('utf-8'), salt, PBKDF2_ITERATIONS)
+    return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password, stored):
+    if not stored or password is None:
+        return False
+    if stored.startswith("scrypt$"):
+        _, n, r, p, salt, expected = stored.split("$")
+        n, r = int(n), int(r)
+        digest = hashlib.scrypt(password.encode('utf-8'), salt=bytes.fromhex(salt), n=n, r=r, p=int(p),
+                                maxmem=256 * r * n, dklen=len(expected) // 2)
+        return hmac.compare_digest(digest.hex(), expected)
+    if stored.startswith("pbkdf2_sha256$"):
+        _, iterations, salt, expected = stored.split("$")
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode('utf-8'), bytes.fromhex(salt), int(iterations))
+        return hmac.compare_digest(digest.hex(), expected)
+    if LEGACY_MD5.fullmatch(stored):
+        # Unsalted MD5 from before the KDF. The old Database.save_employee
+        # hashed employee passwords a second time, so accept that too.
+        once = _md5(password)
+        return hmac.compare_digest(once, stored) or hmac.compare_digest(_md5(once), stored)
+    return False
+
+
+def needs_rehash(stored):
+    """True for legacy MD5 hashes and for hashes made with weaker settings than the current ones."""
+    if not stored:
+        return False
+    if stored.startswith("scrypt$"):
+        _, n, r, p, _, _ = stored.split("$")
+        return not hasattr(hashlib, "scrypt") or (int(n), int(r), int(p)) < (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    if stored.startswith("pbkdf2_sha256$"):
+        return hasattr(hashlib, "scrypt") or int(stored.split("$")[1]) < PBKDF2_ITERATIONS
+    return True
+
+
+class CredentialService:
+    """Password hashing and verification in a pool of worker processes.
+
+    A hash costs tens of milliseconds of CPU, so it must not run on the GUI
+    thread or the HTTP event loop, and a process pool lets logins use every
+    core despite the GIL. Workers default to one per core
+    (CREDENTIAL_WORKERS); with 0 workers hashing runs in the calling thread.
+    hash/verify block only the calling thread; hash_async/verify_async can
+    be awaited from an event loop.
+    """
+
+    def __init__(self, workers=None):
+        if workers is None:
+            workers = int(os.getenv('CREDENTIAL_WORKERS', os.cpu_count() or 1))
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        with self._lock:
+            if self._pool is None and self.workers > 0:
+                # The app already runs database and GUI threads, and forking a
+                # multi-threaded process can deadlock, so workers are spawned.
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def discard(self, pool):
+        # A worker died (killed for using too much memory, say) and the pool
+        # refuses new work; the next call starts a fresh one.
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def call(self, fn, *args):
+        pool = self.executor()
+        if pool is None:
+            return fn(*args)
+        try:
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            self.discard(pool)
+            raise
+
+    async def call_async(self, fn, *args):
+        pool = self.executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            self.discard(pool)
+            raise
+
+    def hash(self, password):
+        return self.call(hash_password, password)
+
+    def verify(self, password, stored):
+        return self.call(verify_password, password, stored)
+
+    def hash_many(self, passwords):
+        """Hash a batch of passwords across all workers, in order."""
+        pool = self.executor()
+        if pool is None:
+            return [hash_password(password) for password in passwords]
+        try:
+            return list(pool.map(hash_password, passwords, chunksize=max(1, len(passwords) // (self.workers * 4))))
+        except BrokenProcessPool:
+            self.discard(pool)
+            raise
+
+    async def hash_async(self, password):
+        return await self.call_async(hash_password, password)
+
+    async def verify_async(self, password, stored):
+        return await self.call_async(verify_password, password, stored)
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_service():
+    """The process-wide CredentialService, created on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = CredentialService()
+        return _default
@@ -1,33 +1,184 @@
-import mysql.connector
 from dotenv import load_dotenv
 import os
+import threading
 import traceback
-import hashlib
+import time
+import uuid
+from contextlib import contextmanager
 from models.customer import Customer
 from models.employee import Employee
 from models.debitcard import DebitCard
 from models.account import Account
 from models.transaction import Transaction
 from models.activitylog import ActivityLog
-from globals import customer_objects, account_objects, employee_objects, transactions, activity_logs
+from models.fields import format_datetime, parse_datetime
+from globals import (customer_objects, account_objects, employee_objects,
+                     register_customer, register_account, register_employee, rename_customer, rename_employee,
+                     update_customer, update_account, update_employee, find_customer_by_account_id)
+from datetime import datetime, timedelta
+from decimal import Decimal
+from history import HistoryStore
+from id_allocator import IdAllocator
+from journal import WriteBehindJournal
+from columnar import TransactionColumns
+import columnar
+import metrics
+import migrations
+from migrations.m0002_sync_columns import SYNC_TABLES
+from metrics import instrumented
+from backends import create_backend, DB_ERRORS
 
 load_dotenv()
 
+# Re-read a short window before the last high-water mark so rows whose
+# timestamp was taken before a concurrent commit landed are not missed.
+SYNC_OVERLAP = timedelta(seconds=2)
+CENTS = Decimal("0.01")
+
+INSERT_CUSTOMER = '''
+    INSERT INTO customer (customerID, customerUserName, customerPassword, customerName, nationalID, customerEmail, customerAccountID)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+'''
+INSERT_ACCOUNT = '''
+    INSERT INTO account (AccountID, AccountType, Balance, AccountNumber)
+    VALUES (%s, %s, %s, %s)
+'''
+INSERT_DEBIT_CARD = '''
+    INSERT INTO debitcard (cardNumber, cardPin, cardExpiryDate, cardStatus, customerID)
+    VALUES (%s, %s, %s, %s, %s)
+'''
+INSERT_EMPLOYEE = '''
+    INSERT INTO employee (employeeID, employeeUserName, employeePassword, employeeName, nationalID, position, employeeEmail, employeePhone)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+'''
+INSERT_TRANSACTION = '''
+    INSERT INTO `transaction` (transactionID, transactionType, amount, transactionDate, customerID)
+    VALUES (%s, %s, %s, %s, %s)
+'''
+INSERT_ACTIVITY_LOG = '''
+    INSERT INTO activitylog (logID, userType, userID, actionType, amount, logTime)
+    VALUES (%s, %s, %s, %s, %s, %s)
+'''
+ADJUST_BALANCE = "UPDATE account SET Balance = Balance + %s WHERE AccountID = %s AND Balance + %s >= 0"
+SHIFT_BALANCE = "UPDATE account SET Balance = Balance + %s WHERE AccountID = %s"
+ALL_TRANSACTIONS = "SELECT transactionID, transactionType, amount, transactionDate, customerID FROM `transaction`"
+TRANSACTIONS_BY_CUSTOMER = '''
+    SELECT transactionID, transactionType, amount, transactionDate, customerID FROM `transaction` WHERE customerID = %s
+'''
+# Keyset pagination over idx_transaction_customer_date, newest first: each
+# page seeks to the (date, id) of the last row of the previous page instead
+# of skipping rows with OFFSET.
+TRANSACTION_PAGE = '''
+    SELECT transactionID, transactionType, amount, transactionDate, customerID FROM `transaction`
+    WHERE customerID = %s
+    ORDER BY transactionDate DESC, transactionID DESC LIMIT %s
+'''
+TRANSACTION_PAGE_BEFORE = '''
+    SELECT transactionID, transactionType, amount, transactionDate, customerID FROM `transaction`
+    WHERE customerID = %s AND (transactionDate, transactionID) < (%s, %s)
+    ORDER BY transactionDate DESC, transactionID DESC LIMIT %s
+'''
+# Hot statements, run by name with cursor.execute_prepared(). The MySQL
+# backend prepares each one once per pooled connection and afterwards sends
+# only the parameters; SQLite reuses its compiled statements.
+STATEMENTS = {
+    "insert_customer": INSERT_CUSTOMER,
+    "insert_account": INSERT_ACCOUNT,
+    "insert_debit_card": INSERT_DEBIT_CARD,
+    "insert_employee": INSERT_EMPLOYEE,
+    "insert_transaction": INSERT_TRANSACTION,
+    "insert_activity_log": INSERT_ACTIVITY_LOG,
+    "adjust_balance": ADJUST_BALANCE,
+    "shift_balance": SHIFT_BALANCE,
+    "transactions_by_customer": TRANSACTIONS_BY_CUSTOMER,
+    "transaction_page": TRANSACTION_PAGE,
+    "transaction_page_before": TRANSACTION_PAGE_BEFORE,
+}
+# Access paths the migrations index, with the sample values explain_hot_queries() runs them with.
+HOT_QUERIES = {
+    "account_by_number": ("SELECT AccountID, Balance FROM account WHERE AccountNumber = %s", ("account_number",)),
+    "customer_by_username": ("SELECT customerID FROM customer WHERE customerUserName = %s", ("customer_username",)),
+    "employee_by_username": ("SELECT employeeID FROM employee WHERE employeeUserName = %s", ("employee_username",)),
+    "customer_by_account": ("SELECT customerID FROM customer WHERE customerAccountID = %s", ("account_id",)),
+    "debit_cards_by_customer": ("SELECT cardNumber FROM debitcard WHERE customerID = %s", ("customer_id",)),
+    "transactions_by_customer": (TRANSACTIONS_BY_CUSTOMER, ("customer_id",)),
+    "transaction_page": (TRANSACTION_PAGE, ("customer_id", "limit")),
+    "transaction_page_before": (TRANSACTION_PAGE_BEFORE, ("customer_id", "date", "transaction_id", "limit")),
+    "adjust_balance": (ADJUST_BALANCE, ("delta", "account_id", "delta")),
+}
+
+
+class TransferError(Exception):
+    pass
+
+
+def to_money(value):
+    return Decimal(str(value)).quantize(CENTS)
+
+
+def money_or_none(value):
+    return None if value is None else to_money(value)
+
+
+def customer_params(customer):
+    return (customer.customerID, customer.customerUserName, customer.customerPassword, customer.customerName,
+            customer.nationalID, customer.customerEmail, customer.customerAccountID)
+
+
+def account_params(account):
+    return (account.AccountID, account.AccountType, money_or_none(account.Balance), account.AccountNumber)
+
+
+def debit_card_params(debit_card):
+    return (debit_card.cardNumber, debit_card.cardPin, format_datetime(debit_card.cardExpiryDate), debit_card.cardStatus, debit_card.customerID)
+
+
+def transaction_params(transaction):
+    return (transaction.transactionID, transaction.transactionType, money_or_none(transaction.amount), format_datetime(transaction.transactionDate), transaction.customerID)
+
+
+def activity_log_params(activity_log):
+    return (activity_log.logID, activity_log.userType, activity_log.userID, activity_log.actionType, money_or_none(activity_log.amount), format_datetime(activity_log.logTime))
+
+
+def insert_rows(cursor, name, rows):
+    # One row goes through the prepared statement; more go through
+    # executemany, which sends them as a single multi-row INSERT.
+    if len(rows) == 1:
+        cursor.execute_prepared(name, rows[0])
+    elif rows:
+        cursor.executemany(STATEMENTS[name], rows)
+
+
 class Database:
-    def __init__(self):
-        try:
-            self.conn = mysql.connector.connect(
-                host=os.getenv('DB_HOST'),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASSWORD'),
-                database=os.getenv('DB_DATABASE'),
-                port=int(os.getenv('DB_PORT', 3306)),
-                use_pure=True,
-                connection_timeout=10
-            )
-            self.cursor = self.conn.cursor(dictionary=True)
-        except mysql.connector.Error as e:
-            print(f"Database initialization error (MySQL): {str(e)}")
+    def __init__(self, pool_size=None, backend=None):
+        try:
+            # MySQL or embedded SQLite, chosen by DB_BACKEND in .env.
+            self.backend = create_backend(backend, pool_size)
+            self.pool_size = self.backend.pool_size
+            self.backend.statements.update(STATEMENTS)
+            self.fetch_batch_size = int(os.getenv('DB_FETCH_BATCH_SIZE', 5000))
+            self.high_water = {}
+            self.history = HistoryStore(self)
+            # Customer, account and card IDs, reserved from id_sequence in blocks.
+            self.ids = IdAllocator(self)
+            self._sync_columns = None
+            # Column store for transaction reports; needs numpy. Built by
+            # transaction_columns() when the first report asks for it.
+            self.analytics = None
+            self.analytics_enabled = columnar.available() and os.getenv('DB_ANALYTICS', '1') == '1'
+            self._analytics_lock = threading.Lock()
+            # Per-statement and per-method counters; None turns instrumentation off.
+            self.metrics = metrics.DatabaseMetrics() if metrics.enabled() else None
+            self.metrics_logger = None
+            log_seconds = float(os.getenv('DB_METRICS_LOG_SECONDS', 300))
+            if self.metrics is not None and log_seconds > 0:
+                self.metrics_logger = metrics.MetricsLogger(self.metrics, log_seconds)
+            self.journal = None
+            if os.getenv('DB_WRITE_BEHIND', '1') == '1':
+                self.journal = WriteBehindJournal(self)
+        except DB_ERRORS as e:
+            print(f"Database initialization error: {str(e)}")
             traceback.print_exc()
             raise
         except Exception as e:
@@ -35,116 +186,273 @@ class Database:
             traceback.print_exc()
             raise
 
+    @contextmanager
+    def connection(self):
+        """Check out a connection for one operation and hand it back afterwards."""
+        with self.backend.connection() as conn:
+            yield conn
+
+    def cursor(self, conn, dictionary=False, stream=False):
+        cursor = self.backend.cursor(conn, dictionary=dictionary, stream=stream)
+        if self.metrics is None:
+            return cursor
+        return metrics.InstrumentedCursor(cursor, self.metrics)
+
+    @contextmanager
+    def transaction(self, dictionary=False, write=True):
+        """Yield a short-lived cursor; commit if the block succeeds, roll back otherwise.
+
+        Pass write=False for blocks that only read, so SQLite does not take
+        the write lock for them.
+        """
+        with self.connection() as conn:
+            cursor = self.cursor(conn, dictionary=dictionary)
+            try:
+                self.backend.begin(conn, write)
+                yield cursor
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def query(self, sql, params=(), dictionary=False):
+        with self.connection() as conn:
+            cursor = self.cursor(conn, dictionary=dictionary)
+            try:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    def query_one(self, sql, params=(), dictionary=False):
+        rows = self.query(sql, params, dictionary)
+        return rows[0] if rows else None
+
+    def query_prepared(self, name, params=()):
+        """query() for a statement in STATEMENTS; rows come back as tuples."""
+        with self.connection() as conn:
+            cursor = self.cursor(conn)
+            try:
+                return cursor.execute_prepared(name, params).fetchall()
+            finally:
+                cursor.close()
+
+    @instrumented
     def save_customer(self, customer):
         try:
-            self.cursor.execute('''
-                INSERT INTO customer (customerID, customerUserName, customerPassword, customerName, nationalID, customerEmail, customerAccountID)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            ''', (customer.customerID, customer.customerUserName, customer.customerPassword, customer.customerName, customer.nationalID, customer.customerEmail, customer.customerAccountID))
-            self.conn.commit()
-        except mysql.connector.Error as e:
+            with self.transaction() as cursor:
+                cursor.execute_prepared("insert_customer", customer_params(customer))
+        except DB_ERRORS as e:
             print(f"Error saving customer: {str(e)}")
             raise
 
+    @instrumented
     def save_account(self, account):
         try:
-            self.cursor.execute('''
-                INSERT INTO account (AccountID, AccountType, Balance, AccountNumber)
-                VALUES (%s, %s, %s, %s)
-            ''', (account.AccountID, account.AccountType, account.Balance, account.AccountNumber))
-            self.conn.commit()
-        except mysql.connector.Error as e:
+            with self.transaction() as cursor:
+                cursor.execute_prepared("insert_account", account_params(account))
+        except DB_ERRORS as e:
             print(f"Error saving account: {str(e)}")
             raise
 
+    @instrumented
     def save_debit_card(self, debit_card):
         try:
-            self.cursor.execute('''
-                INSERT INTO debitcard (cardNumber, cardPin, cardExpiryDate, cardStatus, customerID)
-                VALUES (%s, %s, %s, %s, %s)
-            ''', (debit_card.cardNumber, debit_card.cardPin, debit_card.cardExpiryDate, debit_card.cardStatus, debit_card.customerID))
-            self.conn.commit()
-        except mysql.connector.Error as e:
+            with self.transaction() as cursor:
+                cursor.execute_prepared("insert_debit_card", debit_card_params(debit_card))
+        except DB_ERRORS as e:
             print(f"Error saving debit card: {str(e)}")
             raise
 
+    @instrumented
+    def save_new_customer(self, customer, account, debit_card):
+        """Insert a customer with its account and debit card in one transaction."""
+        try:
+            with self.transaction() as cursor:
+                cursor.execute_prepared("insert_account", account_params(account))
+                cursor.execute_prepared("insert_customer", customer_params(customer))
+                cursor.execute_prepared("insert_debit_card", debit_card_params(debit_card))
+        except DB_ERRORS as e:
+            print(f"Error saving new customer: {str(e)}")
+            raise
+
+    @instrumented
+    def save_new_customers(self, bundles):
+        """Insert many (customer, account, debit_card) bundles with executemany in one transaction."""
+        try:
+            with self.transaction() as cursor:
+                insert_rows(cursor, "insert_account", [account_params(account) for _, account, _ in bundles])
+                insert_rows(cursor, "insert_customer", [customer_params(customer) for customer, _, _ in bundles])
+                insert_rows(cursor, "insert_debit_card", [debit_card_params(card) for _, _, card in bundles])
+        except DB_ERRORS as e:
+            print(f"Error saving customer batch: {str(e)}")
+            raise
+
+    @instrumented
+    def reserve_ids(self, name, count):
+        """Reserve `count` consecutive values of an id_sequence counter; returns the first."""
+        try:
+            with self.transaction() as cursor:
+                first = self.backend.reserve_ids(cursor, name, count)
+        except DB_ERRORS as e:
+            print(f"Error reserving {name} IDs: {str(e)}")
+            raise
+        if first is None:
+            raise ValueError(f"Error: No '{name}' ID sequence; run python -m migrations")
+        return int(first)
+
+    @instrumented
     def save_employee(self, employee):
         try:
-            hashed_password = hashlib.md5(employee.employeePassword.encode('utf-8')).hexdigest()
-            self.cursor.execute('''
-                INSERT INTO employee (employeeID, employeeUserName, employeePassword, employeeName, nationalID, position, employeeEmail, employeePhone)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ''', (employee.employeeID, employee.employeeUserName, hashed_password, employee.employeeName, employee.nationalID, employee.position, employee.employeeEmail, employee.employeePhone))
-            self.conn.commit()
-        except mysql.connector.Error as e:
+            # employeePassword is already hashed by the caller.
+            with self.transaction() as cursor:
+                cursor.execute_prepared("insert_employee", (employee.employeeID, employee.employeeUserName, employee.employeePassword,
+                                                            employee.employeeName, employee.nationalID, employee.position,
+                                                            employee.employeeEmail, employee.employeePhone))
+        except DB_ERRORS as e:
             print(f"Error saving employee: {str(e)}")
             raise
 
+    @instrumented
     def save_transaction(self, transaction):
+        self._record_transactions([transaction])
+        if self.journal is not None:
+            self.journal.append_transaction(transaction)
+            return
+        self.write_history_batch([transaction], ())
+
+    @instrumented
+    def save_activity_log(self, activity_log):
+        if self.journal is not None:
+            self.journal.append_activity_log(activity_log)
+            return
+        self.write_history_batch((), [activity_log])
+
+    @instrumented
+    def write_history_batch(self, transactions, activity_logs):
+        """Insert transaction and activity-log rows in a single commit."""
         try:
-            self.cursor.execute('''
-                INSERT INTO transaction (transactionID, transactionType, amount, transactionDate, customerID)
-                VALUES (%s, %s, %s, %s, %s)
-            ''', (transaction.transactionID, transaction.transactionType, transaction.amount, transaction.transactionDate, transaction.customerID))
-            self.conn.commit()
-        except mysql.connector.Error as e:
-            print(f"Error saving transaction: {str(e)}")
+            with self.transaction() as cursor:
+                insert_rows(cursor, "insert_transaction", [transaction_params(t) for t in transactions])
+                insert_rows(cursor, "insert_activity_log", [activity_log_params(log) for log in activity_logs])
+        except DB_ERRORS as e:
+            print(f"Error saving history batch: {str(e)}")
             raise
+        for customer_id in {t.customerID for t in transactions}:
+            self.history.invalidate(customer_id)
+        if activity_logs:
+            self.history.invalidate_activity_logs()
 
-    def save_activity_log(self, activity_log):
+    def _record_transactions(self, transactions):
+        if self.analytics is not None and transactions:
+            self.analytics.append_transactions(transactions)
+
+    def flush(self):
+        if self.journal is not None:
+            self.journal.flush()
+
+    @instrumented
+    def transfer_funds(self, from_account_id, to_account_id, amount, customer_id=None):
+        """Move money between two accounts atomically and record the transfer.
+
+        The debit/credit is a single conditional UPDATE and the transaction row
+        is written in the same commit. In-memory balances are only touched once
+        the commit succeeded. Returns the recorded Transaction (or None when the
+        source account has no owning customer).
+        """
+        from_account_id, to_account_id = str(from_account_id), str(to_account_id)
+        amount = to_money(amount)
+        if amount <= 0:
+            raise TransferError("Amount must be positive.")
+        if from_account_id == to_account_id:
+            raise TransferError("Cannot transfer to the same account.")
+        if customer_id is None:
+            owner = find_customer_by_account_id(from_account_id)
+            customer_id = owner.customerID if owner else None
+        transaction = None
+        if customer_id is not None:
+            transaction = Transaction(str(uuid.uuid4()), "Transfer", amount, datetime.now().replace(microsecond=0), customer_id)
         try:
-            self.cursor.execute('''
-                INSERT INTO activitylog (logID, userType, userID, actionType, amount, logTime)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            ''', (activity_log.logID, activity_log.userType, activity_log.userID, activity_log.actionType, activity_log.amount, activity_log.logTime))
-            self.conn.commit()
-        except mysql.connector.Error as e:
-            print(f"Error saving activity log: {str(e)}")
-            raise
-
-    def load_data(self):
-        try:
-            self.cursor.execute("SELECT customerID, customerUserName, nationalID, customerPassword, customerEmail, customerAccountID, customerName FROM customer")
-            for row in self.cursor.fetchall():
-                customer = Customer(
-                    row['customerUserName'],
-                    row['nationalID'],
-                    row['customerPassword'],
-                    row['customerEmail'],
-                    row['customerAccountID'],
-                    row['customerID'],
-                    row['customerName']
-                )
-                customer_objects[str(row['customerID'])] = customer
-
-            self.cursor.execute("SELECT AccountID, AccountType, Balance, AccountNumber FROM account")
-            for row in self.cursor.fetchall():
-                account = Account(row['AccountID'], row['AccountType'], row['Balance'], row['AccountNumber'])
-                account_objects[str(row['AccountID'])] = account
-                for customer_id, customer in customer_objects.items():
-                    if customer.customerAccountID == row['AccountID']:
-                        customer.link_account(account)
+            with self.transaction() as cursor:
+                if not self.backend.transfer(cursor, from_account_id, to_account_id, amount):
+                    raise TransferError("Insufficient funds or unknown account.")
+                if transaction is not None:
+                    cursor.execute_prepared("insert_transaction", transaction_params(transaction))
+        except DB_ERRORS as e:
+            print(f"Error transferring funds: {str(e)}")
+            raise
+        self._apply_balance(from_account_id, -amount)
+        self._apply_balance(to_account_id, amount)
+        if transaction is not None:
+            self._record_transactions([transaction])
+            self.history.invalidate(customer_id)
+        return transaction
+
+    @instrumented
+    def adjust_balance(self, account_id, delta):
+        """Deposit (positive delta) or withdraw (negative delta) without letting the balance go below zero."""
+        account_id = str(account_id)
+        delta = to_money(delta)
+        try:
+            with self.transaction() as cursor:
+                cursor.execute_prepared("adjust_balance", (delta, account_id, delta))
+                if cursor.rowcount != 1:
+                    raise TransferError("Insufficient funds or unknown account.")
+        except DB_ERRORS as e:
+            print(f"Error adjusting balance: {str(e)}")
+            raise
+        self._apply_balance(account_id, delta)
+
+    @instrumented
+    def apply_transfer_batch(self, deltas, transactions):
+        """Apply pre-validated net balance changes and their transaction rows in one commit.
 
-            self.cursor.execute("SELECT cardNumber, cardPin, cardExpiryDate, cardStatus, customerID FROM debitcard")
-            for row in self.cursor.fetchall():
-                debit_card = DebitCard(row['cardNumber'], row['cardPin'], row['cardExpiryDate'], row['cardStatus'], row['customerID'])
-                if str(row['customerID']) in customer_objects:
-                    customer_objects[str(row['customerID'])].link_debit_card(debit_card)
-
-            self.cursor.execute("SELECT employeeID, employeeUserName, employeePassword, employeeName, nationalID, position, employeeEmail, employeePhone FROM employee")
-            for row in self.cursor.fetchall():
-                employee = Employee(row['employeeName'], row['nationalID'], row['employeeID'], row['position'], row['employeeEmail'], row['employeePhone'])
-                employee.set_credentials(row['employeeUserName'], row['employeePassword'])
-                employee_objects[str(row['employeeID'])] = employee
-
-            self.cursor.execute("SELECT transactionID, transactionType, amount, transactionDate, customerID FROM transaction")
-            for row in self.cursor.fetchall():
-                transactions[row['transactionID']] = Transaction(row['transactionID'], row['transactionType'], row['amount'], row['transactionDate'], row['customerID'])
-
-            self.cursor.execute("SELECT logID, userType, userID, actionType, amount, logTime FROM activitylog")
-            for row in self.cursor.fetchall():
-                activity_logs[row['logID']] = ActivityLog(row['logID'], row['userType'], row['userID'], row['actionType'], row['amount'], row['logTime'])
-        except mysql.connector.Error as e:
+        `deltas` maps AccountID to the net change for the batch. The affected
+        rows are locked first and the batch is rejected with TransferError if
+        any of them would go negative.
+        """
+        deltas = {str(account_id): delta for account_id, delta in deltas.items()}
+        account_ids = list(deltas)
+        try:
+            with self.transaction() as cursor:
+                balances = {str(account_id): balance for account_id, balance in self.backend.lock_balances(cursor, account_ids)}
+                for account_id in account_ids:
+                    if account_id not in balances:
+                        raise TransferError(f"Unknown account {account_id}.")
+                    if balances[account_id] + deltas[account_id] < 0:
+                        raise TransferError(f"Insufficient funds in account {account_id}.")
+                # UPDATEs run one by one under executemany anyway, so reuse the prepared one.
+                cursor.executemany_prepared("shift_balance", [(delta, account_id) for account_id, delta in deltas.items() if delta])
+                insert_rows(cursor, "insert_transaction", [transaction_params(t) for t in transactions])
+        except DB_ERRORS as e:
+            print(f"Error applying transfer batch: {str(e)}")
+            raise
+        for account_id, delta in deltas.items():
+            self._apply_balance(account_id, delta)
+        self._record_transactions(transactions)
+        for customer_id in {t.customerID for t in transactions}:
+            self.history.invalidate(customer_id)
+
+    def _apply_balance(self, account_id, delta):
+        account = account_objects.get(account_id)
+        if account is not None:
+            account.Balance = to_money(account.Balance) + delta
+
+    @instrumented
+    def load_data(self, batch_size=None):
+        try:
+            if batch_size:
+                self.fetch_batch_size = batch_size
+            self.load_timings = {}
+            for table, loader in self._loaders():
+                started = time.perf_counter()
+                self.high_water[table] = self._current_high_water(table)
+                rows = loader()
+                self.load_timings[table] = (rows, time.perf_counter() - started)
+            self.print_load_report()
+        except DB_ERRORS as e:
             print(f"Error loading data: {str(e)}")
             raise
         except Exception as e:
@@ -152,60 +460,358 @@ class Database:
             traceback.print_exc()
             raise
 
-    def close(self):
+    @instrumented
+    def sync_changes(self):
+        """Fetch only the rows changed since the last load/sync and merge them in place.
+
+        Falls back to a full load_data() if the tables have no updatedAt column
+        yet or nothing has been loaded.
+        """
+        if not self.high_water or not self.has_sync_columns():
+            self.load_data()
+            return 0
+        try:
+            changed = 0
+            for table, loader in self._loaders():
+                since = self.high_water.get(table)
+                self.high_water[table] = self._current_high_water(table)
+                if since is None:
+                    changed += loader()
+                elif self.high_water[table] is not None and self.high_water[table] >= since:
+                    changed += loader(since - SYNC_OVERLAP)
+            print(f"Incremental sync merged {changed} changed rows")
+            return changed
+        except DB_ERRORS as e:
+            print(f"Error syncing data: {str(e)}")
+            raise
+
+    def has_sync_columns(self):
+        if self._sync_columns is None:
+            with self.transaction(write=False) as cursor:
+                self._sync_columns = all(self.backend.has_column(cursor, table, "updatedAt") for table in SYNC_TABLES)
+        return self._sync_columns
+
+    @instrumented
+    def migrate(self):
+        """Create the schema and apply pending migrations (see migrations/). Returns the versions applied."""
         try:
-            self.cursor.close()
-            self.conn.close()
-        except mysql.connector.Error as e:
-            print(f"Error closing database: {str(e)}")
+            applied = migrations.migrate(self)
+        except DB_ERRORS as e:
+            print(f"Error migrating schema: {str(e)}")
             raise
+        self._sync_columns = None
+        return applied
+
+    def explain_hot_queries(self):
+        """{name: (plan lines, index-backed)} for every query in HOT_QUERIES, with sample values from the tables."""
+        customer = self.query_one("SELECT customerID, customerUserName, customerAccountID FROM customer LIMIT 1") or (0, "", "")
+        account = self.query_one("SELECT AccountNumber FROM account LIMIT 1") or ("",)
+        employee = self.query_one("SELECT employeeUserName FROM employee LIMIT 1") or ("",)
+        samples = {"customer_id": customer[0], "customer_username": customer[1], "account_id": customer[2],
+                   "account_number": account[0], "employee_username": employee[0], "date": "9999-12-31T00:00:00",
+                   "transaction_id": "", "limit": 100, "delta": 0}
+        try:
+            with self.transaction(write=False) as cursor:
+                return {name: self.backend.explain(cursor, sql, tuple(samples[key] for key in keys))
+                        for name, (sql, keys) in HOT_QUERIES.items()}
+        except DB_ERRORS as e:
+            print(f"Error explaining queries: {str(e)}")
+            raise
+
+    @instrumented
+    def row_counts(self, tables):
+        return {table: self.query_one(f"SELECT COUNT(*) FROM `{table}`")[0] for table in tables}
+
+    def _current_high_water(self, table):
+        if not self.has_sync_columns():
+            return None
+        # SQLite returns MAX() of a timestamp column as text.
+        return parse_datetime(self.query_one(f"SELECT MAX(updatedAt) FROM `{table}`")[0])
+
+    def _loaders(self):
+        return (("customer", self._load_customers),
+                ("account", self._load_accounts),
+                ("debitcard", self._load_debit_cards),
+                ("employee", self._load_employees),
+                ("transaction", self._load_transactions),
+                ("activitylog", self._load_activity_logs))
+
+    def print_load_report(self):
+        total = sum(elapsed for _, elapsed in self.load_timings.values())
+        print("Startup load timings:")
+        for table, (rows, elapsed) in self.load_timings.items():
+            print(f"  {table:<12} {rows:>10} rows {elapsed * 1000:>10.1f} ms")
+        print(f"  {'total':<12} {'':>10}      {total * 1000:>10.1f} ms")
+
+    def _stream(self, query, since=None):
+        # Unbuffered tuple cursor: rows are pulled from the server batch by
+        # batch and each batch is dropped once its model objects are built.
+        params = ()
+        if since is not None:
+            query += " WHERE updatedAt >= %s"
+            params = (since,)
+        with self.connection() as conn:
+            cursor = self.cursor(conn, stream=True)
+            try:
+                cursor.execute(query, params)
+                while True:
+                    batch = cursor.fetchmany(self.fetch_batch_size)
+                    if not batch:
+                        break
+                    yield batch
+            finally:
+                cursor.close()
+
+    # The loaders merge into existing objects rather than replacing them, so
+    # the same code serves the full load and the incremental sync.
+    def _load_customers(self, since=None):
+        count = 0
+        for batch in self._stream("SELECT customerID, customerUserName, nationalID, customerPassword, customerEmail, customerAccountID, customerName FROM customer", since):
+            for customerID, customerUserName, nationalID, customerPassword, customerEmail, customerAccountID, customerName in batch:
+                customer = customer_objects.get(str(customerID))
+                if customer is None:
+                    customer = Customer(customerUserName, nationalID, customerPassword, customerEmail, customerAccountID, customerID, customerName)
+                    register_customer(customer)
+                else:
+                    update_customer(customer, customerUserName=customerUserName, nationalID=nationalID,
+                                    customerPassword=customerPassword, customerEmail=customerEmail,
+                                    customerAccountID=customerAccountID, customerName=customerName)
+                if customer.account is None:
+                    account = account_objects.get(str(customerAccountID))
+                    if account is not None:
+                        customer.link_account(account)
+            count += len(batch)
+        return count
+
+    def _load_accounts(self, since=None):
+        # Accounts are joined to their owners through the customerAccountID
+        # index built while loading customers, so this is a single pass.
+        count = 0
+        for batch in self._stream("SELECT AccountID, AccountType, Balance, AccountNumber FROM account", since):
+            for AccountID, AccountType, Balance, AccountNumber in batch:
+                account = account_objects.get(str(AccountID))
+                if account is None:
+                    account = Account(AccountID, AccountType, Balance, AccountNumber)
+                    register_account(account)
+                else:
+                    update_account(account, AccountType=AccountType, Balance=Balance, AccountNumber=AccountNumber)
+                customer = find_customer_by_account_id(AccountID)
+                if customer is not None:
+                    customer.link_account(account)
+            count += len(batch)
+        return count
+
+    def _load_debit_cards(self, since=None):
+        count = 0
+        for batch in self._stream("SELECT cardNumber, cardPin, cardExpiryDate, cardStatus, customerID FROM debitcard", since):
+            for cardNumber, cardPin, cardExpiryDate, cardStatus, customerID in batch:
+                customer = customer_objects.get(str(customerID))
+                if customer is not None:
+                    customer.link_debit_card(DebitCard(cardNumber, cardPin, cardExpiryDate, cardStatus, customerID))
+            count += len(batch)
+        return count
 
+    def _load_employees(self, since=None):
+        count = 0
+        for batch in self._stream("SELECT employeeID, employeeUserName, employeePassword, employeeName, nationalID, position, employeeEmail, employeePhone FROM employee", since):
+            for employeeID, employeeUserName, employeePassword, employeeName, nationalID, position, employeeEmail, employeePhone in batch:
+                employee = employee_objects.get(str(employeeID))
+                if employee is None:
+                    employee = Employee(employeeName, nationalID, employeeID, position, employeeEmail, employeePhone)
+                    employee.set_credentials(employeeUserName, employeePassword)
+                    register_employee(employee)
+                else:
+                    update_employee(employee, employeeName=employeeName, nationalID=nationalID, position=position,
+                                    employeeEmail=employeeEmail, employeePhone=employeePhone,
+                                    employeeUserName=employeeUserName, employeePassword=employeePassword)
+            count += len(batch)
+        return count
+
+    # History tables are not loaded up front: a full load just drops the
+    # cache (and the report column store, rebuilt on the next report) and a
+    # sync invalidates the customers whose history changed.
+    def _load_transactions(self, since=None):
+        if since is None:
+            self.history.clear()
+            self.analytics = None
+            return 0
+        if self.analytics is None:
+            rows = self.query("SELECT DISTINCT customerID FROM `transaction` WHERE updatedAt >= %s", (since,))
+            for (customer_id,) in rows:
+                self.history.invalidate(customer_id)
+            return len(rows)
+        count = 0
+        for batch in self._stream(ALL_TRANSACTIONS, since):
+            self.analytics.merge_rows(batch)
+            for customer_id in {row[4] for row in batch}:
+                self.history.invalidate(customer_id)
+            count += len(batch)
+        return count
+
+    def transaction_columns(self):
+        """The report column store, streamed from the transaction table on first use.
+
+        None when numpy is missing or DB_ANALYTICS=0. Afterwards it is kept up
+        to date by new transactions and syncs.
+        """
+        if self.analytics is not None or not self.analytics_enabled:
+            return self.analytics
+        with self._analytics_lock:
+            if self.analytics is None:
+                since = self._current_high_water("transaction")
+                columns = TransactionColumns()
+                try:
+                    for batch in self._stream(ALL_TRANSACTIONS):
+                        columns.append_rows(batch)
+                    self.analytics = columns
+                    # Rows committed while the table was being read.
+                    if since is not None:
+                        for batch in self._stream(ALL_TRANSACTIONS, since - SYNC_OVERLAP):
+                            columns.merge_rows(batch)
+                except DB_ERRORS as e:
+                    print(f"Error loading transactions for reports: {str(e)}")
+                    raise
+                print(f"Report column store built with {len(columns)} transactions")
+        return self.analytics
+
+    def _load_activity_logs(self, since=None):
+        if since is None:
+            self.history.clear()
+            return 0
+        count = self.query_one("SELECT COUNT(*) FROM activitylog WHERE updatedAt >= %s", (since,))[0]
+        if count:
+            self.history.invalidate_activity_logs()
+        return count
+
+    @instrumented
+    def fetch_customer_transactions(self, customer_id):
+        try:
+            rows = self.query_prepared("transactions_by_customer", (customer_id,))
+            return [Transaction(*row) for row in rows]
+        except DB_ERRORS as e:
+            print(f"Error fetching transactions for customer {customer_id}: {str(e)}")
+            raise
+
+    @instrumented
+    def transaction_page(self, customer_id, before=None, limit=100):
+        """Up to `limit` of a customer's transactions, newest first.
+
+        `before` is the (transactionDate, transactionID) of the last row of
+        the previous page; None gives the first page.
+        """
+        try:
+            if before is None:
+                rows = self.query_prepared("transaction_page", (customer_id, limit))
+            else:
+                rows = self.query_prepared("transaction_page_before", (customer_id, format_datetime(before[0]), before[1], limit))
+            return [Transaction(*row) for row in rows]
+        except DB_ERRORS as e:
+            print(f"Error fetching transaction page for customer {customer_id}: {str(e)}")
+            raise
+
+    @instrumented
+    def fetch_activity_logs(self):
+        try:
+            rows = self.query("SELECT logID, userType, userID, actionType, amount, logTime FROM activitylog")
+            return [ActivityLog(*row) for row in rows]
+        except DB_ERRORS as e:
+            print(f"Error fetching activity logs: {str(e)}")
+            raise
+
+    def close(self):
+        # A failed final flush must not keep the connections open.
+        try:
+            if self.journal is not None:
+                journal, self.journal = self.journal, None
+                try:
+                    journal.close()
+                finally:
+                    print(f"Write-behind journal: {journal.stats()}")
+        except DB_ERRORS as e:
+            print(f"Error flushing write-behind journal: {str(e)}")
+        finally:
+            if self.metrics_logger is not None:
+                self.metrics_logger.close()
+                self.metrics_logger = None
+            try:
+                self.backend.close()
+            except DB_ERRORS as e:
+                print(f"Error closing database: {str(e)}")
+                raise
+
+    @instrumented
     def update_employee_username(self, employee_id, new_username):
         try:
-            self.cursor.execute('''
-                UPDATE employee SET employeeUserName = %s WHERE employeeID = %s
-            ''', (new_username, employee_id))
-            self.conn.commit()
-        except mysql.connector.Error as e:
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    UPDATE employee SET employeeUserName = %s WHERE employeeID = %s
+                ''', (new_username, employee_id))
+            employee = employee_objects.get(str(employee_id))
+            if employee is not None:
+                rename_employee(employee, new_username)
+        except DB_ERRORS as e:
             print(f"Error updating employee username: {str(e)}")
-            self.conn.rollback()
             raise
 
+    @instrumented
     def update_employee_password(self, employee_id, new_password):
         try:
-            self.cursor.execute('''
-                UPDATE employee SET employeePassword = %s WHERE employeeID = %s
-            ''', (new_password, employee_id))
-            self.conn.commit()
-        except mysql.connector.Error as e:
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    UPDATE employee SET employeePassword = %s WHERE employeeID = %s
+                ''', (new_password, employee_id))
+            employee = employee_objects.get(str(employee_id))
+            if employee is not None:
+                employee.employeePassword = new_password
+        except DB_ERRORS as e:
             print(f"Error updating employee password: {str(e)}")
-            self.conn.rollback()
             raise
 
+    # Password hashes are not kept in the snapshot; these read one on demand.
+    @instrumented
+    def fetch_customer_password(self, customer_id):
+        try:
+            row = self.query_one("SELECT customerPassword FROM customer WHERE customerID = %s", (customer_id,))
+            return row[0] if row else None
+        except DB_ERRORS as e:
+            print(f"Error fetching customer password: {str(e)}")
+            raise
+
+    @instrumented
+    def fetch_employee_password(self, employee_id):
+        try:
+            row = self.query_one("SELECT employeePassword FROM employee WHERE employeeID = %s", (employee_id,))
+            return row[0] if row else None
+        except DB_ERRORS as e:
+            print(f"Error fetching employee password: {str(e)}")
+            raise
+
+    @instrumented
     def update_customer_username(self, account_id, new_username):
         try:
-            self.cursor.execute('''
-                UPDATE customer c
-                JOIN account a ON c.customerAccountID = a.AccountID
-                SET c.customerUserName = %s
-                WHERE a.AccountID = %s
-            ''', (new_username, account_id))
-            self.conn.commit()
-        except mysql.connector.Error as e:
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    UPDATE customer SET customerUserName = %s
+                    WHERE customerAccountID = %s AND EXISTS (SELECT 1 FROM account WHERE AccountID = %s)
+                ''', (new_username, account_id, account_id))
+            customer = find_customer_by_account_id(account_id)
+            if customer is not None:
+                rename_customer(customer, new_username)
+        except DB_ERRORS as e:
             print(f"Error updating customer username: {str(e)}")
-            self.conn.rollback()
             raise
 
+    @instrumented
     def update_customer_password(self, account_id, new_password):
         try:
-            self.cursor.execute('''
-                UPDATE customer c
-                JOIN account a ON c.customerAccountID = a.AccountID
-                SET c.customerPassword = %s
-                WHERE a.AccountID = %s
-            ''', (new_password, account_id))
-            self.conn.commit()
-        except mysql.connector.Error as e:
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    UPDATE customer SET customerPassword = %s
+                    WHERE customerAccountID = %s AND EXISTS (SELECT 1 FROM account WHERE AccountID = %s)
+                ''', (new_password, account_id, account_id))
+            customer = find_customer_by_account_id(account_id)
+            if customer is not None:
+                customer.customerPassword = new_password
+        except DB_ERRORS as e:
             print(f"Error updating customer password: {str(e)}")
-            self.conn.rollback()
             raise
\ No newline at end of file
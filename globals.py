@@ -1,5 +1,143 @@
+import threading
+
 customer_objects = {}
 account_objects = {}
 employee_objects = {}
 transactions = {}
-activity_logs = {}
\ No newline at end of file
+activity_logs = {}
+
+# Secondary indexes over the registries above, kept in sync by the register_*
+# and rename_* helpers so lookups by natural key are O(1).
+account_by_number = {}
+customer_by_username = {}
+employee_by_username = {}
+customer_by_account_id = {}
+
+# Database calls run on QThreadPool threads (workers.py) and register or
+# update objects while the GUI thread reads the registries. Writers hold
+# `lock`; code that iterates a registry while such a call may be running
+# iterates copy_of(registry) instead.
+lock = threading.RLock()
+
+
+def _unindex_customer(customer):
+    if customer_by_username.get(customer.customerUserName) is customer:
+        del customer_by_username[customer.customerUserName]
+    if customer_by_account_id.get(str(customer.customerAccountID)) is customer:
+        del customer_by_account_id[str(customer.customerAccountID)]
+
+
+def _index_customer(customer):
+    customer_by_username[customer.customerUserName] = customer
+    if customer.customerAccountID is not None:
+        customer_by_account_id[str(customer.customerAccountID)] = customer
+
+
+def _unindex_account(account):
+    if account_by_number.get(account.AccountNumber) is account:
+        del account_by_number[account.AccountNumber]
+
+
+def _index_account(account):
+    account_by_number[account.AccountNumber] = account
+
+
+def _unindex_employee(employee):
+    if employee_by_username.get(employee.employeeUserName) is employee:
+        del employee_by_username[employee.employeeUserName]
+
+
+def _index_employee(employee):
+    employee_by_username[employee.employeeUserName] = employee
+
+
+def register_customer(customer):
+    with lock:
+        key = str(customer.customerID)
+        old = customer_objects.get(key)
+        if old is not None:
+            _unindex_customer(old)
+        customer_objects[key] = customer
+        _index_customer(customer)
+
+
+def register_account(account):
+    with lock:
+        key = str(account.AccountID)
+        old = account_objects.get(key)
+        if old is not None:
+            _unindex_account(old)
+        account_objects[key] = account
+        _index_account(account)
+
+
+def register_employee(employee):
+    with lock:
+        key = str(employee.employeeID)
+        old = employee_objects.get(key)
+        if old is not None:
+            _unindex_employee(old)
+        employee_objects[key] = employee
+        _index_employee(employee)
+
+
+# The update_* helpers change a registered object in place (so widgets holding
+# a reference see the new values) and move its index entries along with it.
+def update_customer(customer, **fields):
+    with lock:
+        _unindex_customer(customer)
+        for name, value in fields.items():
+            setattr(customer, name, value)
+        _index_customer(customer)
+
+
+def update_account(account, **fields):
+    with lock:
+        _unindex_account(account)
+        for name, value in fields.items():
+            setattr(account, name, value)
+        _index_account(account)
+
+
+def update_employee(employee, **fields):
+    with lock:
+        _unindex_employee(employee)
+        for name, value in fields.items():
+            setattr(employee, name, value)
+        _index_employee(employee)
+
+
+def rename_customer(customer, new_username):
+    update_customer(customer, customerUserName=new_username)
+
+
+def rename_employee(employee, new_username):
+    update_employee(employee, employeeUserName=new_username)
+
+
+def copy_of(registry):
+    with lock:
+        return dict(registry)
+
+
+def find_account_by_number(account_number):
+    return account_by_number.get(account_number)
+
+
+def find_customer_by_username(username):
+    return customer_by_username.get(username)
+
+
+def find_employee_by_username(username):
+    return employee_by_username.get(username)
+
+
+def find_customer_by_account_id(account_id):
+    return customer_by_account_id.get(str(account_id))
+
+
+def clear_all():
+    with lock:
+        for registry in (customer_objects, account_objects, employee_objects, transactions, activity_logs,
+                         account_by_number, customer_by_username, employee_by_username, customer_by_account_id):
+            registry.clear()
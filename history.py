@@ -0,0 +1,93 @@
+from collections import OrderedDict
+import os
+import threading
+
+
+class HistoryStore:
+    """Lazily loaded transaction and activity-log history.
+
+    Nothing is read at startup. History is read a page at a time
+    (transaction_page) and a customer's first page is kept in a bounded LRU
+    cache; writes through the Database invalidate the affected entries. A
+    fetch that overlaps an invalidate() is returned but not cached.
+    """
+
+    def __init__(self, db, capacity=None):
+        self.db = db
+        self.capacity = capacity or int(os.getenv('HISTORY_CACHE_SIZE', 256))
+        self.page_size = int(os.getenv('HISTORY_PAGE_SIZE', 200))
+        self._first_pages = OrderedDict()
+        # Bumped by invalidate() and clear(); a fetch is cached only if its
+        # customer's generation is unchanged when it finishes.
+        self._generations = {}
+        self._epoch = 0
+        self._activity_logs = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def transactions_for(self, customer_id):
+        """All of a customer's transactions, newest first, read page by page."""
+        rows = self.transaction_page(customer_id)
+        while rows:
+            yield from rows
+            if len(rows) < self.page_size:
+                return
+            last = rows[-1]
+            rows = self.transaction_page(customer_id, (last.transactionDate, last.transactionID))
+
+    def transaction_page(self, customer_id, before=None, limit=None):
+        """A page of a customer's transactions, newest first; see Database.transaction_page."""
+        key = str(customer_id)
+        limit = limit or self.page_size
+        if before is not None or limit != self.page_size:
+            return self.db.transaction_page(key, before, limit)
+        with self._lock:
+            cached = self._first_pages.get(key)
+            if cached is not None:
+                self._first_pages.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+            generation = self._generation(key)
+        rows = self.db.transaction_page(key, None, limit)
+        self._remember(self._first_pages, key, rows, generation)
+        return rows
+
+    def _generation(self, key):
+        return self._epoch, self._generations.get(key, 0)
+
+    def _remember(self, cache, key, rows, generation):
+        with self._lock:
+            if self._generation(key) != generation:
+                return
+            cache[key] = rows
+            cache.move_to_end(key)
+            while len(cache) > self.capacity:
+                cache.popitem(last=False)
+
+    def activity_logs(self):
+        logs = self._activity_logs
+        if logs is None:
+            logs = self.db.fetch_activity_logs()
+            self._activity_logs = logs
+        return logs
+
+    def invalidate(self, customer_id):
+        key = str(customer_id)
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._first_pages.pop(key, None)
+
+    def invalidate_activity_logs(self):
+        self._activity_logs = None
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._generations.clear()
+            self._first_pages.clear()
+        self._activity_logs = None
+
+    def __len__(self):
+        return len(self._first_pages)
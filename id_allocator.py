@@ -0,0 +1,85 @@
+import os
+import threading
+
+# Largest value each sequence may hand out: customerID is an INT, AccountID a
+# VARCHAR(10), and card sequence numbers fill nine digits of the card number.
+LIMITS = {"customer": 2 ** 31 - 1, "account": 10 ** 10 - 1, "card": 10 ** 9 - 1}
+# 16-digit numbers: prefix, zero-padded sequence value, Luhn check digit.
+ACCOUNT_NUMBER_PREFIX = "1000"
+CARD_NUMBER_PREFIX = "400000"
+
+
+def luhn_check_digit(digits):
+    total = 0
+    # Counting from the right, every other digit starting with the last is
+    # doubled, because the check digit will be appended after it.
+    for index, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if index % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return str((10 - total % 10) % 10)
+
+
+def luhn_valid(number):
+    return len(number) > 1 and number.isdigit() and luhn_check_digit(number[:-1]) == number[-1]
+
+
+def account_number(account_id):
+    """The account number for an AccountID; unique because the ID is."""
+    digits = f"{ACCOUNT_NUMBER_PREFIX}{int(account_id):011d}"
+    return digits + luhn_check_digit(digits)
+
+
+def card_number(sequence_value):
+    digits = f"{CARD_NUMBER_PREFIX}{sequence_value:09d}"
+    return digits + luhn_check_digit(digits)
+
+
+class IdAllocator:
+    """Customer, account and card IDs from blocks reserved in the id_sequence table.
+
+    A block is reserved with one atomic UPDATE of the sequence row, so
+    processes sharing the database never hand out the same ID; within a
+    process IDs then come from memory until the block is used up. IDs left
+    in a block when the process exits are skipped, not reused.
+    """
+
+    def __init__(self, db, block_size=None):
+        self.db = db
+        self.block_size = block_size or int(os.getenv('ID_BLOCK_SIZE', 100))
+        # sequence name -> [next ID, end of block]
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+    def _reserve(self, name, count):
+        first = self.db.reserve_ids(name, count)
+        if first + count - 1 > LIMITS.get(name, first + count - 1):
+            raise ValueError(f"Error: No {name} IDs left!")
+        return first
+
+    def next_id(self, name):
+        with self._lock:
+            block = self._blocks.get(name)
+            if block is None or block[0] >= block[1]:
+                first = self._reserve(name, self.block_size)
+                block = self._blocks[name] = [first, first + self.block_size]
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def take(self, name, count):
+        """`count` IDs at once; batches bigger than a block get a block of their own."""
+        if count >= self.block_size:
+            first = self._reserve(name, count)
+            return list(range(first, first + count))
+        return [self.next_id(name) for _ in range(count)]
+
+    def new_customer_ids(self):
+        """(customer_id, account_id, card_number) for one new customer."""
+        return self.next_id("customer"), self.next_id("account"), card_number(self.next_id("card"))
+
+    def card_numbers(self, count):
+        return [card_number(value) for value in self.take("card", count)]
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import time
+import traceback
+from datetime import datetime
+from backends import DB_DATA_ERRORS
+
+# A row that fails for one of these is rejected on every retry as well.
+ROW_ERRORS = DB_DATA_ERRORS + (ValueError, TypeError, ArithmeticError)
+
+
+class WriteBehindJournal:
+    """Buffers transaction and activity-log inserts and writes them in group commits.
+
+    A background thread flushes the buffer with executemany in one commit every
+    `max_rows` rows or every `interval_ms` milliseconds, whichever comes first.
+    flush() writes everything still queued synchronously (used on shutdown).
+
+    If a batch fails because of its rows (a duplicate key, a bad value) it is
+    written again row by row, and the rows that still fail are appended to
+    the dead-letter file instead of blocking the queue. Other failures (lost
+    connection, lock timeout) put the batch back for the next flush.
+    """
+
+    def __init__(self, db, max_rows=None, interval_ms=None, dead_letter_path=None):
+        self.db = db
+        self.max_rows = max_rows or int(os.getenv('JOURNAL_MAX_ROWS', 500))
+        self.interval = (interval_ms or int(os.getenv('JOURNAL_INTERVAL_MS', 200))) / 1000
+        self.dead_letter_path = dead_letter_path or os.getenv('JOURNAL_DEAD_LETTER_PATH', 'journal_dead_letters.jsonl')
+        self._transactions = []
+        self._activity_logs = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self.flush_count = 0
+        self.flushed_rows = 0
+        self.error_count = 0
+        self.dead_letter_count = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._thread = threading.Thread(target=self._run, name="write-behind-journal", daemon=True)
+        self._thread.start()
+
+    def append_transaction(self, transaction):
+        with self._cond:
+            self._transactions.append(transaction)
+            if self._depth() >= self.max_rows:
+                self._cond.notify()
+
+    def append_activity_log(self, activity_log):
+        with self._cond:
+            self._activity_logs.append(activity_log)
+            if self._depth() >= self.max_rows:
+                self._cond.notify()
+
+    def depth(self):
+        with self._cond:
+            return self._depth()
+
+    def _depth(self):
+        return len(self._transactions) + len(self._activity_logs)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or self._depth() >= self.max_rows, timeout=self.interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Write-behind flush failed, will retry: {str(e)}")
+
+    def flush(self):
+        with self._flush_lock:
+            with self._cond:
+                transactions, self._transactions = self._transactions, []
+                activity_logs, self._activity_logs = self._activity_logs, []
+            if not transactions and not activity_logs:
+                return 0
+            started = time.perf_counter()
+            try:
+                self.db.write_history_batch(transactions, activity_logs)
+                written = len(transactions) + len(activity_logs)
+            except ROW_ERRORS as e:
+                self.error_count += 1
+                print(f"Write-behind batch rejected, writing its rows one by one: {str(e)}")
+                written = self._write_rows(transactions, activity_logs)
+            except Exception:
+                self._requeue(transactions, activity_logs)
+                self.error_count += 1
+                traceback.print_exc()
+                raise
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flush_count += 1
+            self.flushed_rows += written
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            return written
+
+    def _write_rows(self, transactions, activity_logs):
+        rows = [([transaction], []) for transaction in transactions] + [([], [log]) for log in activity_logs]
+        written = 0
+        for index, (transaction_rows, log_rows) in enumerate(rows):
+            try:
+                self.db.write_history_batch(transaction_rows, log_rows)
+                written += 1
+            except ROW_ERRORS as e:
+                self._dead_letter((transaction_rows or log_rows)[0], e)
+            except Exception:
+                rest = rows[index:]
+                self._requeue([t for ts, _ in rest for t in ts], [log for _, logs in rest for log in logs])
+                self.error_count += 1
+                raise
+        return written
+
+    def _requeue(self, transactions, activity_logs):
+        # Put the rows back in front of anything queued meanwhile.
+        with self._cond:
+            self._transactions[:0] = transactions
+            self._activity_logs[:0] = activity_logs
+
+    def _dead_letter(self, row, error):
+        self.dead_letter_count += 1
+        record = {"table": "transaction" if type(row).__name__ == "Transaction" else "activitylog",
+                  "row": {slot: getattr(row, slot) for slot in type(row).__slots__},
+                  "error": str(error), "at": datetime.now().isoformat(timespec="seconds")}
+        line = json.dumps(record, default=str)
+        print(f"Write-behind journal dead-lettered a row: {line}")
+        try:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"Could not write {self.dead_letter_path}: {str(e)}")
+
+    def stats(self):
+        return {
+            "queue_depth": self.depth(),
+            "flush_count": self.flush_count,
+            "flushed_rows": self.flushed_rows,
+            "error_count": self.error_count,
+            "dead_letter_count": self.dead_letter_count,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
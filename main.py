@@ -1,24 +1,28 @@
 from PyQt5 import QtWidgets, QtCore
 import sys
+import os
 import traceback
-import hashlib
+from datetime import datetime, timedelta
 from db import Database
 from add_customer import AddCustomerWindow
 from add_employee import AddEmployeeWindow
-from globals import customer_objects, employee_objects, account_objects, transactions, activity_logs
-import mysql.connector
+from globals import customer_objects, employee_objects, account_objects, copy_of, find_customer_by_account_id
 from models.transaction import Transaction
 from models.customer import Customer
 from models.employee import Employee
 from models.account import Account
 from models.activitylog import ActivityLog
-from decimal import Decimal
+import workers
+import snapshot
+from services import BankService, ServiceError
+from table_models import CustomerTableModel, TransactionTableModel, ActivityLogTableModel, MetricsTableModel, make_proxy
 
 
 class TransferDialog(QtWidgets.QDialog):
     def __init__(self, db, from_account_id, parent=None):
         super().__init__(parent)
         self.db = db
+        self.service = BankService(db)
         self.from_account_id = from_account_id
         self.setWindowTitle("Transfer Funds")
         self.setGeometry(150, 150, 400, 300)
@@ -54,56 +58,23 @@ class TransferDialog(QtWidgets.QDialog):
         self.setLayout(layout)
 
     def perform_transfer(self):
-        from_account_id = self.from_account_input.text()
-        to_account_number = self.to_account_input.text()
-        try:
-            amount = float(self.amount_input.text())
-            if not to_account_number:
-                self.status_label.setText("Please enter a destination account number!")
-                return
-            if from_account_id not in account_objects:
-                self.status_label.setText("Invalid source account!")
-                return
-            to_account_id = next((acc_id for acc_id, acc in account_objects.items() if acc.AccountNumber == to_account_number), None)
-            if not to_account_id:
-                self.status_label.setText("Invalid destination account number!")
-                return
-            if amount <= 0:
-                self.status_label.setText("Amount must be positive!")
-                return
-            if account_objects[from_account_id].Balance < amount:
-                self.status_label.setText("Insufficient funds!")
-                return
-
-            account_objects[from_account_id].Balance -= Decimal(amount)
-            account_objects[to_account_id].Balance += Decimal(amount)
-
-            self.db.cursor.execute("UPDATE account SET Balance = %s WHERE AccountID = %s",
-                                   (account_objects[from_account_id].Balance, from_account_id))
-            self.db.cursor.execute("UPDATE account SET Balance = %s WHERE AccountID = %s",
-                                   (account_objects[to_account_id].Balance, to_account_id))
-            self.db.conn.commit()
-
-            from_customer_id = next((c.customerID for c in customer_objects.values() if c.customerAccountID == from_account_id), None)
-            if from_customer_id:
-                import uuid
-                from models.transaction import Transaction
-                transaction_id = str(uuid.uuid4())
-                transaction = Transaction(transaction_id, "Transfer", amount, QtCore.QDateTime.currentDateTime().toString(QtCore.Qt.ISODate), from_customer_id)
-                self.db.save_transaction(transaction)
-
+        def succeeded(_):
             self.status_label.setText("Transfer successful!")
             self.accept()
-        except ValueError:
-            self.status_label.setText("Invalid amount!")
-        except mysql.connector.Error as e:
-            self.status_label.setText(f"Database error: {str(e)}")
-            self.db.conn.rollback()
+
+        def failed(e):
+            self.status_label.setText(str(e) if isinstance(e, ServiceError) else f"Transfer failed: {str(e)}")
+
+        self.status_label.setText("Transferring...")
+        workers.run_in_background(self.service.transfer_to_number, self.from_account_input.text(),
+                                  self.to_account_input.text(), self.amount_input.text(),
+                                  on_success=succeeded, on_error=failed, busy=(self.transfer_button,))
 
 class EmployeeDashboard(QtWidgets.QWidget):
     def __init__(self, db, employee, is_manager=False, login_page=None):
         super().__init__()  # FIXED: Removed parent parameter to prevent overlap
         self.db = db
+        self.service = BankService(db)
         self.employee = employee
         self.is_manager = is_manager
         self.login_page = login_page
@@ -142,9 +113,13 @@ class EmployeeDashboard(QtWidgets.QWidget):
         # Customer List Tab
         self.customer_list_widget = QtWidgets.QWidget()
         customer_layout = QtWidgets.QVBoxLayout()
-        self.customer_table = QtWidgets.QTableWidget()
-        self.customer_table.setColumnCount(5)
-        self.customer_table.setHorizontalHeaderLabels(["Customer ID", "Username", "Name", "Account ID", "Balance"])
+        self.customer_model = CustomerTableModel(self)
+        self.customer_proxy = make_proxy(self.customer_model, self)
+        self.customer_table = self.make_table_view(self.customer_proxy)
+        self.customer_filter_input = QtWidgets.QLineEdit()
+        self.customer_filter_input.setPlaceholderText("Filter customers...")
+        self.customer_filter_input.textChanged.connect(self.customer_proxy.setFilterFixedString)
+        customer_layout.addWidget(self.customer_filter_input)
         self.load_customers()
         customer_layout.addWidget(self.customer_table)
         self.customer_list_widget.setLayout(customer_layout)
@@ -155,10 +130,9 @@ class EmployeeDashboard(QtWidgets.QWidget):
         transaction_layout = QtWidgets.QVBoxLayout()
         self.transaction_customer_input = QtWidgets.QComboBox()
         # FIXED: Convert customerID to string for QComboBox
-        self.transaction_customer_input.addItems([str(c.customerID) for c in customer_objects.values()])
-        self.transaction_table = QtWidgets.QTableWidget()
-        self.transaction_table.setColumnCount(5)
-        self.transaction_table.setHorizontalHeaderLabels(["Transaction ID", "Type", "Amount", "Date", "Customer ID"])
+        self.transaction_customer_input.addItems([str(c.customerID) for c in copy_of(customer_objects).values()])
+        self.transaction_model = TransactionTableModel(self)
+        self.transaction_table = self.make_table_view(make_proxy(self.transaction_model, self))
         self.transaction_customer_input.currentTextChanged.connect(self.load_transactions)
         transaction_layout.addWidget(QtWidgets.QLabel("Select Customer:"))
         transaction_layout.addWidget(self.transaction_customer_input)
@@ -176,6 +150,14 @@ class EmployeeDashboard(QtWidgets.QWidget):
         self.withdraw_button.clicked.connect(self.withdraw_from_account)
         transaction_layout.addWidget(self.withdraw_button)
 
+        self.import_payments_btn = QtWidgets.QPushButton("Import Payment File")
+        self.import_payments_btn.clicked.connect(self.import_payment_file)
+        transaction_layout.addWidget(self.import_payments_btn)
+
+        self.report_btn = QtWidgets.QPushButton("Transaction Report")
+        self.report_btn.clicked.connect(self.show_transaction_report)
+        transaction_layout.addWidget(self.report_btn)
+
         self.view_accounts_btn = QtWidgets.QPushButton("View All Bank Accounts")
         self.view_accounts_btn.clicked.connect(self.view_all_accounts)
         transaction_layout.addWidget(self.view_accounts_btn)
@@ -187,12 +169,15 @@ class EmployeeDashboard(QtWidgets.QWidget):
         if self.is_manager:
             self.manager_widget = QtWidgets.QWidget()
             manager_layout = QtWidgets.QVBoxLayout()
-            self.activity_log_table = QtWidgets.QTableWidget()
-            self.activity_log_table.setColumnCount(6)
-            self.activity_log_table.setHorizontalHeaderLabels(["Log ID", "User Type", "User ID", "Action Type", "Amount", "Time"])
+            self.activity_log_model = ActivityLogTableModel(self)
+            self.activity_log_table = self.make_table_view(make_proxy(self.activity_log_model, self))
             self.load_activity_logs()
             manager_layout.addWidget(self.activity_log_table)
 
+            self.monthly_report_btn = QtWidgets.QPushButton("Monthly Volume Report")
+            self.monthly_report_btn.clicked.connect(self.show_monthly_report)
+            manager_layout.addWidget(self.monthly_report_btn)
+
             self.change_employee_username_btn = QtWidgets.QPushButton("Change Employee Username")
             self.change_employee_username_btn.clicked.connect(self.change_employee_username)
             manager_layout.addWidget(self.change_employee_username_btn)
@@ -209,6 +194,15 @@ class EmployeeDashboard(QtWidgets.QWidget):
             self.change_customer_password_btn.clicked.connect(self.change_customer_password)
             manager_layout.addWidget(self.change_customer_password_btn)
 
+            manager_layout.addWidget(QtWidgets.QLabel("Database metrics (per statement and per operation):"))
+            self.metrics_model = MetricsTableModel(self)
+            self.metrics_table = self.make_table_view(make_proxy(self.metrics_model, self))
+            manager_layout.addWidget(self.metrics_table)
+            self.refresh_metrics_btn = QtWidgets.QPushButton("Refresh Database Metrics")
+            self.refresh_metrics_btn.clicked.connect(self.load_metrics)
+            manager_layout.addWidget(self.refresh_metrics_btn)
+            self.load_metrics()
+
             self.manager_widget.setLayout(manager_layout)
             tabs.addTab(self.manager_widget, "Manager Controls")
 
@@ -220,42 +214,59 @@ class EmployeeDashboard(QtWidgets.QWidget):
 
         self.setLayout(main_layout)
 
+    def make_table_view(self, model):
+        view = QtWidgets.QTableView()
+        view.setModel(model)
+        # No initial sort: sorting loads every row, so it waits until a header is clicked.
+        view.horizontalHeader().setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+        view.setSortingEnabled(True)
+        view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        view.verticalHeader().setVisible(False)
+        return view
+
     def load_customers(self):
-        self.customer_table.setRowCount(len(customer_objects))
-        for row, customer in enumerate(customer_objects.values()):
-            # FIXED: Convert all values to strings for QTableWidget
-            self.customer_table.setItem(row, 0, QtWidgets.QTableWidgetItem(str(customer.customerID)))
-            self.customer_table.setItem(row, 1, QtWidgets.QTableWidgetItem(str(customer.customerUserName)))
-            self.customer_table.setItem(row, 2, QtWidgets.QTableWidgetItem(str(customer.customerName or "N/A")))
-            self.customer_table.setItem(row, 3, QtWidgets.QTableWidgetItem(str(customer.customerAccountID or "None")))
-            balance = account_objects.get(str(customer.customerAccountID), None)
-            self.customer_table.setItem(row, 4, QtWidgets.QTableWidgetItem(str(balance.Balance) if balance else "0"))
+        self.customer_model.set_rows(copy_of(customer_objects).values())
 
     def load_transactions(self):
         customer_id = self.transaction_customer_input.currentText()
-        self.transaction_table.setRowCount(0)
-        for transaction in transactions.values():
-            # FIXED: Compare as strings consistently
-            if str(transaction.customerID) == customer_id:
-                row = self.transaction_table.rowCount()
-                self.transaction_table.insertRow(row)
-                # FIXED: Convert all values to strings for QTableWidget
-                self.transaction_table.setItem(row, 0, QtWidgets.QTableWidgetItem(str(transaction.transactionID)))
-                self.transaction_table.setItem(row, 1, QtWidgets.QTableWidgetItem(str(transaction.transactionType)))
-                self.transaction_table.setItem(row, 2, QtWidgets.QTableWidgetItem(str(transaction.amount)))
-                self.transaction_table.setItem(row, 3, QtWidgets.QTableWidgetItem(str(transaction.transactionDate)))
-                self.transaction_table.setItem(row, 4, QtWidgets.QTableWidgetItem(str(transaction.customerID)))
+        self.transaction_model.set_rows(())
+        if not customer_id:
+            return
+        # Only the newest page is read now; the table fetches older pages as it scrolls.
+        workers.run_in_background(self.db.history.transaction_page, customer_id,
+                                  on_success=lambda rows: self.show_transactions(customer_id, rows),
+                                  on_error=self.show_db_error)
+
+    def show_transactions(self, customer_id, rows):
+        # The selection may have moved on while the history was being fetched.
+        if customer_id != self.transaction_customer_input.currentText():
+            return
+        history = self.db.history
+        self.transaction_model.set_pages(rows, lambda before: history.transaction_page(customer_id, before),
+                                         history.page_size, on_error=self.show_db_error)
 
     def load_activity_logs(self):
-        self.activity_log_table.setRowCount(len(activity_logs))
-        for row, log in enumerate(activity_logs.values()):
-            # FIXED: Convert all values to strings for QTableWidget
-            self.activity_log_table.setItem(row, 0, QtWidgets.QTableWidgetItem(str(log.logID)))
-            self.activity_log_table.setItem(row, 1, QtWidgets.QTableWidgetItem(str(log.userType)))
-            self.activity_log_table.setItem(row, 2, QtWidgets.QTableWidgetItem(str(log.userID)))
-            self.activity_log_table.setItem(row, 3, QtWidgets.QTableWidgetItem(str(log.actionType)))
-            self.activity_log_table.setItem(row, 4, QtWidgets.QTableWidgetItem(str(log.amount)))
-            self.activity_log_table.setItem(row, 5, QtWidgets.QTableWidgetItem(str(log.logTime)))
+        workers.run_in_background(self.db.history.activity_logs, on_success=self.activity_log_model.set_rows, on_error=self.show_db_error)
+
+    def load_metrics(self):
+        if self.db.metrics is None:
+            self.refresh_metrics_btn.setEnabled(False)
+            self.refresh_metrics_btn.setText("Database metrics are off (DB_METRICS=0)")
+            return
+        self.metrics_model.set_rows(self.db.metrics.rows())
+
+    def show_db_error(self, e):
+        if isinstance(e, ServiceError):
+            QtWidgets.QMessageBox.warning(self, "Error", str(e))
+        else:
+            QtWidgets.QMessageBox.warning(self, "Database Error", f"Database error: {str(e)}")
+
+    def run_balance_operation(self, fn, args, message, button):
+        def succeeded(_):
+            QtWidgets.QMessageBox.information(self, *message)
+            self.customer_model.refresh()
+
+        workers.run_in_background(fn, *args, on_success=succeeded, on_error=self.show_db_error, busy=(button,))
 
     def transfer_money(self):
         from_acc, ok1 = QtWidgets.QInputDialog.getText(self, "Transfer", "Enter source account number:")
@@ -266,21 +277,12 @@ class EmployeeDashboard(QtWidgets.QWidget):
         if not ok2 or to_acc not in account_objects:
             QtWidgets.QMessageBox.warning(self, "Error", "Invalid or non-existent target account number.")
             return
-        max_transfer = account_objects[from_acc].Balance
+        max_transfer = float(account_objects[from_acc].Balance)
         amount, ok3 = QtWidgets.QInputDialog.getDouble(self, "Transfer", "Enter amount to transfer:", 0, 0.01, max_transfer, 2)
         if ok3:
-            if amount > max_transfer:
-                QtWidgets.QMessageBox.warning(self, "Error", "Insufficient funds in source account.")
-            else:
-                account_objects[from_acc].Balance -= Decimal(amount)
-                account_objects[to_acc].Balance += Decimal(amount)
-                self.db.cursor.execute("UPDATE account SET Balance = %s WHERE AccountID = %s",
-                                       (account_objects[from_acc].Balance, from_acc))
-                self.db.cursor.execute("UPDATE account SET Balance = %s WHERE AccountID = %s",
-                                       (account_objects[to_acc].Balance, to_acc))
-                self.db.conn.commit()
-                QtWidgets.QMessageBox.information(self, "Transferred", f"Transferred ${amount:.2f} from {from_acc} to {to_acc}.")
-                self.load_customers()
+            self.run_balance_operation(self.service.transfer, (from_acc, to_acc, amount),
+                                       ("Transferred", f"Transferred ${amount:.2f} from {from_acc} to {to_acc}."),
+                                       self.transfer_button)
 
     def deposit_to_account(self):
         acc, ok1 = QtWidgets.QInputDialog.getText(self, "Deposit", "Enter account number:")
@@ -289,35 +291,75 @@ class EmployeeDashboard(QtWidgets.QWidget):
             return
         amount, ok2 = QtWidgets.QInputDialog.getDouble(self, "Deposit", "Enter deposit amount:", 0, 0.01, 1e9, 2)
         if ok2:
-            account_objects[acc].Balance += Decimal(amount)
-            self.db.cursor.execute("UPDATE account SET Balance = %s WHERE AccountID = %s",
-                                   (account_objects[acc].Balance, acc))
-            self.db.conn.commit()
-            QtWidgets.QMessageBox.information(self, "Deposit", f"Deposited ${amount:.2f} to account {acc}.")
-            self.load_customers()
+            self.run_balance_operation(self.service.deposit, (acc, amount),
+                                       ("Deposit", f"Deposited ${amount:.2f} to account {acc}."),
+                                       self.deposit_button)
 
     def withdraw_from_account(self):
         acc, ok1 = QtWidgets.QInputDialog.getText(self, "Withdraw", "Enter account number:")
         if not ok1 or acc not in account_objects:
             QtWidgets.QMessageBox.warning(self, "Error", "Invalid account number.")
             return
-        max_amount = account_objects[acc].Balance
+        max_amount = float(account_objects[acc].Balance)
         amount, ok2 = QtWidgets.QInputDialog.getDouble(self, "Withdraw", "Enter withdrawal amount:", 0, 0.01, max_amount, 2)
         if ok2:
-            if amount > max_amount:
-                QtWidgets.QMessageBox.warning(self, "Error", "Insufficient funds.")
-            else:
-                account_objects[acc].Balance -= Decimal(amount)
-                self.db.cursor.execute("UPDATE account SET Balance = %s WHERE AccountID = %s",
-                                       (account_objects[acc].Balance, acc))
-                self.db.conn.commit()
-                QtWidgets.QMessageBox.information(self, "Withdraw", f"Withdrew ${amount:.2f} from account {acc}.")
-                self.load_customers()
+            self.run_balance_operation(self.service.withdraw, (acc, amount),
+                                       ("Withdraw", f"Withdrew ${amount:.2f} from account {acc}."),
+                                       self.withdraw_button)
+
+    def import_payment_file(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Import Payment File", "", "Payment files (*.csv *.jsonl *.ndjson)")
+        if not path:
+            return
+        report_path = os.path.splitext(path)[0] + ".report.csv"
+
+        def succeeded(counts):
+            summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+            QtWidgets.QMessageBox.information(self, "Payment Import", f"{summary or 'No payments found.'}\nReport written to {report_path}")
+            self.customer_model.refresh()
+            self.load_transactions()
+
+        workers.run_in_background(self.service.import_payments, path, report_path,
+                                  on_success=succeeded, on_error=self.show_db_error, busy=(self.import_payments_btn,))
+
+    def run_report(self, title, build, button):
+        if not self.db.analytics_enabled:
+            QtWidgets.QMessageBox.warning(self, title, "Reports need numpy (pip install numpy) and DB_ANALYTICS=1.")
+            return
+        # The first report streams the transaction table into the column store.
+        workers.run_in_background(lambda: build(self.db.transaction_columns()),
+                                  on_success=lambda text: QtWidgets.QMessageBox.information(self, title, text or "No transactions found."),
+                                  on_error=self.show_db_error, busy=(button,))
+
+    def show_transaction_report(self):
+        def build(analytics):
+            since = datetime.now() - timedelta(days=14)
+            lines = ["Top customers by volume:"]
+            lines += [f"  Customer {customer_id}: ${total:,.2f} in {count} transactions"
+                      for customer_id, total, count in analytics.top_customers(10)]
+            lines.append("\nDaily volume (last 14 days):")
+            lines += [f"  {day}: ${total:,.2f} ({count})" for day, total, count in analytics.volume_by_period("D", start=since)]
+            lines.append("\nLargest transactions:")
+            lines += [f"  {date}  {kind:<10} ${amount:,.2f}  customer {customer_id}"
+                      for _, kind, amount, date, customer_id in analytics.largest(10)]
+            return "\n".join(lines) if len(analytics) else ""
+
+        self.run_report("Transaction Report", build, self.report_btn)
+
+    def show_monthly_report(self):
+        def build(analytics):
+            lines = ["Totals by type:"]
+            lines += [f"  {kind}: ${total:,.2f} ({count})" for kind, (total, count) in analytics.totals_by_type().items()]
+            lines.append("\nMonthly volume:")
+            lines += [f"  {month:%Y-%m}: ${total:,.2f} ({count})" for month, total, count in analytics.volume_by_period("M")]
+            return "\n".join(lines) if len(analytics) else ""
+
+        self.run_report("Monthly Volume Report", build, self.monthly_report_btn)
 
     def view_all_accounts(self):
         accounts_info = "\n".join([f"Account: {acc_id}, Name: {c.customerName or 'N/A'}, Balance: ${acc.Balance:.2f}"
-                                  for acc_id, acc in account_objects.items()
-                                  for c in customer_objects.values() if c.customerAccountID == acc_id])
+                                  for acc_id, acc in copy_of(account_objects).items()
+                                  for c in [find_customer_by_account_id(acc_id)] if c])
         QtWidgets.QMessageBox.information(self, "All Bank Accounts", accounts_info if accounts_info else "No accounts found.")
 
     def change_employee_username(self):
@@ -328,17 +370,14 @@ class EmployeeDashboard(QtWidgets.QWidget):
         if not ok1 or eid not in employee_objects:
             QtWidgets.QMessageBox.warning(self, "Error", "Invalid or non-existent employee ID.")
             return
-        old_username = next((uname for uname, (pwd, emp) in employee_objects.items() if emp.employee_id == eid), None)
-        if not old_username:
-            QtWidgets.QMessageBox.warning(self, "Error", "Employee not found in authentication system.")
-            return
         new_username, ok2 = QtWidgets.QInputDialog.getText(self, "Change Employee Username", f"Enter new username for {eid}:")
-        if not ok2 or new_username in employee_objects:
-            QtWidgets.QMessageBox.warning(self, "Error", "Invalid or existing username.")
+        if not ok2:
+            return
+        try:
+            self.service.change_employee_username(eid, new_username)
+        except ServiceError as e:
+            QtWidgets.QMessageBox.warning(self, "Error", str(e))
             return
-        employee_objects[new_username] = employee_objects.pop(old_username)
-        employee_objects[eid].employeeUserName = new_username
-        self.db.update_employee_username(eid, new_username)
         QtWidgets.QMessageBox.information(self, "Success", f"Employee username changed to {new_username} for employee {eid}.")
 
     def change_employee_password(self):
@@ -349,19 +388,13 @@ class EmployeeDashboard(QtWidgets.QWidget):
         if not ok1 or eid not in employee_objects:
             QtWidgets.QMessageBox.warning(self, "Error", "Invalid or non-existent employee ID.")
             return
-        username = next((uname for uname, (pwd, emp) in employee_objects.items() if emp.employee_id == eid), None)
-        if not username:
-            QtWidgets.QMessageBox.warning(self, "Error", "Employee not found in authentication system.")
-            return
         new_password, ok2 = QtWidgets.QInputDialog.getText(self, "Change Employee Password", f"Enter new password for {eid}:", echo=QtWidgets.QLineEdit.Password)
-        if not ok2 or not new_password:
-            QtWidgets.QMessageBox.warning(self, "Error", "Password cannot be empty.")
+        if not ok2:
             return
-        hashed_password = hashlib.md5(new_password.encode('utf-8')).hexdigest()
-        employee_objects[username] = (hashed_password, employee_objects[username][1])
-        employee_objects[eid].employeePassword = hashed_password
-        self.db.update_employee_password(eid, hashed_password)
-        QtWidgets.QMessageBox.information(self, "Success", f"Employee password changed for employee {eid}.")
+        # Hashing the new password is slow, so it runs off the GUI thread.
+        workers.run_in_background(self.service.change_employee_password, eid, new_password,
+                                  on_success=lambda _: QtWidgets.QMessageBox.information(self, "Success", f"Employee password changed for employee {eid}."),
+                                  on_error=self.show_db_error, busy=(self.change_employee_password_btn,))
 
     def change_customer_username(self):
         if not self.is_manager:
@@ -371,21 +404,18 @@ class EmployeeDashboard(QtWidgets.QWidget):
         if not ok1 or acc_num not in account_objects:
             QtWidgets.QMessageBox.warning(self, "Error", "Invalid or non-existent account number.")
             return
-        customer = next((c for c in customer_objects.values() if c.customerAccountID == acc_num), None)
+        customer = find_customer_by_account_id(acc_num)
         if not customer:
             QtWidgets.QMessageBox.warning(self, "Error", "Customer not found.")
             return
-        old_username = next((uname for uname, (pwd, cust) in customer_objects.items() if cust.customerAccountID == acc_num), None)
-        if not old_username:
-            QtWidgets.QMessageBox.warning(self, "Error", "Customer not found in authentication system.")
-            return
         new_username, ok2 = QtWidgets.QInputDialog.getText(self, "Change Customer Username", f"Enter new username for account {acc_num}:")
-        if not ok2 or new_username in customer_objects:
-            QtWidgets.QMessageBox.warning(self, "Error", "Invalid or existing username.")
+        if not ok2:
+            return
+        try:
+            self.service.change_customer_username(acc_num, new_username)
+        except ServiceError as e:
+            QtWidgets.QMessageBox.warning(self, "Error", str(e))
             return
-        customer_objects[new_username] = customer_objects.pop(old_username)
-        customer.customerUserName = new_username
-        self.db.update_customer_username(acc_num, new_username)
         QtWidgets.QMessageBox.information(self, "Success", f"Customer username changed to {new_username} for account {acc_num}.")
 
     def change_customer_password(self):
@@ -396,23 +426,16 @@ class EmployeeDashboard(QtWidgets.QWidget):
         if not ok1 or acc_num not in account_objects:
             QtWidgets.QMessageBox.warning(self, "Error", "Invalid or non-existent account number.")
             return
-        customer = next((c for c in customer_objects.values() if c.customerAccountID == acc_num), None)
+        customer = find_customer_by_account_id(acc_num)
         if not customer:
             QtWidgets.QMessageBox.warning(self, "Error", "Customer not found.")
             return
-        username = next((uname for uname, (pwd, cust) in customer_objects.items() if cust.customerAccountID == acc_num), None)
-        if not username:
-            QtWidgets.QMessageBox.warning(self, "Error", "Customer not found in authentication system.")
-            return
         new_password, ok2 = QtWidgets.QInputDialog.getText(self, "Change Customer Password", f"Enter new password for account {acc_num}:", echo=QtWidgets.QLineEdit.Password)
-        if not ok2 or not new_password:
-            QtWidgets.QMessageBox.warning(self, "Error", "Password cannot be empty.")
+        if not ok2:
             return
-        hashed_password = hashlib.md5(new_password.encode('utf-8')).hexdigest()
-        customer_objects[username] = (hashed_password, customer_objects[username][1])
-        customer.customerPassword = hashed_password
-        self.db.update_customer_password(acc_num, hashed_password)
-        QtWidgets.QMessageBox.information(self, "Success", f"Customer password changed for account {acc_num}.")
+        workers.run_in_background(self.service.change_customer_password, acc_num, new_password,
+                                  on_success=lambda _: QtWidgets.QMessageBox.information(self, "Success", f"Customer password changed for account {acc_num}."),
+                                  on_error=self.show_db_error, busy=(self.change_customer_password_btn,))
 
     def back_to_home(self):
         self.close()
@@ -424,6 +447,7 @@ class CustomerDashboard(QtWidgets.QWidget):
     def __init__(self, db, customer, login_page=None):
         super().__init__()  # FIXED: Removed parent parameter to prevent overlap
         self.db = db
+        self.service = BankService(db)
         self.customer = customer
         self.login_page = login_page
         print(f"Initializing CustomerDashboard for {customer.customerUserName}, AccountID: {customer.customerAccountID}")
@@ -486,22 +510,19 @@ class CustomerDashboard(QtWidgets.QWidget):
         if to_acc == from_acc:
             QtWidgets.QMessageBox.warning(self, "Error", "Cannot transfer to the same account.")
             return
-        max_transfer = account_objects[from_acc].Balance
+        max_transfer = float(account_objects[from_acc].Balance)
         amount, ok2 = QtWidgets.QInputDialog.getDouble(self, "Transfer", "Enter amount to transfer:", 0, 0.01, max_transfer, 2)
         if ok2:
-            if amount > max_transfer:
-                QtWidgets.QMessageBox.warning(self, "Error", "Insufficient funds in your account.")
-            else:
-                account_objects[from_acc].Balance -= Decimal(amount)
-                account_objects[to_acc].Balance += Decimal(amount)
-                self.db.cursor.execute("UPDATE account SET Balance = %s WHERE AccountID = %s",
-                                       (account_objects[from_acc].Balance, from_acc))
-                self.db.cursor.execute("UPDATE account SET Balance = %s WHERE AccountID = %s",
-                                       (account_objects[to_acc].Balance, to_acc))
-                self.db.conn.commit()
+            def succeeded(_):
                 QtWidgets.QMessageBox.information(self, "Transferred", f"Transferred ${amount:.2f} to account {to_acc}.")
                 self.refresh_balance()  # FIXED: Refresh balance instead of recreating UI
 
+            def failed(e):
+                QtWidgets.QMessageBox.warning(self, "Error", str(e) if isinstance(e, ServiceError) else f"Transfer failed: {str(e)}")
+
+            workers.run_in_background(self.service.transfer, from_acc, to_acc, amount,
+                                      on_success=succeeded, on_error=failed, busy=(self.transfer_button,))
+
     def refresh_balance(self):
         """ADDED: Method to refresh balance display without recreating the entire UI"""
         balance = account_objects.get(str(self.customer.customerAccountID), None)
@@ -525,6 +546,7 @@ class LoginPage(QtWidgets.QWidget):
     def __init__(self, db, parent=None):
         super().__init__(parent)
         self.db = db
+        self.service = BankService(db)
         self.add_customer_window = None
         self.add_employee_window = None
         self.customer_dashboard = None  # ADDED: Keep reference to dashboard
@@ -591,36 +613,24 @@ class LoginPage(QtWidgets.QWidget):
         
         # ADDED: Clear previous status
         self.status_label.setText("")
-        self.login_button.setEnabled(False)
-        
-        try:
-            hashed_password = hashlib.md5(password.encode('utf-8')).hexdigest()
-            print(f"Attempting login for username: {username}, hashed password: {hashed_password}")
+        print(f"Attempting login for username: {username}")
 
+        def succeeded(result):
             if role == "Customer":
-                for customer in customer_objects.values():
-                    if customer.customerUserName == username and customer.customerPassword == hashed_password:
-                        customer.customerAccountID = customer.customerAccountID or None
-                        print(f"Customer login successful for {customer.customerUserName}, AccountID: {customer.customerAccountID}")
-                        if not customer.customerAccountID or str(customer.customerAccountID) not in account_objects:
-                            self.status_label.setText("Invalid customer account data.")
-                            return
-                        self.status_label.setText("Customer login successful!")
-                        self.show_customer_dashboard(customer)
-                        return
-            elif role == "Employee":
-                for employee in employee_objects.values():
-                    if employee.employeeUserName == username and employee.employeePassword == hashed_password:
-                        self.status_label.setText("Employee login successful!")
-                        is_manager = employee.position.lower() == "manager"
-                        self.show_employee_dashboard(employee, is_manager)
-                        return
-            self.status_label.setText("Invalid credentials. Please try again.")
-        except Exception as e:
-            self.status_label.setText(f"Login error: {str(e)}")
-            traceback.print_exc()
-        finally:
-            self.login_button.setEnabled(True)
+                print(f"Customer login successful for {result.customerUserName}, AccountID: {result.customerAccountID}")
+                self.status_label.setText("Customer login successful!")
+                self.show_customer_dashboard(result)
+            else:
+                employee, is_manager = result
+                self.status_label.setText("Employee login successful!")
+                self.show_employee_dashboard(employee, is_manager)
+
+        def failed(e):
+            self.status_label.setText(str(e) if isinstance(e, ServiceError) else f"Login error: {str(e)}")
+
+        # Password verification is deliberately slow, so it runs off the GUI thread.
+        workers.run_in_background(self.service.login, role.lower(), username, password,
+                                  on_success=succeeded, on_error=failed, busy=(self.login_button,))
 
     def open_add_customer(self):
         if self.add_customer_window is None:
@@ -688,12 +698,16 @@ class LoginPage(QtWidgets.QWidget):
             self.status_label.setText(f"Dashboard error: {str(e)}")
 
     def refresh_data(self):
-        self.db.load_data()
+        workers.run_in_background(self.db.sync_changes, on_success=self.refresh_views,
+                                  on_error=lambda e: self.status_label.setText(f"Refresh error: {str(e)}"))
+
+    def refresh_views(self, _=None):
         if self.employee_dashboard and self.employee_dashboard.isVisible():
             self.employee_dashboard.load_customers()
             self.employee_dashboard.load_transactions()
             if self.employee_dashboard.is_manager:
                 self.employee_dashboard.load_activity_logs()
+                self.employee_dashboard.load_metrics()
         elif self.customer_dashboard and self.customer_dashboard.isVisible():
             self.customer_dashboard.refresh_balance()
 
@@ -707,6 +721,14 @@ class LoginPage(QtWidgets.QWidget):
 
 def cleanup_and_exit():
     print("Application closing, performing cleanup...")
+    workers.wait_for_done()
+    if 'db' in globals() and db:
+        db.flush()
+        if snapshot.enabled():
+            try:
+                snapshot.save_snapshot(db)
+            except Exception as e:
+                print(f"Could not write snapshot: {str(e)}")
     if 'db' in globals() and db:
         db.close()
     QtWidgets.QApplication.quit()
@@ -717,13 +739,14 @@ def main():
         print("Initializing database...")
         global db
         db = Database()
+        db.migrate()
         print("Database initialized, loading data...")
-        db.load_data()
+        snapshot.warm_start(db)
         print(f"Loaded customer_objects: {len(customer_objects)}, account_objects: {len(account_objects)}, "
-              f"employee_objects: {len(employee_objects)}, transactions: {len(transactions)}, "
-              f"activity_logs: {len(activity_logs)}")
+              f"employee_objects: {len(employee_objects)} (transactions and activity logs load on demand)")
         print("QApplication initialized")
         app = QtWidgets.QApplication(sys.argv)
+        workers.configure(db.pool_size or 1)
         login_page = LoginPage(db)
         print("LoginPage created")
         login_page.show()
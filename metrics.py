@@ -0,0 +1,244 @@
+import bisect
+import functools
+import os
+import re
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets, in milliseconds.
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+STATEMENT_VERB = re.compile(r"\s*(?:(insert|replace)\s+(?:or\s+\w+\s+)?into|(update)|(delete)\s+from|(select)\b.*?\bfrom)"
+                            r"\s+`?(\w+)", re.IGNORECASE | re.DOTALL)
+# Bounds the name cache when SQL is built per call (IN lists of varying length).
+MAX_CACHED_NAMES = 1024
+_statement_names = {}
+
+
+def enabled():
+    return os.getenv('DB_METRICS', '1') == '1'
+
+
+class LatencyHistogram:
+    """Call count, error count and a fixed-bucket latency histogram for one endpoint or statement."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms, error=False):
+        self.counts[bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return BUCKETS_MS[index] if index < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class StatementStats(LatencyHistogram):
+    """LatencyHistogram that also adds up the rows each statement changed."""
+
+    def __init__(self):
+        super().__init__()
+        self.rows = 0
+
+    def stats(self):
+        stats = super().stats()
+        stats["rows"] = self.rows
+        return stats
+
+
+def statement_name(sql):
+    """Short name for SQL sent as text, e.g. "update account" or "select customer"."""
+    name = _statement_names.get(sql)
+    if name is None:
+        match = STATEMENT_VERB.match(sql)
+        if match:
+            name = f"{next(verb for verb in match.groups()[:4] if verb).lower()} {match.group(5).lower()}"
+        else:
+            name = sql.split(None, 1)[0].lower() if sql.strip() else "empty"
+        if len(_statement_names) < MAX_CACHED_NAMES:
+            _statement_names[sql] = name
+    return name
+
+
+class DatabaseMetrics:
+    """Counters for one Database: per statement round trip and per Database method.
+
+    Statements are named by their db.STATEMENTS key when run prepared and by
+    statement_name() otherwise. Each name gets calls, errors, rows changed
+    and a latency histogram; report() returns a copy that is safe to keep.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.statements = {}
+        self.operations = {}
+        self._lock = threading.Lock()
+
+    def observe_statement(self, name, elapsed_ms, rows=0, error=False):
+        with self._lock:
+            stats = self.statements.get(name)
+            if stats is None:
+                stats = self.statements[name] = StatementStats()
+            stats.observe(elapsed_ms, error)
+            stats.rows += rows
+
+    def observe_operation(self, name, elapsed_ms, error=False):
+        with self._lock:
+            histogram = self.operations.get(name)
+            if histogram is None:
+                histogram = self.operations[name] = LatencyHistogram()
+            histogram.observe(elapsed_ms, error)
+
+    def report(self):
+        with self._lock:
+            return {
+                "uptime_s": round(time.time() - self.started, 1),
+                "statements": {name: stats.stats() for name, stats in sorted(self.statements.items())},
+                "operations": {name: stats.stats() for name, stats in sorted(self.operations.items())},
+            }
+
+    def rows(self):
+        """(name, kind, stats) for every statement and operation, slowest in total first."""
+        report = self.report()
+        rows = [(name, kind, stats) for kind in ("statements", "operations") for name, stats in report[kind].items()]
+        rows.sort(key=lambda row: row[2]["mean_ms"] * row[2]["count"], reverse=True)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.statements.clear()
+            self.operations.clear()
+
+
+def format_report(metrics, limit=None):
+    lines = [f"{'name':<32}{'kind':<11}{'calls':>8}{'errors':>7}{'rows':>9}{'mean ms':>9}{'p95 ms':>8}{'max ms':>9}"]
+    for name, kind, stats in metrics.rows()[:limit]:
+        lines.append(f"{name:<32}{kind[:-1]:<11}{stats['count']:>8}{stats['errors']:>7}{stats.get('rows', ''):>9}"
+                     f"{stats['mean_ms']:>9.3f}{stats['p95_ms']:>8}{stats['max_ms']:>9.3f}")
+    return "\n".join(lines)
+
+
+def instrumented(method):
+    """Record a Database method's latency and errors under its name (a plain call when metrics are off)."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        metrics = self.metrics
+        if metrics is None:
+            return method(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception:
+            metrics.observe_operation(name, (time.perf_counter() - started) * 1000, error=True)
+            raise
+        metrics.observe_operation(name, (time.perf_counter() - started) * 1000)
+        return result
+
+    return wrapper
+
+
+class InstrumentedCursor:
+    """Backend cursor wrapper that times every statement sent through it."""
+
+    def __init__(self, cursor, metrics):
+        self._cursor = cursor
+        self._metrics = metrics
+
+    def _timed(self, name, run, *args):
+        started = time.perf_counter()
+        try:
+            run(*args)
+        except Exception:
+            self._metrics.observe_statement(name, (time.perf_counter() - started) * 1000, error=True)
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # Row counts of SELECTs are rows read, not changed.
+        rows = self._cursor.rowcount if self._cursor.description is None else 0
+        self._metrics.observe_statement(name, elapsed_ms, max(rows, 0))
+        return self
+
+    def execute(self, sql, params=()):
+        return self._timed(statement_name(sql), self._cursor.execute, sql, params)
+
+    def executemany(self, sql, rows):
+        return self._timed(statement_name(sql), self._cursor.executemany, sql, rows)
+
+    def execute_prepared(self, name, params=()):
+        return self._timed(name, self._cursor.execute_prepared, name, params)
+
+    def executemany_prepared(self, name, rows):
+        return self._timed(name, self._cursor.executemany_prepared, name, rows)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class MetricsLogger:
+    """Prints the metrics report every `interval` seconds from a background thread."""
+
+    def __init__(self, metrics, interval, limit=20):
+        self.metrics = metrics
+        self.interval = interval
+        self.limit = limit
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="db-metrics-logger", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.metrics.statements or self.metrics.operations:
+                print(f"Database metrics:\n{format_report(self.metrics, self.limit)}")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
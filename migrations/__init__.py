@@ -0,0 +1,53 @@
+"""Versioned schema migrations. Run with `python -m migrations --help`.
+
+Each mNNNN module has VERSION, DESCRIPTION and up(backend, cursor). Applied
+versions are recorded in schema_migrations; Database.migrate() applies the
+rest in order at startup. Migrations check before they change anything, so
+a database set up by hand from the README is brought up to date as well.
+"""
+from datetime import datetime
+from migrations import (m0001_schema, m0002_sync_columns, m0003_lookup_indexes, m0004_history_index,
+                        m0005_id_sequences, m0006_money_cents)
+
+MIGRATIONS = (m0001_schema, m0002_sync_columns, m0003_lookup_indexes, m0004_history_index, m0005_id_sequences,
+              m0006_money_cents)
+
+CREATE_VERSIONS = '''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        description VARCHAR(200),
+        appliedAt VARCHAR(50)
+    )
+'''
+
+
+def applied_versions(db):
+    """{version: appliedAt} for every recorded migration."""
+    with db.transaction() as cursor:
+        cursor.execute(CREATE_VERSIONS)
+        cursor.execute("SELECT version, appliedAt FROM schema_migrations")
+        return {version: applied_at for version, applied_at in cursor.fetchall()}
+
+
+def pending(db):
+    applied = applied_versions(db)
+    return [migration for migration in MIGRATIONS if migration.VERSION not in applied]
+
+
+def migrate(db):
+    """Apply every pending migration in order, each in its own transaction. Returns the versions applied."""
+    done = []
+    for migration in pending(db):
+        with db.transaction() as cursor:
+            # Another process may have got here first.
+            cursor.execute("SELECT COUNT(*) FROM schema_migrations WHERE version = %s", (migration.VERSION,))
+            if cursor.fetchone()[0]:
+                continue
+            print(f"Applying migration {migration.VERSION}: {migration.DESCRIPTION}")
+            # MySQL commits DDL as it goes, so a failed migration can leave part
+            # of its work behind; the checks in up() let it run again.
+            migration.up(db.backend, cursor)
+            cursor.execute("INSERT INTO schema_migrations (version, description, appliedAt) VALUES (%s, %s, %s)",
+                           (migration.VERSION, migration.DESCRIPTION, datetime.now().isoformat(timespec="seconds")))
+        done.append(migration.VERSION)
+    return done
@@ -0,0 +1,36 @@
+import argparse
+import sys
+import migrations
+from db import Database
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="Apply and inspect the schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations without applying any")
+    parser.add_argument("--explain", action="store_true", help="show the query plan of every hot query")
+    args = parser.parse_args()
+
+    db = Database()
+    try:
+        if not args.status:
+            applied = db.migrate()
+            print(f"Applied {len(applied)} migration(s)" if applied else "Schema is up to date")
+        recorded = migrations.applied_versions(db)
+        for migration in migrations.MIGRATIONS:
+            state = f"applied {recorded[migration.VERSION]}" if migration.VERSION in recorded else "pending"
+            print(f"  {migration.VERSION:04d} {migration.DESCRIPTION:<28} {state}")
+        unindexed = []
+        if args.explain:
+            for name, (plan, indexed) in db.explain_hot_queries().items():
+                print(f"{name}: {'index' if indexed else 'NOT INDEXED'}")
+                for line in plan:
+                    print(f"    {line}")
+                if not indexed:
+                    unindexed.append(name)
+    finally:
+        db.close()
+    return 1 if unindexed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
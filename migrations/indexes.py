@@ -0,0 +1,16 @@
+def ensure_index(backend, cursor, table, name, columns, unique=False):
+    """Create an index unless an equivalent one exists. Returns True if it was created.
+
+    Any index starting with `columns` serves lookups on them; a unique index
+    must be on exactly those columns.
+    """
+    wanted = tuple(column.lower() for column in columns)
+    for existing, existing_unique in backend.indexes(cursor, table).values():
+        existing = tuple(column.lower() for column in existing)
+        if unique and existing_unique and existing == wanted:
+            return False
+        if not unique and existing[:len(wanted)] == wanted:
+            return False
+    print(f"Adding {'unique ' if unique else ''}index {name} on {table} ({', '.join(columns)})")
+    backend.add_index(cursor, table, name, columns, unique)
+    return True
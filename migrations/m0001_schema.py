@@ -0,0 +1,75 @@
+"""The bank tables. Existing tables are left alone; later migrations bring them up to date."""
+
+VERSION = 1
+DESCRIPTION = "bank tables"
+
+# The README schema plus debitcard. {sync_column} is the backend's updatedAt
+# column, so new tables start with change tracking.
+TABLES = (
+    '''
+    CREATE TABLE IF NOT EXISTS customer (
+        customerID INT PRIMARY KEY,
+        customerUserName VARCHAR(50) UNIQUE,
+        customerPassword VARCHAR(255),
+        customerName VARCHAR(100),
+        nationalID VARCHAR(20),
+        customerAccountID VARCHAR(10),
+        customerEmail VARCHAR(100),
+        {sync_column}
+    )''',
+    '''
+    CREATE TABLE IF NOT EXISTS employee (
+        employeeID VARCHAR(10) PRIMARY KEY,
+        employeeName VARCHAR(100),
+        employeeUserName VARCHAR(50) UNIQUE,
+        employeePassword VARCHAR(255),
+        nationalID VARCHAR(20),
+        position VARCHAR(50),
+        employeeEmail VARCHAR(100),
+        employeePhone VARCHAR(20),
+        {sync_column}
+    )''',
+    '''
+    CREATE TABLE IF NOT EXISTS account (
+        AccountID VARCHAR(10) PRIMARY KEY,
+        AccountNumber VARCHAR(20) UNIQUE,
+        Balance DECIMAL(15, 2),
+        AccountType VARCHAR(50),
+        {sync_column}
+    )''',
+    '''
+    CREATE TABLE IF NOT EXISTS debitcard (
+        cardNumber VARCHAR(16) PRIMARY KEY,
+        cardPin VARCHAR(4),
+        cardExpiryDate VARCHAR(10),
+        cardStatus VARCHAR(20),
+        customerID INT,
+        {sync_column},
+        FOREIGN KEY (customerID) REFERENCES customer(customerID)
+    )''',
+    '''
+    CREATE TABLE IF NOT EXISTS `transaction` (
+        transactionID VARCHAR(36) PRIMARY KEY,
+        transactionType VARCHAR(50),
+        amount DECIMAL(15, 2),
+        transactionDate VARCHAR(50),
+        customerID INT,
+        {sync_column},
+        FOREIGN KEY (customerID) REFERENCES customer(customerID)
+    )''',
+    '''
+    CREATE TABLE IF NOT EXISTS activitylog (
+        logID VARCHAR(36) PRIMARY KEY,
+        userType VARCHAR(50),
+        userID VARCHAR(50),
+        actionType VARCHAR(50),
+        amount DECIMAL(15, 2),
+        logTime VARCHAR(50),
+        {sync_column}
+    )''',
+)
+
+
+def up(backend, cursor):
+    for table in TABLES:
+        cursor.execute(table.format(sync_column=backend.sync_column))
@@ -0,0 +1,15 @@
+"""updatedAt change tracking for the incremental sync (Database.sync_changes)."""
+
+VERSION = 2
+DESCRIPTION = "updatedAt sync columns"
+
+SYNC_TABLES = ("customer", "account", "debitcard", "employee", "transaction", "activitylog")
+
+
+def up(backend, cursor):
+    for table in SYNC_TABLES:
+        # Tables created before 0001 existed have no updatedAt column yet.
+        if not backend.has_column(cursor, table, "updatedAt"):
+            print(f"Adding updatedAt column to {table}")
+            backend.add_sync_column(cursor, table)
+        backend.track_updates(cursor, table)
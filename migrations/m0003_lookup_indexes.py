@@ -0,0 +1,20 @@
+"""Indexes for the lookups by account number, username, account ID and card owner."""
+from migrations.indexes import ensure_index
+
+VERSION = 3
+DESCRIPTION = "lookup indexes"
+
+# (table, index name, columns, unique). transaction.customerID is served by
+# the history index from 0004.
+INDEXES = (
+    ("account", "uq_account_number", ("AccountNumber",), True),
+    ("customer", "uq_customer_username", ("customerUserName",), True),
+    ("employee", "uq_employee_username", ("employeeUserName",), True),
+    ("customer", "idx_customer_account", ("customerAccountID",), False),
+    ("debitcard", "idx_debitcard_customer", ("customerID",), False),
+)
+
+
+def up(backend, cursor):
+    for table, name, columns, unique in INDEXES:
+        ensure_index(backend, cursor, table, name, columns, unique)
@@ -0,0 +1,10 @@
+"""Composite index for the keyset-paginated transaction history (Database.transaction_page)."""
+from migrations.indexes import ensure_index
+
+VERSION = 4
+DESCRIPTION = "transaction history index"
+
+
+def up(backend, cursor):
+    ensure_index(backend, cursor, "transaction", "idx_transaction_customer_date",
+                 ("customerID", "transactionDate", "transactionID"))
@@ -0,0 +1,31 @@
+"""Counters for the block-allocated customer, account and card IDs (id_allocator.IdAllocator)."""
+
+VERSION = 5
+DESCRIPTION = "id sequences"
+
+CREATE = '''
+    CREATE TABLE IF NOT EXISTS id_sequence (
+        name VARCHAR(50) PRIMARY KEY,
+        nextValue BIGINT NOT NULL
+    )
+'''
+# Each sequence starts above the highest ID in use. Earlier IDs were random,
+# so the gaps below them are left alone.
+SEEDS = (
+    ("customer", "SELECT MAX(customerID) FROM customer"),
+    ("account", "SELECT MAX(CAST(AccountID AS UNSIGNED)) FROM account"),
+    ("card", None),
+)
+
+
+def up(backend, cursor):
+    cursor.execute(CREATE)
+    for name, highest_query in SEEDS:
+        cursor.execute("SELECT COUNT(*) FROM id_sequence WHERE name = %s", (name,))
+        if cursor.fetchone()[0]:
+            continue
+        highest = 0
+        if highest_query:
+            cursor.execute(highest_query)
+            highest = cursor.fetchone()[0] or 0
+        cursor.execute("INSERT INTO id_sequence (name, nextValue) VALUES (%s, %s)", (name, int(highest) + 1))
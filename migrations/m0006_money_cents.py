@@ -0,0 +1,11 @@
+"""Exact money columns on SQLite: store Balance and amount as integer cents (see backends/sqlite_backend.py)."""
+
+VERSION = 6
+DESCRIPTION = "money as integer cents"
+
+MONEY_COLUMNS = (("account", "Balance"), ("transaction", "amount"), ("activitylog", "amount"))
+
+
+def up(backend, cursor):
+    for table, column in MONEY_COLUMNS:
+        backend.money_to_cents(cursor, table, column)
@@ -1,8 +1,13 @@
 # models/account.py
+from .fields import intern_or_none
+
+
 class Account:
+    __slots__ = ("AccountID", "AccountType", "Balance", "AccountNumber")
+
     def __init__(self, AccountID, AccountType, Balance, AccountNumber):
         self.AccountID = AccountID
-        self.AccountType = AccountType
+        self.AccountType = intern_or_none(AccountType)
         self.Balance = Balance
         self.AccountNumber = AccountNumber
 
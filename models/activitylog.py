@@ -1,8 +1,13 @@
+from .fields import intern_or_none, parse_datetime
+
+
 class ActivityLog:
+    __slots__ = ("logID", "userType", "userID", "actionType", "amount", "logTime")
+
     def __init__(self, logID, userType, userID, actionType, amount, logTime):
         self.logID = logID
-        self.userType = userType
+        self.userType = intern_or_none(userType)
         self.userID = userID
-        self.actionType = actionType
+        self.actionType = intern_or_none(actionType)
         self.amount = amount
-        self.logTime = logTime
\ No newline at end of file
+        self.logTime = parse_datetime(logTime)
\ No newline at end of file
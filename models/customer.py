@@ -1,4 +1,7 @@
 class Customer:
+    __slots__ = ("customerUserName", "nationalID", "customerPassword", "customerEmail", "customerAccountID",
+                 "customerID", "customerName", "account", "debit_card")
+
     def __init__(self, customerUserName, nationalID, customerPassword, customerEmail, customerAccountID, customerID,customerName):
     
         
@@ -1,9 +1,14 @@
+from .fields import intern_or_none, parse_date
+
+
 class DebitCard:
+    __slots__ = ("cardNumber", "cardPin", "cardExpiryDate", "cardStatus", "customerID")
+
     def __init__(self, cardNumber, cardPin, cardExpiryDate, cardStatus, customerID):
         self.cardNumber = cardNumber
         self.cardPin = cardPin
-        self.cardExpiryDate = cardExpiryDate
-        self.cardStatus = cardStatus
+        self.cardExpiryDate = parse_date(cardExpiryDate)
+        self.cardStatus = intern_or_none(cardStatus)
         self.customerID = customerID
 
     def block_card(self):
@@ -1,9 +1,15 @@
+from .fields import intern_or_none
+
+
 class Employee:
+    __slots__ = ("employeeName", "nationalID", "employeeID", "position", "employeeEmail", "employeePhone",
+                 "employeeUserName", "employeePassword")
+
     def __init__(self, employeeName, nationalID, employeeID, position, employeeEmail, employeePhone):
         self.employeeName = employeeName
         self.nationalID = nationalID
         self.employeeID = employeeID
-        self.position = position
+        self.position = intern_or_none(position)
         self.employeeEmail = employeeEmail
         self.employeePhone = employeePhone
         self.employeeUserName = None
@@ -0,0 +1,38 @@
+import sys
+from datetime import date, datetime
+
+
+def intern_or_none(value):
+    # Categorical columns (types, statuses, positions) repeat the same few
+    # strings millions of times; interning makes every instance share one.
+    if value is None:
+        return None
+    return sys.intern(str(value))
+
+
+def parse_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return value
+
+
+def parse_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        return value
+
+
+def format_datetime(value):
+    # Dates are stored as ISO-8601 text; keep the "T" separator so stored
+    # values still sort chronologically as strings.
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
@@ -1,4 +1,6 @@
 class Person:
+    __slots__ = ("name", "national_id")
+
     def __init__(self, name, national_id):
         self.name = name
         self.national_id = national_id
\ No newline at end of file
@@ -1,7 +1,12 @@
+from .fields import intern_or_none, parse_datetime
+
+
 class Transaction:
+    __slots__ = ("transactionID", "transactionType", "amount", "transactionDate", "customerID")
+
     def __init__(self, transactionID, transactionType, amount, transactionDate, customerID):
         self.transactionID = transactionID
-        self.transactionType = transactionType
+        self.transactionType = intern_or_none(transactionType)
         self.amount = amount
-        self.transactionDate = transactionDate
+        self.transactionDate = parse_datetime(transactionDate)
         self.customerID = customerID
\ No newline at end of file
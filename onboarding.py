@@ -0,0 +1,170 @@
+import csv
+import os
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+import credentials
+from bulk_transfers import MalformedRecord, read_records
+from db import to_money
+from id_allocator import account_number
+from models.customer import Customer
+from models.account import Account
+from models.debitcard import DebitCard
+from globals import register_customer, register_account, find_customer_by_username
+
+ACCOUNT_TYPES = ("Saving", "Current")
+FIELDS = ("name", "national_id", "username", "password", "balance", "email", "account_type", "expiry_date", "pin")
+
+
+def is_valid_date(date_str):
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+
+def validate_customer_fields(name, national_id, username, password, balance_text, email, expiry_date, pin):
+    """Apply the AddCustomerWindow rules. Returns (error, balance); error is None when valid."""
+    if not username or not national_id or not password or not name:
+        return "Error: Username, National ID, Password, and Name are required!", None
+    if len(national_id) != 14 or not national_id.isdigit():
+        return "Error: National ID must be 14 digits!", None
+    if email and "@" not in email:
+        return "Error: Invalid email!", None
+    try:
+        balance = to_money(balance_text)
+        # NaN survives quantize(), and quantize() would round away fractions of a cent.
+        if not balance.is_finite() or balance < 0 or balance != Decimal(str(balance_text)):
+            raise ValueError("Balance must be a non-negative amount in cents!")
+    except (InvalidOperation, TypeError, ValueError):
+        return "Error: Invalid balance (must be a non-negative amount with at most 2 decimal places)!", None
+    if not expiry_date or not is_valid_date(expiry_date):
+        return "Error: Invalid expiry date (use YYYY-MM-DD)!", None
+    if not pin or len(pin) != 4 or not pin.isdigit():
+        return "Error: PIN must be 4 digits!", None
+    if find_customer_by_username(username):
+        return "Error: Username already exists!", None
+    return None, balance
+
+
+def build_customer(customer_id, account_id, card_number, name, national_id, username, hashed_password, balance, email,
+                   account_type, expiry_date, pin):
+    """Customer, account and debit card objects for IDs from Database.ids (id_allocator.IdAllocator)."""
+    customer = Customer(username, national_id, hashed_password, email or None, account_id, customer_id, name)
+    account = Account(account_id, account_type, balance, account_number(account_id))
+    debit_card = DebitCard(card_number, pin, expiry_date, "Active", customer_id)
+    customer.link_account(account)
+    customer.link_debit_card(debit_card)
+    return customer, account, debit_card
+
+
+class OnboardingResult:
+    def __init__(self, line, username, status="pending", message=""):
+        self.line = line
+        self.username = username
+        self.status = status
+        self.message = message
+        self.customer = None
+
+
+def read_customers(path):
+    """Yield (line_number, record) pairs from a CSV or JSON-lines customer file.
+
+    Records use the AddCustomerWindow fields: name, national_id, username,
+    password, balance, email, account_type, expiry_date, pin. Lines that
+    cannot be parsed come through as MalformedRecord and are rejected.
+    """
+    return read_records(path)
+
+
+def onboard_customers(db, records, chunk_size=None):
+    """Validate, create and insert many customers at once.
+
+    IDs are reserved as one block from the ID sequences, rows are inserted with executemany in one
+    DB transaction per chunk, and the in-memory registries are updated once
+    at the end instead of reloading everything.
+    """
+    chunk_size = chunk_size or int(os.getenv('BULK_CHUNK_SIZE', 1000))
+    results = []
+    valid = []
+    seen_usernames = set()
+    for line_number, record in records:
+        if isinstance(record, MalformedRecord):
+            results.append(OnboardingResult(line_number, "", "rejected", record.message))
+            continue
+        fields = {key: str(record.get(key) or "").strip() for key in FIELDS}
+        result = OnboardingResult(line_number, fields["username"])
+        results.append(result)
+        error, balance = validate_customer_fields(fields["name"], fields["national_id"], fields["username"], fields["password"],
+                                                  fields["balance"], fields["email"], fields["expiry_date"], fields["pin"])
+        account_type = fields["account_type"] or ACCOUNT_TYPES[0]
+        if error is None and fields["username"] in seen_usernames:
+            error = "Error: Username already exists!"
+        if error is None and account_type not in ACCOUNT_TYPES:
+            error = "Error: Invalid account type!"
+        if error is not None:
+            result.status, result.message = "rejected", error
+            continue
+        seen_usernames.add(fields["username"])
+        valid.append((result, fields, balance, account_type))
+
+    if valid:
+        ids = zip(db.ids.take("customer", len(valid)), db.ids.take("account", len(valid)), db.ids.card_numbers(len(valid)))
+        # Hashing dominates a large import, so the whole batch goes to the credential workers at once.
+        hashes = credentials.default_service().hash_many([fields["password"] for _, fields, _, _ in valid])
+        for (result, fields, balance, account_type), (customer_id, account_id, card_number), hashed_password in zip(valid, ids, hashes):
+            result.customer = build_customer(customer_id, account_id, card_number, fields["name"], fields["national_id"],
+                                             fields["username"], hashed_password, balance, fields["email"], account_type,
+                                             fields["expiry_date"], fields["pin"])
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = [result for result, *_ in valid[start:start + chunk_size]]
+        try:
+            db.save_new_customers([result.customer for result in chunk])
+        except Exception as e:
+            for result in chunk:
+                result.status, result.message = "failed", f"Database error: {str(e)}"
+            continue
+        for result in chunk:
+            result.status = "created"
+
+    for result in results:
+        if result.status == "created":
+            customer, account, _ = result.customer
+            register_account(account)
+            register_customer(customer)
+    return results
+
+
+def import_customer_file(db, path, chunk_size=None):
+    return onboard_customers(db, read_customers(path), chunk_size)
+
+
+def write_report(results, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["line", "username", "customer_id", "account_id", "status", "message"])
+        for result in results:
+            customer = result.customer[0] if result.customer else None
+            writer.writerow([result.line, result.username, customer.customerID if customer else "",
+                             customer.customerAccountID if customer else "", result.status, result.message])
+
+
+if __name__ == "__main__":
+    import sys
+    from db import Database
+
+    if len(sys.argv) != 2:
+        print("Usage: python onboarding.py <customers.csv|customers.jsonl>")
+        sys.exit(1)
+    db = Database()
+    try:
+        db.migrate()
+        db.load_data()
+        results = import_customer_file(db, sys.argv[1])
+        report_path = os.path.splitext(sys.argv[1])[0] + ".report.csv"
+        write_report(results, report_path)
+        created = sum(1 for result in results if result.status == "created")
+        print(f"Created {created} of {len(results)} customers, report written to {report_path}")
+    finally:
+        db.close()
@@ -0,0 +1,2 @@
+"""GUI-free bank operations. Run headless with `python -m services --help`."""
+from services.bank import BankService, ServiceError
@@ -0,0 +1,123 @@
+import argparse
+import getpass
+import os
+import sys
+import time
+from decimal import Decimal
+
+# Measured before anything heavy is imported.
+STARTED = time.perf_counter()
+
+import metrics
+from services.bank import BankService, ServiceError
+
+# Commands that change nothing, so the snapshot is left as it is.
+READ_ONLY = ("status", "balance", "history", "login")
+
+
+def peak_memory_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def report_path_for(path, report):
+    return report or os.path.splitext(path)[0] + ".report.csv"
+
+
+def run(service, args):
+    if args.command == "status":
+        counts = service.summary()
+        print(", ".join(f"{name}: {count}" for name, count in counts.items()))
+        peak = peak_memory_kb()
+        print(f"Started in {(time.perf_counter() - STARTED) * 1000:.0f} ms"
+              + (f", peak memory {peak / 1024:.1f} MiB" if peak else "")
+              + f", PyQt5 loaded: {'PyQt5' in sys.modules}")
+    elif args.command == "balance":
+        print(f"Account {args.account}: ${service.balance(args.account):.2f}")
+    elif args.command == "transfer":
+        service.transfer(args.from_account, args.to_account, args.amount)
+        print(f"Transferred ${args.amount:.2f} from {args.from_account} to {args.to_account}.")
+    elif args.command == "deposit":
+        balance = service.deposit(args.account, args.amount)
+        print(f"Deposited ${args.amount:.2f} to account {args.account}. Balance: ${balance:.2f}")
+    elif args.command == "withdraw":
+        balance = service.withdraw(args.account, args.amount)
+        print(f"Withdrew ${args.amount:.2f} from account {args.account}. Balance: ${balance:.2f}")
+    elif args.command == "history":
+        for t in service.transactions(args.customer):
+            print(f"{t.transactionDate}  {t.transactionType:<10} ${t.amount:,.2f}  {t.transactionID}")
+    elif args.command == "login":
+        password = getpass.getpass()
+        if args.role == "customer":
+            customer = service.login_customer(args.username, password)
+            print(f"Customer login successful for {customer.customerUserName}, account {customer.customerAccountID}")
+        else:
+            employee, manager = service.login_employee(args.username, password)
+            print(f"Employee login successful for {employee.employeeUserName}" + (" (manager)" if manager else ""))
+    elif args.command == "import-payments":
+        report = report_path_for(args.path, args.report)
+        counts = service.import_payments(args.path, report)
+        summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+        print(f"{summary or 'No payments found.'}\nReport written to {report}")
+    elif args.command == "import-customers":
+        report = report_path_for(args.path, args.report)
+        counts = service.import_customers(args.path, report)
+        summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+        print(f"{summary or 'No customers found.'}\nReport written to {report}")
+    elif args.command == "serve":
+        from services import http_api
+        http_api.run(service, args.host, args.port, args.max_concurrency, args.workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m services", description="Bank System operations without the GUI.")
+    parser.add_argument("--full-load", action="store_true", help="ignore the snapshot and load every table")
+    parser.add_argument("--metrics", action="store_true", help="print the database metrics before exiting")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="load the data and print counts, startup time and memory")
+    command = commands.add_parser("balance", help="print an account balance")
+    command.add_argument("account")
+    command = commands.add_parser("transfer", help="move money between two accounts")
+    command.add_argument("from_account")
+    command.add_argument("to_account")
+    command.add_argument("amount", type=Decimal)
+    for name in ("deposit", "withdraw"):
+        command = commands.add_parser(name, help=f"{name} money")
+        command.add_argument("account")
+        command.add_argument("amount", type=Decimal)
+    command = commands.add_parser("history", help="list a customer's transactions")
+    command.add_argument("customer")
+    command = commands.add_parser("login", help="check a username and password (prompted)")
+    command.add_argument("role", choices=("customer", "employee"))
+    command.add_argument("username")
+    for name, kind in (("import-payments", "payment"), ("import-customers", "customer")):
+        command = commands.add_parser(name, help=f"apply a CSV or JSON-lines {kind} file")
+        command.add_argument("path")
+        command.add_argument("--report", help="result CSV (default <path>.report.csv)")
+    command = commands.add_parser("serve", help="run the JSON-over-HTTP API")
+    command.add_argument("--host", default=os.getenv('API_HOST', '127.0.0.1'))
+    command.add_argument("--port", type=int, default=int(os.getenv('API_PORT', 8080)))
+    command.add_argument("--max-concurrency", type=int, help="requests handled at once before answering 503")
+    command.add_argument("--workers", type=int, help="database threads (default DB_POOL_SIZE)")
+    args = parser.parse_args()
+
+    service = BankService.open(warm_start=not args.full_load)
+    try:
+        run(service, args)
+    except ServiceError as e:
+        print(str(e))
+        return 1
+    finally:
+        if args.metrics and service.db.metrics is not None:
+            print(metrics.format_report(service.db.metrics))
+        service.close(save_snapshot=args.command not in READ_ONLY)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
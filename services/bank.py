@@ -0,0 +1,334 @@
+import asyncio
+import uuid
+from datetime import datetime
+import bulk_transfers
+import credentials
+import onboarding
+import snapshot
+from backends import DB_ERRORS
+from db import Database, TransferError, to_money
+from models.employee import Employee
+from models.transaction import Transaction
+from models.activitylog import ActivityLog
+from globals import (customer_objects, account_objects, employee_objects, register_customer, register_account,
+                     register_employee, find_account_by_number, find_customer_by_username, find_employee_by_username,
+                     find_customer_by_account_id)
+
+
+class ServiceError(Exception):
+    """A request the service refused. The message is meant to be shown to the user."""
+
+
+INVALID_CREDENTIALS = "Invalid credentials. Please try again."
+
+
+def is_manager(employee):
+    return employee.position.lower() == "manager"
+
+
+class BankService:
+    """The bank operations behind the Qt windows, as plain method calls.
+
+    Nothing here imports PyQt5, so batch jobs and servers can use it directly.
+    Rejected requests raise ServiceError; database failures propagate as the
+    backend's own errors. Password hashing goes through a CredentialService
+    (the shared process pool unless one is passed in), so methods that hash
+    take tens of milliseconds and belong off the GUI thread.
+    """
+
+    def __init__(self, db, credential_service=None):
+        self.db = db
+        self.credentials = credential_service or credentials.default_service()
+
+    @classmethod
+    def open(cls, warm_start=True):
+        """Connect, bring the schema up to date and fill the registries."""
+        db = Database()
+        db.migrate()
+        if warm_start:
+            snapshot.warm_start(db)
+        else:
+            db.load_data()
+        return cls(db)
+
+    def close(self, save_snapshot=True):
+        """Write out queued history rows, refresh the snapshot and disconnect."""
+        self.db.flush()
+        if save_snapshot and snapshot.enabled():
+            try:
+                snapshot.save_snapshot(self.db)
+            except Exception as e:
+                print(f"Could not write snapshot: {str(e)}")
+        self.db.close()
+
+    # Login
+
+    def login(self, role, username, password):
+        """Check a customer or employee login and upgrade a legacy password hash on success.
+
+        Returns the Customer, or (employee, is_manager) for employees.
+        """
+        user, stored = self._login_user(role, username)
+        if stored is None or not self.credentials.verify(password, stored):
+            raise ServiceError(INVALID_CREDENTIALS)
+        if credentials.needs_rehash(stored):
+            self._upgrade_hash(role, user, self.credentials.hash(password))
+        return self._logged_in(role, user)
+
+    async def login_async(self, role, username, password, executor=None):
+        """login() for event loops: hashing is awaited and the database calls run on `executor`."""
+        loop = asyncio.get_running_loop()
+        user, stored = await loop.run_in_executor(executor, self._login_user, role, username)
+        if stored is None or not await self.credentials.verify_async(password, stored):
+            raise ServiceError(INVALID_CREDENTIALS)
+        if credentials.needs_rehash(stored):
+            new_hash = await self.credentials.hash_async(password)
+            await loop.run_in_executor(executor, self._upgrade_hash, role, user, new_hash)
+        return await loop.run_in_executor(executor, self._logged_in, role, user)
+
+    def login_customer(self, username, password):
+        return self.login("customer", username, password)
+
+    def login_employee(self, username, password):
+        """Returns (employee, is_manager)."""
+        return self.login("employee", username, password)
+
+    def _login_user(self, role, username):
+        # Users restored from a snapshot have no password hash until their first login.
+        if role == "customer":
+            user = find_customer_by_username(username)
+            if user is not None and user.customerPassword is None:
+                user.customerPassword = self.db.fetch_customer_password(user.customerID)
+            return user, user.customerPassword if user else None
+        if role == "employee":
+            user = find_employee_by_username(username)
+            if user is not None and user.employeePassword is None:
+                user.employeePassword = self.db.fetch_employee_password(user.employeeID)
+            return user, user.employeePassword if user else None
+        raise ServiceError(f"Unknown role: {role}")
+
+    def _upgrade_hash(self, role, user, new_hash):
+        # A failed upgrade must not fail the login; it is retried next time.
+        try:
+            if role == "customer":
+                self.db.update_customer_password(str(user.customerAccountID), new_hash)
+            else:
+                self.db.update_employee_password(user.employeeID, new_hash)
+        except DB_ERRORS as e:
+            print(f"Could not upgrade password hash: {str(e)}")
+
+    def _logged_in(self, role, user):
+        if role == "employee":
+            self._record("Employee", user.employeeID, "Login")
+            return user, is_manager(user)
+        if not user.customerAccountID or str(user.customerAccountID) not in account_objects:
+            raise ServiceError("Invalid customer account data.")
+        self._record("Customer", user.customerID, "Login")
+        return user
+
+    # Accounts and money
+
+    def account(self, account_id):
+        """The Account with this ID, or None."""
+        return account_objects.get(str(account_id))
+
+    def balance(self, account_id):
+        account = self.account(account_id)
+        if account is None:
+            raise ServiceError("Account number not found.")
+        return account.Balance
+
+    def transfer(self, from_account_id, to_account_id, amount):
+        """Move money between two accounts. Returns the recorded Transaction (or None)."""
+        from_account_id, to_account_id = str(from_account_id), str(to_account_id)
+        if from_account_id not in account_objects:
+            raise ServiceError("Invalid or non-existent source account number.")
+        if to_account_id not in account_objects:
+            raise ServiceError("Invalid or non-existent target account number.")
+        if from_account_id == to_account_id:
+            raise ServiceError("Cannot transfer to the same account.")
+        amount = self._amount(amount)
+        if account_objects[from_account_id].Balance < amount:
+            raise ServiceError("Insufficient funds in source account.")
+        try:
+            transaction = self.db.transfer_funds(from_account_id, to_account_id, amount)
+        except TransferError as e:
+            raise ServiceError(str(e))
+        if transaction is not None:
+            self._record("Customer", transaction.customerID, "Transfer", amount)
+        return transaction
+
+    def transfer_to_number(self, from_account_id, to_account_number, amount):
+        """Like transfer(), with the destination given by its account number."""
+        if not to_account_number:
+            raise ServiceError("Please enter a destination account number!")
+        to_account = find_account_by_number(to_account_number)
+        if to_account is None:
+            raise ServiceError("Invalid destination account number!")
+        return self.transfer(from_account_id, to_account.AccountID, amount)
+
+    def deposit(self, account_id, amount):
+        """Returns the new balance."""
+        account = self._existing_account(account_id)
+        amount = self._amount(amount)
+        self._adjust(account, amount)
+        self._record_movement(account, "Deposit", amount)
+        return account.Balance
+
+    def withdraw(self, account_id, amount):
+        """Returns the new balance."""
+        account = self._existing_account(account_id)
+        amount = self._amount(amount)
+        if account.Balance < amount:
+            raise ServiceError("Insufficient funds.")
+        self._adjust(account, -amount)
+        self._record_movement(account, "Withdrawal", amount)
+        return account.Balance
+
+    def transactions(self, customer_id):
+        return self.db.history.transactions_for(str(customer_id))
+
+    def transaction_page(self, customer_id, before=None, limit=None):
+        """Newest-first page of a customer's transactions; pass the last row's (date, id) as `before` for the next."""
+        return self.db.history.transaction_page(str(customer_id), before, limit)
+
+    def import_payments(self, path, report_path=None):
+        """Apply a payment file. Returns the count per result status."""
+        results = bulk_transfers.import_payment_file(self.db, path)
+        if report_path:
+            bulk_transfers.write_report(results, report_path)
+        return bulk_transfers.summarize(results)
+
+    def _existing_account(self, account_id):
+        account = self.account(account_id)
+        if account is None:
+            raise ServiceError("Invalid account number.")
+        return account
+
+    def _amount(self, amount):
+        try:
+            amount = to_money(amount)
+        except Exception:
+            raise ServiceError("Invalid amount!")
+        # NaN survives quantize() and would raise InvalidOperation at the comparison below.
+        if not amount.is_finite():
+            raise ServiceError("Invalid amount!")
+        if amount <= 0:
+            raise ServiceError("Amount must be positive!")
+        return amount
+
+    def _adjust(self, account, delta):
+        try:
+            self.db.adjust_balance(account.AccountID, delta)
+        except TransferError as e:
+            raise ServiceError(str(e))
+
+    # History rows go through the write-behind journal (DB_WRITE_BEHIND). The
+    # balance change has already been committed, so a failed history write
+    # is reported but does not fail the operation.
+
+    def _record_movement(self, account, transaction_type, amount):
+        owner = find_customer_by_account_id(account.AccountID)
+        if owner is None:
+            return
+        try:
+            self.db.save_transaction(Transaction(str(uuid.uuid4()), transaction_type, amount,
+                                                 datetime.now().replace(microsecond=0), owner.customerID))
+        except DB_ERRORS as e:
+            print(f"Could not record {transaction_type.lower()}: {str(e)}")
+        self._record("Customer", owner.customerID, transaction_type, amount)
+
+    def _record(self, user_type, user_id, action_type, amount=None):
+        try:
+            self.db.save_activity_log(ActivityLog(str(uuid.uuid4()), user_type, str(user_id), action_type, amount,
+                                                  datetime.now().replace(microsecond=0)))
+        except DB_ERRORS as e:
+            print(f"Could not record activity: {str(e)}")
+
+    # Customers and employees
+
+    def create_customer(self, name, national_id, username, password, balance, email, account_type, expiry_date, pin):
+        """Validate the fields, then save a new customer with an account and debit card and register them."""
+        error, balance = onboarding.validate_customer_fields(name, national_id, username, password, balance, email,
+                                                             expiry_date, pin)
+        if error:
+            raise ServiceError(error)
+        if account_type not in onboarding.ACCOUNT_TYPES:
+            raise ServiceError("Error: Invalid account type!")
+        try:
+            customer_id, account_id, card_number = self.db.ids.new_customer_ids()
+        except ValueError as e:
+            raise ServiceError(str(e))
+        customer, account, debit_card = onboarding.build_customer(customer_id, account_id, card_number, name, national_id,
+                                                                  username, self.credentials.hash(password), balance, email,
+                                                                  account_type, expiry_date, pin)
+        self.db.save_new_customer(customer, account, debit_card)
+        register_account(account)
+        register_customer(customer)
+        return customer
+
+    def import_customers(self, path, report_path=None):
+        """Onboard a customer file. Returns the count per result status."""
+        results = onboarding.import_customer_file(self.db, path)
+        if report_path:
+            onboarding.write_report(results, report_path)
+        return bulk_transfers.summarize(results)
+
+    def create_employee(self, name, national_id, username, password, position, email, phone):
+        """Validate the fields, then save and register a new employee."""
+        if not all([name, national_id, username, password, position]):
+            raise ServiceError("Please fill all required fields!")
+        if len(national_id) != 14 or not national_id.isdigit():
+            raise ServiceError("National ID must be exactly 14 digits!")
+        if find_employee_by_username(username):
+            raise ServiceError("Username already exists!")
+        if not email or "@" not in email or "." not in email.split("@")[1]:
+            raise ServiceError("Invalid email format!")
+        if not phone or not phone.isdigit() or len(phone) < 10 or len(phone) > 11:
+            raise ServiceError("Phone must be 10-11 digits!")
+        employee = Employee(name, national_id, str(uuid.uuid4()), position, email, phone)
+        employee.set_credentials(username, self.credentials.hash(password))
+        self.db.save_employee(employee)
+        register_employee(employee)
+        return employee
+
+    # Manager operations
+
+    def change_employee_username(self, employee_id, new_username):
+        if employee_id not in employee_objects:
+            raise ServiceError("Invalid or non-existent employee ID.")
+        if not new_username or find_employee_by_username(new_username):
+            raise ServiceError("Invalid or existing username.")
+        self.db.update_employee_username(employee_id, new_username)
+
+    def change_employee_password(self, employee_id, new_password):
+        if employee_id not in employee_objects:
+            raise ServiceError("Invalid or non-existent employee ID.")
+        if not new_password:
+            raise ServiceError("Password cannot be empty.")
+        self.db.update_employee_password(employee_id, self.credentials.hash(new_password))
+        self._record("Employee", employee_id, "ChangePassword")
+
+    def change_customer_username(self, account_id, new_username):
+        self._account_owner(account_id)
+        if not new_username or find_customer_by_username(new_username):
+            raise ServiceError("Invalid or existing username.")
+        self.db.update_customer_username(account_id, new_username)
+
+    def change_customer_password(self, account_id, new_password):
+        customer = self._account_owner(account_id)
+        if not new_password:
+            raise ServiceError("Password cannot be empty.")
+        self.db.update_customer_password(account_id, self.credentials.hash(new_password))
+        self._record("Customer", customer.customerID, "ChangePassword")
+
+    def _account_owner(self, account_id):
+        if account_id not in account_objects:
+            raise ServiceError("Invalid or non-existent account number.")
+        customer = find_customer_by_account_id(account_id)
+        if not customer:
+            raise ServiceError("Customer not found.")
+        return customer
+
+    def summary(self):
+        return {"customers": len(customer_objects), "accounts": len(account_objects), "employees": len(employee_objects)}
@@ -0,0 +1,370 @@
+import asyncio
+import hmac
+import ipaddress
+import json
+import os
+import re
+import secrets
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from backends import DB_ERRORS
+from metrics import LatencyHistogram
+from models.fields import format_datetime
+from services.bank import ServiceError
+
+MAX_BODY = 64 * 1024
+MAX_PAGE = 1000
+MAX_HEADER = 16 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Session:
+    """Who a request acts for: a logged-in customer or employee, or the operator holding API_TOKEN."""
+
+    def __init__(self, role, user_id=None, account_id=None, manager=False, expires=None):
+        self.role = role
+        self.user_id = user_id
+        self.account_id = account_id
+        self.manager = manager
+        self.expires = expires
+
+
+OPERATOR = Session("operator", manager=True)
+
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+
+def money(value):
+    return f"{value:.2f}"
+
+
+def transaction_json(transaction):
+    date = transaction.transactionDate
+    return {
+        "id": transaction.transactionID,
+        "type": transaction.transactionType,
+        "amount": money(transaction.amount),
+        "date": date.isoformat(" ") if hasattr(date, "isoformat") else date,
+        "customer": str(transaction.customerID),
+    }
+
+
+class BankApi:
+    """JSON-over-HTTP front end for a BankService, on plain asyncio streams.
+
+    Balance lookups are answered from the registries on the event loop; every
+    `sync_seconds` the registries pick up rows other processes changed
+    (Database.sync_changes). Everything that touches the database runs on a
+    thread pool the size of the connection pool, so each worker holds at most
+    one connection. At most
+    `max_concurrency` requests are handled at once; beyond that the server
+    answers 503 straight away instead of queueing.
+
+    Every endpoint except /login and /health needs an "Authorization: Bearer
+    <token>" header. /login hands out a session token: a customer's session
+    may only use their own account and history and cannot deposit, an
+    employee's may use any account, and /metrics needs a manager. The operator `token` (API_TOKEN)
+    is allowed everything.
+    """
+
+    def __init__(self, service, max_concurrency=None, workers=None, token=None, session_seconds=None, sync_seconds=None):
+        self.service = service
+        self.max_concurrency = max_concurrency or int(os.getenv('API_MAX_CONCURRENCY', 256))
+        self.workers = workers or max(1, service.db.pool_size)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="api-db")
+        self.token = token if token is not None else os.getenv('API_TOKEN')
+        self.session_seconds = session_seconds or int(os.getenv('API_SESSION_SECONDS', 900))
+        self.sync_seconds = sync_seconds if sync_seconds is not None else float(os.getenv('API_SYNC_SECONDS', 5))
+        # session token -> Session
+        self.sessions = {}
+        self.in_flight = 0
+        self.rejected = 0
+        self.started = time.time()
+        self.metrics = {}
+        # (method, pattern, endpoint name, handler, runs on the thread pool,
+        # needs a session); coroutine handlers are awaited on the event loop.
+        self.routes = [
+            ("POST", re.compile(r"/login"), "login", self.login, False, False),
+            ("POST", re.compile(r"/logout"), "logout", self.logout, False, True),
+            ("GET", re.compile(r"/accounts/([^/]+)/balance"), "balance", self.balance, False, True),
+            ("POST", re.compile(r"/accounts/([^/]+)/deposit"), "deposit", self.deposit, True, True),
+            ("POST", re.compile(r"/accounts/([^/]+)/withdraw"), "withdraw", self.withdraw, True, True),
+            ("POST", re.compile(r"/transfers"), "transfer", self.transfer, True, True),
+            ("GET", re.compile(r"/customers/([^/]+)/transactions"), "history", self.history, True, True),
+            ("GET", re.compile(r"/metrics"), "metrics", self.metrics_report, False, True),
+            ("GET", re.compile(r"/health"), "health", lambda session, query, body: {"status": "ok"}, False, False),
+        ]
+
+    # Sessions
+
+    def authenticate(self, headers):
+        """The Session for a request's bearer token, or None."""
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        if self.token and hmac.compare_digest(token, self.token):
+            return OPERATOR
+        session = self.sessions.get(token)
+        if session is None or session.expires < time.time():
+            self.sessions.pop(token, None)
+            return None
+        return session
+
+    def open_session(self, session):
+        now = time.time()
+        self.sessions = {token: s for token, s in self.sessions.items() if s.expires >= now}
+        session.expires = now + self.session_seconds
+        token = secrets.token_urlsafe(32)
+        self.sessions[token] = session
+        return token
+
+    def allow_account(self, session, account_id):
+        if session.role == "customer" and str(account_id) != session.account_id:
+            raise HttpError(403, "Not your account.")
+
+    def allow_staff(self, session, action):
+        if session.role == "customer":
+            raise HttpError(403, f"Only employees may {action}.")
+
+    def allow_customer(self, session, customer_id):
+        if session.role == "customer" and str(customer_id) != session.user_id:
+            raise HttpError(403, "Not your transactions.")
+
+    # Endpoints
+
+    async def login(self, session, query, body):
+        # Password checks run in the credential process pool, not on a database thread.
+        role = str(self.field(body, "role")).lower()
+        result = await self.service.login_async(role, str(self.field(body, "username")), str(self.field(body, "password")),
+                                                self.executor)
+        if role == "employee":
+            employee, manager = result
+            token = self.open_session(Session(role, str(employee.employeeID), manager=manager))
+            return {"role": role, "employee": str(employee.employeeID), "manager": manager, "token": token,
+                    "expires_in": self.session_seconds}
+        token = self.open_session(Session(role, str(result.customerID), str(result.customerAccountID)))
+        return {"role": role, "customer": str(result.customerID), "account": str(result.customerAccountID),
+                "token": token, "expires_in": self.session_seconds}
+
+    def logout(self, session, query, body):
+        self.sessions = {token: s for token, s in self.sessions.items() if s is not session}
+        return {"status": "logged out"}
+
+    def balance(self, session, query, body, account_id):
+        self.allow_account(session, account_id)
+        account = self.service.account(account_id)
+        if account is None:
+            raise HttpError(404, "Account number not found.")
+        return {"account": str(account.AccountID), "balance": money(account.Balance), "type": account.AccountType}
+
+    def deposit(self, session, query, body, account_id):
+        self.allow_staff(session, "deposit")
+        return {"account": account_id, "balance": money(self.service.deposit(account_id, self.field(body, "amount")))}
+
+    def withdraw(self, session, query, body, account_id):
+        self.allow_account(session, account_id)
+        return {"account": account_id, "balance": money(self.service.withdraw(account_id, self.field(body, "amount")))}
+
+    def transfer(self, session, query, body):
+        from_account = str(self.field(body, "from_account"))
+        self.allow_account(session, from_account)
+        to_account = str(self.field(body, "to_account"))
+        transaction = self.service.transfer(from_account, to_account, self.field(body, "amount"))
+        return {
+            "from_account": from_account,
+            "from_balance": money(self.service.balance(from_account)),
+            "transaction": transaction_json(transaction) if transaction is not None else None,
+        }
+
+    def history(self, session, query, body, customer_id):
+        self.allow_customer(session, customer_id)
+        # Keyset paging: "next" is passed back as ?before= to get the following page.
+        try:
+            limit = min(max(1, int(query.get("limit", ["100"])[0])), MAX_PAGE)
+        except ValueError:
+            raise HttpError(400, "limit must be a number.")
+        before = None
+        if query.get("before"):
+            date, separator, transaction_id = query["before"][0].rpartition("|")
+            if not separator:
+                raise HttpError(400, "before must be a \"next\" value from an earlier page.")
+            before = (date, transaction_id)
+        transactions = self.service.transaction_page(customer_id, before, limit)
+        last = transactions[-1] if len(transactions) == limit else None
+        return {
+            "customer": customer_id,
+            "transactions": [transaction_json(t) for t in transactions],
+            "next": f"{format_datetime(last.transactionDate)}|{last.transactionID}" if last else None,
+        }
+
+    def metrics_report(self, session, query, body):
+        if not session.manager:
+            raise HttpError(403, "Managers only.")
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "endpoints": {name: histogram.stats() for name, histogram in sorted(self.metrics.items())},
+            "database": self.service.db.metrics.report() if self.service.db.metrics is not None else None,
+        }
+
+    def field(self, body, name):
+        if not isinstance(body, dict) or body.get(name) in (None, ""):
+            raise HttpError(400, f"Missing field: {name}")
+        return body[name]
+
+    # Dispatch
+
+    async def dispatch(self, method, target, headers, raw_body):
+        """Returns (status, payload, endpoint name)."""
+        url = urlsplit(target)
+        for route_method, pattern, name, handler, blocking, needs_session in self.routes:
+            match = pattern.fullmatch(url.path.rstrip("/") or "/")
+            if match is None:
+                continue
+            if method != route_method:
+                return 405, {"error": f"Use {route_method} for {url.path}"}, name
+            session = self.authenticate(headers) if needs_session else None
+            if needs_session and session is None:
+                return 401, {"error": "Missing, invalid or expired token; log in first."}, name
+            try:
+                body = json.loads(raw_body) if raw_body else {}
+            except ValueError:
+                return 400, {"error": "Body must be JSON."}, name
+            args = (session, parse_qs(url.query), body) + match.groups()
+            try:
+                if blocking:
+                    result = await asyncio.get_running_loop().run_in_executor(self.executor, handler, *args)
+                elif asyncio.iscoroutinefunction(handler):
+                    result = await handler(*args)
+                else:
+                    result = handler(*args)
+                return 200, result, name
+            except HttpError as e:
+                return e.status, {"error": str(e)}, name
+            except ServiceError as e:
+                return 400, {"error": str(e)}, name
+            except DB_ERRORS as e:
+                print(f"Database error in {name}: {str(e)}")
+                return 500, {"error": "Database error."}, name
+            except Exception as e:
+                print(f"Error in {name}: {str(e)}")
+                traceback.print_exc()
+                return 500, {"error": "Internal error."}, name
+        return 404, {"error": f"No endpoint {url.path}"}, "not_found"
+
+    async def sync_forever(self):
+        """Merge rows changed by other processes into the registries every sync_seconds."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.sync_seconds)
+            try:
+                await loop.run_in_executor(self.executor, self.service.db.sync_changes)
+            except DB_ERRORS as e:
+                print(f"Error syncing changes: {str(e)}")
+
+    async def handle_connection(self, reader, writer):
+        # HTTP/1.1 with keep-alive: one connection carries many requests.
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, 413, {"error": "Headers too large."}, False)
+                    return
+                started = time.perf_counter()
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "Malformed request line."}, False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        headers[key.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "Invalid Content-Length."}, False)
+                    return
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {"error": "Body too large."}, False)
+                    return
+                raw_body = await reader.readexactly(length) if length else b""
+
+                if self.in_flight >= self.max_concurrency:
+                    self.rejected += 1
+                    status, payload, name = 503, {"error": "Server busy, try again."}, "rejected"
+                else:
+                    self.in_flight += 1
+                    try:
+                        status, payload, name = await self.dispatch(method.upper(), target, headers, raw_body)
+                    finally:
+                        self.in_flight -= 1
+                await self.respond(writer, status, payload, keep_alive)
+                histogram = self.metrics.get(name)
+                if histogram is None:
+                    histogram = self.metrics[name] = LatencyHistogram()
+                histogram.observe((time.perf_counter() - started) * 1000, status >= 400)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+                     f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        if not self.token and not is_loopback(host):
+            raise ValueError(f"Refusing to listen on {host} without API_TOKEN; set it or bind to 127.0.0.1.")
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER,
+                                            backlog=self.max_concurrency)
+        print(f"Bank API listening on http://{host}:{port} ({self.workers} database workers, "
+              f"max {self.max_concurrency} concurrent requests)")
+        sync = asyncio.create_task(self.sync_forever()) if self.sync_seconds > 0 else None
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if sync is not None:
+                sync.cancel()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def run(service, host="127.0.0.1", port=8080, max_concurrency=None, workers=None):
+    api = BankApi(service, max_concurrency, workers)
+    try:
+        asyncio.run(api.serve(host, port))
+    except KeyboardInterrupt:
+        print("Bank API stopped")
+    except ValueError as e:
+        raise SystemExit(f"Error: {str(e)}")
+    finally:
+        api.close()
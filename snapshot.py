@@ -0,0 +1,192 @@
+import base64
+import json
+import os
+import time
+import traceback
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from columnar import TransactionColumns
+from models.customer import Customer
+from models.employee import Employee
+from models.debitcard import DebitCard
+from models.account import Account
+from globals import (customer_objects, account_objects, employee_objects, clear_all, copy_of,
+                     register_customer, register_account, register_employee)
+
+MAGIC = b"BANKSNP2"
+VERSION = 2
+# Tables held entirely in the registries; their row counts must match after the delta sync.
+COUNTED_TABLES = (("customer", customer_objects), ("account", account_objects), ("employee", employee_objects))
+
+
+def snapshot_path():
+    return os.getenv('SNAPSHOT_PATH', 'bank_system.snapshot')
+
+
+def enabled():
+    return os.getenv('DB_SNAPSHOT', '1') == '1'
+
+
+def _encode(value):
+    # JSON has no dates, decimals or arrays; tag them so _decode can rebuild them.
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"$decimal": str(value)}
+    if hasattr(value, "dtype") and hasattr(value, "tobytes"):
+        return {"$array": value.dtype.str, "data": base64.b64encode(value.tobytes()).decode("ascii")}
+    raise TypeError(f"Cannot store {type(value).__name__} in a snapshot")
+
+
+def _decode(obj):
+    if "$datetime" in obj:
+        return datetime.fromisoformat(obj["$datetime"])
+    if "$date" in obj:
+        return date.fromisoformat(obj["$date"])
+    if "$decimal" in obj:
+        return Decimal(obj["$decimal"])
+    if "$array" in obj:
+        import numpy
+        return numpy.frombuffer(base64.b64decode(obj["data"]), dtype=obj["$array"]).copy()
+    return obj
+
+
+def save_snapshot(db, path=None):
+    """Write the registries (and the report column store) as compressed JSON.
+
+    Rows are stored as lists in constructor order. Password hashes and card
+    PINs are left out; they are read from the database when needed (see
+    BankService._login_user). The file is created with mode 0600 next to the
+    target and renamed over it, so a crash never leaves a torn snapshot
+    behind. Returns the file size in bytes.
+    """
+    path = path or snapshot_path()
+    started = time.perf_counter()
+    customers = copy_of(customer_objects).values()
+    state = {
+        "version": VERSION,
+        "source": db.backend.source,
+        "created": datetime.now(),
+        "high_water": dict(db.high_water),
+        "accounts": [(a.AccountID, a.AccountType, a.Balance, a.AccountNumber) for a in copy_of(account_objects).values()],
+        "customers": [(c.customerUserName, c.nationalID, c.customerEmail, c.customerAccountID, c.customerID,
+                       c.customerName) for c in customers],
+        "debit_cards": [(d.cardNumber, d.cardExpiryDate, d.cardStatus, d.customerID)
+                        for d in (c.debit_card for c in customers) if d is not None],
+        "employees": [(e.employeeName, e.nationalID, e.employeeID, e.position, e.employeeEmail, e.employeePhone,
+                       e.employeeUserName) for e in copy_of(employee_objects).values()],
+        "analytics": db.analytics.state() if db.analytics is not None else None,
+    }
+    data = zlib.compress(json.dumps(state, default=_encode, separators=(",", ":")).encode("utf-8"), 1)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600), "wb") as f:
+        f.write(MAGIC)
+        f.write(data)
+    os.replace(tmp_path, path)
+    print(f"Snapshot written to {path}: {len(data) / 1024:.0f} KiB in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return len(data)
+
+
+def read_snapshot(path=None):
+    """Return the snapshot state, or None if the file is missing, unreadable or from another version."""
+    path = path or snapshot_path()
+    try:
+        with open(path, "rb") as f:
+            if os.name == "posix" and os.fstat(f.fileno()).st_mode & 0o022:
+                print(f"Ignoring snapshot {path}: writable by other users")
+                return None
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            state = json.loads(zlib.decompress(f.read()), object_hook=_decode)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Ignoring unreadable snapshot {path}: {str(e)}")
+        return None
+    return state if state.get("version") == VERSION else None
+
+
+def restore(state):
+    clear_all()
+    for row in state["accounts"]:
+        register_account(Account(*row))
+    for username, national_id, email, account_id, customer_id, name in state["customers"]:
+        customer = Customer(username, national_id, None, email, account_id, customer_id, name)
+        account = account_objects.get(str(customer.customerAccountID))
+        if account is not None:
+            customer.link_account(account)
+        register_customer(customer)
+    for card_number, expiry_date, status, customer_id in state["debit_cards"]:
+        customer = customer_objects.get(str(customer_id))
+        if customer is not None:
+            customer.link_debit_card(DebitCard(card_number, None, expiry_date, status, customer_id))
+    for row in state["employees"]:
+        employee = Employee(*row[:6])
+        employee.set_credentials(row[6], None)
+        register_employee(employee)
+
+
+def _usable(db, state):
+    if state is None:
+        return "no snapshot"
+    if state["source"] != db.backend.source:
+        return "snapshot belongs to another database"
+    if not db.has_sync_columns():
+        return "tables have no updatedAt column"
+    for table, high_water in state["high_water"].items():
+        current = db._current_high_water(table)
+        # The database went back in time (restored from a backup, say).
+        if high_water is not None and (current is None or current < high_water):
+            return f"{table} is older than the snapshot"
+    return None
+
+
+def warm_start(db, path=None):
+    """Fill the registries from the snapshot plus a delta sync, or fall back to a full load.
+
+    The snapshot is only trusted if it comes from the same database and no
+    table's updatedAt high-water mark went backwards. After the delta sync
+    the customer, account and employee registries must hold exactly as many
+    rows as the tables; otherwise rows were deleted and a full load is done.
+    Returns True when the snapshot was used.
+    """
+    if not enabled():
+        db.load_data()
+        return False
+    started = time.perf_counter()
+    state = read_snapshot(path)
+    try:
+        reason = _usable(db, state)
+        if reason is None:
+            restore(state)
+            if state["analytics"] is not None and db.analytics_enabled:
+                db.analytics = TransactionColumns.from_state(state["analytics"])
+            db.history.clear()
+            db.high_water = dict(state["high_water"])
+            db.sync_changes()
+            counts = db.row_counts([table for table, _ in COUNTED_TABLES])
+            for table, registry in COUNTED_TABLES:
+                if counts[table] != len(registry):
+                    reason = f"{table} has {counts[table]} rows but the snapshot plus changes has {len(registry)}"
+                    break
+    except Exception as e:
+        traceback.print_exc()
+        reason = f"restore failed: {str(e)}"
+    if reason is None:
+        print(f"Warm start from snapshot in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return True
+    print(f"Full load ({reason})")
+    clear_all()
+    db.analytics = None
+    db.high_water = {}
+    db.load_data()
+    try:
+        save_snapshot(db, path)
+    except OSError as e:
+        print(f"Could not write snapshot: {str(e)}")
+    return False
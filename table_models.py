@@ -0,0 +1,224 @@
+import abc
+from PyQt5 import QtCore
+from globals import account_objects
+import workers
+
+
+class _ModelMeta(type(QtCore.QAbstractTableModel), abc.ABCMeta):
+    pass
+
+
+class LazyTableModel(QtCore.QAbstractTableModel, metaclass=_ModelMeta):
+    """Read-only table over a list of model objects.
+
+    Rows are exposed to the view in batches through canFetchMore/fetchMore and
+    cells are formatted on demand, so no per-cell Qt objects are created.
+    Subclasses define `headers` and `values(obj)`.
+    """
+
+    headers = ()
+    batch_size = 500
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._loaded = 0
+        # Set by fetch_all() until the next reset, so later pages are pulled in as they arrive.
+        self._fetching_all = False
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._fetching_all = False
+        self._rows = list(rows)
+        self._loaded = min(self.batch_size, len(self._rows))
+        self.endResetModel()
+
+    def refresh(self):
+        # Cell contents are read live from the objects, so repainting is enough.
+        if self._loaded:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._loaded - 1, len(self.headers) - 1))
+
+    def row_object(self, row):
+        return self._rows[row]
+
+    @abc.abstractmethod
+    def values(self, obj):
+        """Returns the column values for one row object, in `headers` order."""
+
+    def fetch_all(self):
+        """Exposes every row, so filtering and sorting see the whole table and not only the fetched batches."""
+        self._fetching_all = True
+        while self.canFetchMore():
+            self.fetchMore()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._rows)
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.batch_size, len(self._rows) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            value = self.values(self._rows[index.row()])[index.column()]
+            return "" if value is None else str(value)
+        if role == QtCore.Qt.UserRole:
+            # Raw value, used as the sort role by the proxy models.
+            value = self.values(self._rows[index.row()])[index.column()]
+            return value if isinstance(value, (int, float, str)) else str(value)
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+
+class CustomerTableModel(LazyTableModel):
+    headers = ("Customer ID", "Username", "Name", "Account ID", "Balance")
+
+    def values(self, customer):
+        account = account_objects.get(str(customer.customerAccountID))
+        return (customer.customerID, customer.customerUserName, customer.customerName or "N/A",
+                customer.customerAccountID or "None", float(account.Balance) if account else 0)
+
+
+class TransactionTableModel(LazyTableModel):
+    """Transactions, optionally read page by page from the database.
+
+    After set_pages() the view's fetchMore() asks `fetch_page(before)` for the
+    page after the last row, on a pool thread, until a short page comes back.
+    """
+
+    headers = ("Transaction ID", "Type", "Amount", "Date", "Customer ID")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._fetch_page = None
+        self._page_size = 0
+        self._on_error = None
+        self._loading = False
+        # Bumped on every reset so a page requested for an earlier customer is dropped.
+        self._generation = 0
+
+    def set_rows(self, rows):
+        self._generation += 1
+        self._fetch_page = None
+        self._loading = False
+        super().set_rows(rows)
+
+    def set_pages(self, first_page, fetch_page, page_size, on_error=None):
+        self.set_rows(first_page)
+        if len(first_page) >= page_size:
+            self._fetch_page = fetch_page
+            self._page_size = page_size
+            self._on_error = on_error
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        if super().canFetchMore(parent):
+            return True
+        return not parent.isValid() and self._fetch_page is not None and not self._loading
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if super().canFetchMore(parent):
+            super().fetchMore(parent)
+            return
+        if not self.canFetchMore(parent):
+            return
+        self._loading = True
+        last = self._rows[-1]
+        generation = self._generation
+        workers.run_in_background(self._fetch_page, (last.transactionDate, last.transactionID),
+                                  on_success=lambda rows: self._append_page(generation, rows),
+                                  on_error=lambda e: self._page_failed(generation, e))
+
+    def _append_page(self, generation, rows):
+        if generation != self._generation:
+            return
+        self._loading = False
+        if len(rows) < self._page_size:
+            self._fetch_page = None
+        self._rows.extend(rows)
+        super().fetchMore()
+        if self._fetching_all:
+            self.fetch_all()
+
+    def _page_failed(self, generation, e):
+        if generation != self._generation:
+            return
+        # Stop paging; selecting the customer again starts over.
+        self._loading = False
+        self._fetch_page = None
+        if self._on_error is not None:
+            self._on_error(e)
+
+    def values(self, transaction):
+        return (transaction.transactionID, transaction.transactionType, transaction.amount,
+                transaction.transactionDate, transaction.customerID)
+
+
+class ActivityLogTableModel(LazyTableModel):
+    headers = ("Log ID", "User Type", "User ID", "Action Type", "Amount", "Time")
+
+    def values(self, log):
+        return (log.logID, log.userType, log.userID, log.actionType, log.amount, log.logTime)
+
+
+class MetricsTableModel(LazyTableModel):
+    headers = ("Name", "Kind", "Calls", "Errors", "Rows Changed", "Mean ms", "p95 ms", "p99 ms", "Max ms")
+
+    def values(self, row):
+        # (name, "statements" or "operations", stats) from DatabaseMetrics.rows()
+        name, kind, stats = row
+        return (name, kind[:-1], stats["count"], stats["errors"], stats.get("rows", ""), stats["mean_ms"],
+                stats["p95_ms"], stats["p99_ms"], stats["max_ms"])
+
+
+class LazySortFilterProxyModel(QtCore.QSortFilterProxyModel):
+    """Sort/filter proxy that loads every source row before it sorts or filters.
+
+    QSortFilterProxyModel only sees the rows a LazyTableModel has fetched so far,
+    so a search would miss rows that were never scrolled into view.
+    """
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelReset.connect(self._source_reset)
+
+    def _source_reset(self):
+        # New rows arrive one batch at a time again; a sort or filter still in effect needs all of them.
+        if self.sortColumn() >= 0 or self.filterRegExp().pattern():
+            self.sourceModel().fetch_all()
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        if column >= 0:
+            self.sourceModel().fetch_all()
+        super().sort(column, order)
+
+    def setFilterFixedString(self, pattern):
+        if pattern:
+            self.sourceModel().fetch_all()
+        super().setFilterFixedString(pattern)
+
+
+def make_proxy(model, parent=None):
+    proxy = LazySortFilterProxyModel(parent)
+    proxy.setSourceModel(model)
+    proxy.setSortRole(QtCore.Qt.UserRole)
+    proxy.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+    proxy.setFilterKeyColumn(-1)
+    return proxy
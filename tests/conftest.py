@@ -0,0 +1,42 @@
+import os
+import sys
+from decimal import Decimal
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import Database
+from globals import clear_all, register_account, register_customer
+import onboarding
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A migrated Database on a fresh SQLite file, with empty registries."""
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "bank.db"))
+    monkeypatch.setenv("SNAPSHOT_PATH", str(tmp_path / "bank.snapshot"))
+    monkeypatch.setenv("DB_WRITE_BEHIND", "0")
+    monkeypatch.setenv("DB_ANALYTICS", "0")
+    monkeypatch.setenv("DB_METRICS_LOG_SECONDS", "0")
+    monkeypatch.setenv("CREDENTIAL_WORKERS", "0")
+    clear_all()
+    database = Database(backend="sqlite")
+    database.migrate()
+    yield database
+    database.close()
+    clear_all()
+
+
+@pytest.fixture
+def make_customer(db):
+    """Save and register a customer whose account holds `balance`; returns (customer, account)."""
+    def make(username, balance="0.00"):
+        customer_id, account_id, card_number = db.ids.new_customer_ids()
+        customer, account, debit_card = onboarding.build_customer(customer_id, account_id, card_number, "Test Customer",
+                                                                  "12345678901234", username, "hash", Decimal(balance), "",
+                                                                  "Saving", "2030-01-01", "1234")
+        db.save_new_customer(customer, account, debit_card)
+        register_account(account)
+        register_customer(customer)
+        return customer, account
+    return make
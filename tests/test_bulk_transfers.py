@@ -0,0 +1,33 @@
+import json
+from decimal import Decimal
+import bulk_transfers
+
+
+def test_csv_rejects_non_finite_amounts(db, make_customer, tmp_path):
+    _, source = make_customer("payer", "100.00")
+    _, target = make_customer("payee")
+    path = tmp_path / "payments.csv"
+    path.write_text("from_account,to_account,amount\n"
+                    f"{source.AccountID},{target.AccountID},NaN\n"
+                    f"{source.AccountID},{target.AccountID},Infinity\n"
+                    f"{source.AccountID},{target.AccountID},10.00\n")
+    results = bulk_transfers.import_payment_file(db, str(path))
+    assert [(r.line, r.status, r.message) for r in results] == [
+        (2, "rejected", "Invalid amount"), (3, "rejected", "Invalid amount"), (4, "applied", "")]
+    assert source.Balance == Decimal("90.00")
+
+
+def test_jsonl_reports_malformed_lines(db, make_customer, tmp_path):
+    _, source = make_customer("payer", "100.00")
+    _, target = make_customer("payee")
+    path = tmp_path / "payments.jsonl"
+    good = json.dumps({"from_account": str(source.AccountID), "to_account": target.AccountNumber, "amount": "5"})
+    path.write_text("{not json\n[1, 2]\n" + good + "\n")
+    results = bulk_transfers.import_payment_file(db, str(path))
+    assert [r.status for r in results] == ["rejected", "rejected", "applied"]
+    assert results[0].message.startswith("Malformed JSON")
+    assert results[1].message == "Record is not a JSON object"
+    report = tmp_path / "report.csv"
+    bulk_transfers.write_report(results, str(report))
+    assert len(report.read_text().splitlines()) == 4
+    assert target.Balance == Decimal("5.00")
@@ -0,0 +1,68 @@
+from datetime import datetime
+from decimal import Decimal
+import pytest
+
+np = pytest.importorskip("numpy")
+from columnar import TransactionColumns
+from db import Database
+
+ROWS = [
+    ("t1", "Deposit", Decimal("10.00"), datetime(2024, 1, 1, 9), 1),
+    ("t2", "Withdrawal", Decimal("2.50"), datetime(2024, 1, 1, 12), 1),
+    ("t3", "Deposit", Decimal("99.99"), datetime(2024, 1, 2, 8), 2),
+    ("t4", "Transfer", Decimal("40.00"), datetime(2024, 2, 3, 8), 3),
+]
+
+
+def test_merge_rows_skips_stored_ids():
+    columns = TransactionColumns(capacity=2)
+    columns.append_rows(ROWS[:3])
+    columns.merge_rows([ROWS[1], ROWS[2], ROWS[3]])
+    assert len(columns) == 4
+    assert sorted(row[0] for row in columns.largest(10)) == ["t1", "t2", "t3", "t4"]
+    assert columns.transaction_ids.dtype == np.dtype("S36")
+
+
+def test_aggregations():
+    columns = TransactionColumns()
+    columns.append_rows(ROWS)
+    assert columns.totals_by_customer() == {"1": (12.5, 2), "2": (99.99, 1), "3": (40.0, 1)}
+    assert columns.totals_by_customer("Deposit") == {"1": (10.0, 1), "2": (99.99, 1)}
+    assert columns.totals_by_type(start=datetime(2024, 1, 2)) == {"Deposit": (99.99, 1), "Transfer": (40.0, 1)}
+    assert columns.top_customers(2) == [("2", 99.99, 1), ("3", 40.0, 1)]
+    assert columns.volume_by_period("M") == [(datetime(2024, 1, 1).date(), 112.49, 3), (datetime(2024, 2, 1).date(), 40.0, 1)]
+
+
+def test_largest():
+    columns = TransactionColumns()
+    columns.append_rows(ROWS)
+    assert columns.largest(2) == [("t3", "Deposit", 99.99, datetime(2024, 1, 2, 8), "2"),
+                                  ("t4", "Transfer", 40.0, datetime(2024, 2, 3, 8), "3")]
+    assert [row[0] for row in columns.largest(5, "Deposit")] == ["t3", "t1"]
+
+
+def test_state_round_trip():
+    columns = TransactionColumns()
+    columns.append_rows(ROWS)
+    restored = TransactionColumns.from_state(columns.state())
+    assert restored.largest(4) == columns.largest(4)
+    restored.merge_rows(ROWS)
+    assert len(restored) == 4
+
+
+def test_store_is_built_on_the_first_report(db, make_customer, monkeypatch):
+    customer, account = make_customer("reports", "50.00")
+    db.transfer_funds(account.AccountID, make_customer("payee")[1].AccountID, "5.00")
+    monkeypatch.setenv("DB_ANALYTICS", "1")
+    reports = Database(backend="sqlite")
+    try:
+        reports.load_data()
+        assert reports.analytics is None
+        columns = reports.transaction_columns()
+        assert len(columns) == 1
+        assert columns.totals_by_type() == {"Transfer": (5.0, 1)}
+        _, other = make_customer("other")
+        reports.transfer_funds(account.AccountID, other.AccountID, "1.00")
+        assert len(reports.transaction_columns()) == 2
+    finally:
+        reports.close()
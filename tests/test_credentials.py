@@ -0,0 +1,61 @@
+import asyncio
+import hashlib
+import pytest
+import credentials
+from services import BankService, ServiceError
+
+
+def test_hash_verifies_only_the_right_password():
+    stored = credentials.hash_password("correct horse")
+    assert stored.startswith("scrypt$")
+    assert credentials.verify_password("correct horse", stored)
+    assert not credentials.verify_password("correct horsf", stored)
+    assert not credentials.verify_password("", stored)
+    assert not credentials.verify_password(None, stored)
+
+
+def test_hashes_are_salted():
+    assert credentials.hash_password("same") != credentials.hash_password("same")
+
+
+def test_legacy_md5_hashes_still_verify():
+    once = hashlib.md5(b"old password").hexdigest()
+    assert credentials.verify_password("old password", once)
+    # Employee passwords were hashed twice by the old save_employee.
+    assert credentials.verify_password("old password", hashlib.md5(once.encode()).hexdigest())
+    assert not credentials.verify_password("wrong", once)
+
+
+def test_needs_rehash():
+    assert credentials.needs_rehash(hashlib.md5(b"pw").hexdigest())
+    assert not credentials.needs_rehash(credentials.hash_password("pw"))
+    weak = credentials.hash_password("pw").replace(f"scrypt${credentials.SCRYPT_N}$", f"scrypt${2 ** 10}$", 1)
+    assert credentials.needs_rehash(weak)
+    assert not credentials.needs_rehash(None)
+
+
+def test_worker_pool_hashes_and_verifies():
+    service = credentials.CredentialService(workers=1)
+    try:
+        first, second = service.hash_many(["one", "two"])
+        assert service.verify("one", first) and service.verify("two", second)
+        assert not service.verify("two", first)
+        assert asyncio.run(service.verify_async("one", first))
+    finally:
+        service.close()
+
+
+def test_login_upgrades_a_legacy_md5_hash(db, make_customer):
+    customer, account = make_customer("legacy_user")
+    legacy = hashlib.md5(b"letmein").hexdigest()
+    db.update_customer_password(str(account.AccountID), legacy)
+    service = BankService(db, credential_service=credentials.CredentialService(workers=0))
+    with pytest.raises(ServiceError):
+        service.login_customer("legacy_user", "wrong")
+    assert db.query_one("SELECT customerPassword FROM customer WHERE customerID = %s", (customer.customerID,))[0] == legacy
+
+    assert service.login_customer("legacy_user", "letmein") is customer
+    stored = db.query_one("SELECT customerPassword FROM customer WHERE customerID = %s", (customer.customerID,))[0]
+    assert stored.startswith("scrypt$") and not credentials.needs_rehash(stored)
+    assert customer.customerPassword == stored
+    assert service.login_customer("legacy_user", "letmein") is customer
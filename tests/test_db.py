@@ -0,0 +1,102 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from backends import DB_ERRORS
+from db import TransferError
+from models.transaction import Transaction
+
+
+def stored_balance(db, account_id):
+    return db.query_one("SELECT Balance FROM account WHERE AccountID = %s", (str(account_id),))[0]
+
+
+def transfer_row(customer, amount):
+    return Transaction(str(uuid.uuid4()), "Transfer", Decimal(amount), datetime(2024, 1, 1), customer.customerID)
+
+
+def test_transfer_moves_money_and_records_it(db, make_customer):
+    customer, source = make_customer("payer", "10.00")
+    _, target = make_customer("payee")
+    transaction = db.transfer_funds(source.AccountID, target.AccountID, "4.00")
+    assert (stored_balance(db, source.AccountID), stored_balance(db, target.AccountID)) == (Decimal("6.00"), Decimal("4.00"))
+    assert (source.Balance, target.Balance) == (Decimal("6.00"), Decimal("4.00"))
+    assert [t.transactionID for t in db.transaction_page(customer.customerID)] == [transaction.transactionID]
+
+
+def test_transfer_of_the_exact_balance_empties_the_account(db, make_customer):
+    _, source = make_customer("payer", "10.00")
+    _, target = make_customer("payee")
+    db.transfer_funds(source.AccountID, target.AccountID, "10.00")
+    assert stored_balance(db, source.AccountID) == Decimal("0.00")
+    assert stored_balance(db, target.AccountID) == Decimal("10.00")
+
+
+def test_overdrawing_transfer_is_rejected(db, make_customer):
+    customer, source = make_customer("payer", "10.00")
+    _, target = make_customer("payee")
+    with pytest.raises(TransferError):
+        db.transfer_funds(source.AccountID, target.AccountID, "10.01")
+    assert (stored_balance(db, source.AccountID), stored_balance(db, target.AccountID)) == (Decimal("10.00"), Decimal("0.00"))
+    assert source.Balance == Decimal("10.00")
+    assert db.transaction_page(customer.customerID) == []
+
+
+@pytest.mark.parametrize("amount", ["0", "-1.00"])
+def test_transfer_needs_a_positive_amount(db, make_customer, amount):
+    _, source = make_customer("payer", "10.00")
+    _, target = make_customer("payee")
+    with pytest.raises(TransferError):
+        db.transfer_funds(source.AccountID, target.AccountID, amount)
+    assert stored_balance(db, source.AccountID) == Decimal("10.00")
+
+
+def test_adjust_balance_withdraws_the_exact_balance(db, make_customer):
+    _, account = make_customer("saver", "5.25")
+    db.adjust_balance(account.AccountID, "-5.25")
+    assert stored_balance(db, account.AccountID) == Decimal("0.00")
+    assert account.Balance == Decimal("0.00")
+
+
+def test_adjust_balance_rejects_an_overdraft(db, make_customer):
+    _, account = make_customer("saver", "5.25")
+    with pytest.raises(TransferError):
+        db.adjust_balance(account.AccountID, "-5.26")
+    assert stored_balance(db, account.AccountID) == Decimal("5.25")
+    assert account.Balance == Decimal("5.25")
+
+
+def test_adjust_balance_rejects_an_unknown_account(db):
+    with pytest.raises(TransferError):
+        db.adjust_balance("999999", "1.00")
+
+
+def test_transfer_batch_applies_every_delta(db, make_customer):
+    customer, source = make_customer("payer", "10.00")
+    _, target = make_customer("payee")
+    rows = [transfer_row(customer, "4.00"), transfer_row(customer, "6.00")]
+    db.apply_transfer_batch({source.AccountID: Decimal("-10.00"), target.AccountID: Decimal("10.00")}, rows)
+    assert (stored_balance(db, source.AccountID), stored_balance(db, target.AccountID)) == (Decimal("0.00"), Decimal("10.00"))
+    assert len(db.transaction_page(customer.customerID)) == 2
+
+
+def test_failed_transfer_batch_rolls_back(db, make_customer):
+    customer, source = make_customer("payer", "10.00")
+    _, target = make_customer("payee", "1.00")
+    _, other = make_customer("other")
+    deltas = {target.AccountID: Decimal("5.00"), other.AccountID: Decimal("5.00"), source.AccountID: Decimal("-10.01")}
+    with pytest.raises(TransferError):
+        db.apply_transfer_batch(deltas, [transfer_row(customer, "10.01")])
+    assert [stored_balance(db, a.AccountID) for a in (source, target, other)] == [Decimal("10.00"), Decimal("1.00"), Decimal("0.00")]
+    assert [a.Balance for a in (source, target, other)] == [Decimal("10.00"), Decimal("1.00"), Decimal("0.00")]
+    assert db.transaction_page(customer.customerID) == []
+
+
+def test_transfer_batch_with_a_bad_row_rolls_back(db, make_customer):
+    customer, source = make_customer("payer", "10.00")
+    _, target = make_customer("payee")
+    row = transfer_row(customer, "1.00")
+    db.write_history_batch([row], ())
+    with pytest.raises(DB_ERRORS):
+        db.apply_transfer_batch({source.AccountID: Decimal("-1.00"), target.AccountID: Decimal("1.00")}, [row])
+    assert (stored_balance(db, source.AccountID), stored_balance(db, target.AccountID)) == (Decimal("10.00"), Decimal("0.00"))
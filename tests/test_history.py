@@ -0,0 +1,75 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from models.transaction import Transaction
+from services import BankService
+
+
+def save_deposit(db, customer):
+    db.save_transaction(Transaction(str(uuid.uuid4()), "Deposit", Decimal("1.00"), datetime(2024, 1, 1), customer.customerID))
+
+
+def history_of(db, customer):
+    return list(db.history.transactions_for(customer.customerID))
+
+
+def test_history_is_read_on_first_use_and_then_cached(db, make_customer):
+    customer, _ = make_customer("history_cached")
+    save_deposit(db, customer)
+    db.load_data()
+    assert len(db.history) == 0
+    assert len(history_of(db, customer)) == 1
+    assert len(history_of(db, customer)) == 1
+    assert (db.history.misses, db.history.hits) == (1, 1)
+
+
+def test_saving_a_transaction_invalidates_the_customer(db, make_customer):
+    customer, _ = make_customer("history_invalidated")
+    assert history_of(db, customer) == []
+    save_deposit(db, customer)
+    assert len(history_of(db, customer)) == 1
+
+
+def test_cache_keeps_the_most_recently_used_customers(db, make_customer):
+    db.history.capacity = 2
+    first, second, third = (make_customer(f"history_lru{n}")[0] for n in range(3))
+    for customer in (first, second, first, third):
+        history_of(db, customer)
+    assert len(db.history) == 2
+    misses = db.history.misses
+    history_of(db, first)
+    assert db.history.misses == misses
+    history_of(db, second)
+    assert db.history.misses == misses + 1
+
+
+def test_page_fetched_across_an_invalidate_is_not_cached(db, make_customer):
+    customer, account = make_customer("history_race", "10.00")
+    history = db.history
+    fetch = db.transaction_page
+
+    def racing_fetch(customer_id, before=None, limit=100):
+        rows = fetch(customer_id, before, limit)
+        history.invalidate(customer_id)
+        return rows
+
+    db.transaction_page = racing_fetch
+    history.transaction_page(customer.customerID)
+    db.transaction_page = fetch
+    assert len(history) == 0
+    history.transaction_page(customer.customerID)
+    assert len(history) == 1
+
+
+def test_transactions_for_reads_every_page(db, make_customer):
+    customer, account = make_customer("history_pages", "10.00")
+    service = BankService(db, credential_service=object())
+    for _ in range(5):
+        service.deposit(account.AccountID, "1.00")
+    db.history.page_size = 2
+    db.history.clear()
+    transactions = list(db.history.transactions_for(customer.customerID))
+    assert len(transactions) == 5
+    assert len({t.transactionID for t in transactions}) == 5
+    dates = [t.transactionDate for t in transactions]
+    assert dates == sorted(dates, reverse=True)
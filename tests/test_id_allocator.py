@@ -0,0 +1,57 @@
+import threading
+import pytest
+from id_allocator import IdAllocator, account_number, card_number, luhn_valid
+
+
+def test_ids_are_consecutive_within_a_block(db):
+    ids = IdAllocator(db, block_size=10)
+    first = ids.next_id("customer")
+    assert [ids.next_id("customer") for _ in range(3)] == [first + 1, first + 2, first + 3]
+
+
+def test_allocators_sharing_a_database_never_collide(db):
+    first, second = IdAllocator(db, block_size=5), IdAllocator(db, block_size=5)
+    taken = [first.next_id("account") for _ in range(12)] + [second.next_id("account") for _ in range(12)]
+    taken += first.take("account", 7) + second.take("account", 3)
+    assert len(set(taken)) == len(taken)
+
+
+def test_threads_never_get_the_same_id(db):
+    ids = IdAllocator(db, block_size=7)
+    taken = []
+
+    def work():
+        taken.extend(ids.next_id("card") for _ in range(50))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(taken)) == 200
+
+
+def test_large_take_gets_its_own_block(db):
+    ids = IdAllocator(db, block_size=5)
+    block = ids.take("customer", 20)
+    assert block == list(range(block[0], block[0] + 20))
+    assert ids.next_id("customer") not in block
+
+
+def test_exhausted_sequence_is_an_error(db):
+    with db.transaction() as cursor:
+        cursor.execute("UPDATE id_sequence SET nextValue = %s WHERE name = 'customer'", (2 ** 31 - 3,))
+    with pytest.raises(ValueError):
+        IdAllocator(db, block_size=5).next_id("customer")
+
+
+def test_unknown_sequence_is_an_error(db):
+    with pytest.raises(ValueError):
+        IdAllocator(db).next_id("nothing")
+
+
+def test_numbers_carry_a_valid_check_digit():
+    assert luhn_valid("79927398713")
+    assert not luhn_valid("79927398710")
+    assert len(account_number(42)) == 16 and luhn_valid(account_number(42))
+    assert len(card_number(42)) == 16 and luhn_valid(card_number(42))
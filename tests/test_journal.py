@@ -0,0 +1,48 @@
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from journal import WriteBehindJournal
+from models.activitylog import ActivityLog
+from services import BankService
+
+
+def activity_log(log_id=None):
+    return ActivityLog(log_id or str(uuid.uuid4()), "Customer", "1", "Login", None, datetime(2024, 1, 1))
+
+
+def test_bad_row_is_dead_lettered_and_the_rest_written(db, tmp_path):
+    journal = WriteBehindJournal(db, interval_ms=60000, dead_letter_path=str(tmp_path / "dead.jsonl"))
+    try:
+        db.write_history_batch((), [activity_log("duplicate")])
+        rows = [activity_log(), activity_log("duplicate"), activity_log()]
+        for row in rows:
+            journal.append_activity_log(row)
+        assert journal.flush() == 2
+        assert journal.depth() == 0
+        assert journal.dead_letter_count == 1
+    finally:
+        journal.close()
+    assert db.row_counts(["activitylog"])["activitylog"] == 3
+    dead = [json.loads(line) for line in (tmp_path / "dead.jsonl").read_text().splitlines()]
+    assert [record["row"]["logID"] for record in dead] == ["duplicate"]
+
+
+def test_close_survives_a_bad_queued_row(db, tmp_path):
+    db.journal = WriteBehindJournal(db, interval_ms=60000, dead_letter_path=str(tmp_path / "dead.jsonl"))
+    db.write_history_batch((), [activity_log("duplicate")])
+    db.journal.append_activity_log(activity_log("duplicate"))
+    db.close()
+    assert db.journal is None
+
+
+def test_service_records_deposits_through_the_journal(db, make_customer, tmp_path):
+    db.journal = WriteBehindJournal(db, interval_ms=60000, dead_letter_path=str(tmp_path / "dead.jsonl"))
+    customer, account = make_customer("depositor")
+    service = BankService(db, credential_service=object())
+    service.deposit(account.AccountID, "25.00")
+    assert db.journal.depth() == 2
+    db.flush()
+    transactions = db.fetch_customer_transactions(customer.customerID)
+    assert [(t.transactionType, t.amount) for t in transactions] == [("Deposit", Decimal("25.00"))]
+    assert [log.actionType for log in db.fetch_activity_logs()] == ["Deposit"]
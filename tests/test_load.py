@@ -0,0 +1,27 @@
+from decimal import Decimal
+from globals import account_objects, customer_objects
+from models.account import Account
+from models.customer import Customer
+from models.debitcard import DebitCard
+
+
+def save_customer(db, customer_id, balance):
+    account = Account(str(customer_id), "Saving", Decimal(balance), f"2000000{customer_id}")
+    db.save_account(account)
+    db.save_customer(Customer(f"loaded{customer_id}", "12345678901234", "hash", "", account.AccountID, customer_id,
+                              "Loaded Customer"))
+    db.save_debit_card(DebitCard(f"5000000000{customer_id}", "1234", "2030-01-01", "Active", customer_id))
+
+
+def test_load_data_reads_every_row_in_small_batches(db):
+    for n in range(5):
+        save_customer(db, 800001 + n, f"{n}.50")
+    db.load_data(batch_size=2)
+    rows = {table: db.load_timings[table][0] for table in ("customer", "account", "debitcard")}
+    assert rows == {"customer": 5, "account": 5, "debitcard": 5}
+    assert len(customer_objects) == len(account_objects) == 5
+    customer = customer_objects["800004"]
+    assert customer.customerUserName == "loaded800004"
+    assert customer.account is account_objects["800004"]
+    assert customer.account.Balance == Decimal("3.50")
+    assert customer.debit_card.cardNumber == "5000000000800004"
@@ -0,0 +1,71 @@
+import time
+import pytest
+import metrics
+from db import Database, TransferError
+
+
+def test_histogram_buckets_and_stats():
+    histogram = metrics.LatencyHistogram()
+    for elapsed_ms in (0.05, 0.3, 0.3, 7, 20000):
+        histogram.observe(elapsed_ms)
+    histogram.observe(1, error=True)
+    stats = histogram.stats()
+    assert (stats["count"], stats["errors"], stats["max_ms"]) == (6, 1, 20000)
+    assert stats["p50_ms"] == 0.5
+    assert stats["p99_ms"] == 20000
+
+
+def test_statement_names():
+    assert metrics.statement_name("UPDATE account SET Balance = 1") == "update account"
+    assert metrics.statement_name("INSERT OR IGNORE INTO `transaction` VALUES (1)") == "insert transaction"
+    assert metrics.statement_name("SELECT COUNT(*)\n FROM customer WHERE x = 1") == "select customer"
+    assert metrics.statement_name("PRAGMA table_info(x)") == "pragma"
+
+
+def test_statements_and_operations_are_timed(db, make_customer):
+    _, account = make_customer("metered", "5.00")
+    db.metrics.reset()
+    db.adjust_balance(account.AccountID, "1.00")
+    with pytest.raises(TransferError):
+        db.adjust_balance(account.AccountID, "-100.00")
+    db.query("SELECT AccountID FROM account")
+    report = db.metrics.report()
+    statement = report["statements"]["adjust_balance"]
+    assert (statement["count"], statement["rows"], statement["errors"]) == (2, 1, 0)
+    assert report["statements"]["select account"]["rows"] == 0
+    operation = report["operations"]["adjust_balance"]
+    assert (operation["count"], operation["errors"]) == (2, 1)
+    assert operation["max_ms"] > 0
+    assert "adjust_balance" in metrics.format_report(db.metrics)
+
+
+def test_failed_statement_counts_as_an_error(db):
+    db.metrics.reset()
+    with pytest.raises(db.backend.errors):
+        db.query("SELECT nothing FROM missing_table")
+    assert db.metrics.report()["statements"]["select missing_table"]["errors"] == 1
+
+
+def test_disabled_metrics_leave_cursors_alone(db, make_customer, monkeypatch):
+    monkeypatch.setenv("DB_METRICS", "0")
+    plain = Database(backend="sqlite")
+    try:
+        assert plain.metrics is None
+        with plain.connection() as conn:
+            cursor = plain.cursor(conn)
+            assert not isinstance(cursor, metrics.InstrumentedCursor)
+            cursor.close()
+        _, account = make_customer("unmetered", "5.00")
+        plain.adjust_balance(account.AccountID, "1.00")
+        assert plain.metrics is None
+    finally:
+        plain.close()
+
+
+def test_logger_prints_periodically(capsys):
+    collected = metrics.DatabaseMetrics()
+    collected.observe_statement("adjust_balance", 1.5, rows=1)
+    logger = metrics.MetricsLogger(collected, 0.02)
+    time.sleep(0.1)
+    logger.close()
+    assert "adjust_balance" in capsys.readouterr().out
@@ -0,0 +1,41 @@
+import migrations
+from db import Database
+
+
+def test_fresh_database_gets_every_migration(db, tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "fresh.db"))
+    fresh = Database(backend="sqlite")
+    try:
+        assert fresh.migrate() == [migration.VERSION for migration in migrations.MIGRATIONS]
+        assert migrations.pending(fresh) == []
+        assert fresh.migrate() == []
+    finally:
+        fresh.close()
+
+
+def test_migrations_are_recorded_once(db):
+    applied = migrations.applied_versions(db)
+    assert sorted(applied) == [migration.VERSION for migration in migrations.MIGRATIONS]
+    assert db.migrate() == []
+    assert migrations.applied_versions(db) == applied
+
+
+def test_indexes_are_in_place(db):
+    with db.transaction() as cursor:
+        indexes = db.backend.indexes(cursor, "transaction")
+    assert indexes["idx_transaction_customer_date"] == (("customerID", "transactionDate", "transactionID"), False)
+
+
+def test_id_sequences_start_above_existing_ids(db):
+    # A database whose customers were created before the id_sequence table.
+    with db.transaction() as cursor:
+        cursor.execute("DROP TABLE id_sequence")
+        cursor.execute("DELETE FROM schema_migrations WHERE version = 5")
+        cursor.execute("INSERT INTO customer (customerID, customerUserName, customerAccountID) VALUES (%s, %s, %s)",
+                       (500, "legacy", "700"))
+        cursor.execute("INSERT INTO account (AccountID, AccountNumber, Balance, AccountType) VALUES (%s, %s, %s, %s)",
+                       ("700", "1000000000007003", 0, "Saving"))
+    assert db.migrate() == [5]
+    assert db.reserve_ids("customer", 1) == 501
+    assert db.reserve_ids("account", 1) == 701
+    assert db.reserve_ids("card", 1) == 1
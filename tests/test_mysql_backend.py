@@ -0,0 +1,29 @@
+import pytest
+
+mysql_connector = pytest.importorskip("mysql.connector")
+from mysql.connector import pooling
+from mysql.connector.connection import MySQLConnection
+from mysql.connector.errors import NotSupportedError
+from backends.mysql_backend import MySQLBackend
+
+
+def checkout(pool, cnx):
+    return pooling.PooledMySQLConnection(pool, cnx)
+
+
+def test_prepared_statements_are_keyed_on_the_physical_connection():
+    # Neither object connects until asked to.
+    pool = pooling.MySQLConnectionPool(pool_name="test_physical", pool_size=1)
+    cnx = MySQLConnection()
+    backend = MySQLBackend.__new__(MySQLBackend)
+    assert backend._physical(checkout(pool, cnx)) is cnx
+    assert backend._physical(checkout(pool, cnx)) is backend._physical(checkout(pool, cnx))
+    assert backend._physical(cnx) is cnx
+
+
+def test_missing_physical_connection_is_an_error():
+    pool = pooling.MySQLConnectionPool(pool_name="test_missing", pool_size=1)
+    conn = checkout(pool, MySQLConnection())
+    del conn._cnx
+    with pytest.raises(NotSupportedError):
+        MySQLBackend.__new__(MySQLBackend)._physical(conn)
@@ -0,0 +1,68 @@
+import csv
+import json
+from decimal import Decimal
+import pytest
+import onboarding
+from globals import find_customer_by_username
+
+
+def customer_record(username):
+    return {"name": "New Customer", "national_id": "12345678901234", "username": username, "password": "pw",
+            "balance": "50", "email": "", "account_type": "Saving", "expiry_date": "2030-01-01", "pin": "4321"}
+
+
+def test_csv_import_creates_valid_customers_and_rejects_the_rest(db, tmp_path):
+    records = [customer_record("alice"), dict(customer_record("bob"), national_id="123"), customer_record("alice"),
+               dict(customer_record("carol"), account_type="Gold")]
+    path = tmp_path / "customers.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+    results = onboarding.import_customer_file(db, str(path))
+    assert [(r.line, r.status) for r in results] == [(2, "created"), (3, "rejected"), (4, "rejected"), (5, "rejected")]
+    assert [r.message for r in results[1:]] == ["Error: National ID must be 14 digits!", "Error: Username already exists!",
+                                               "Error: Invalid account type!"]
+    customer, account, debit_card = results[0].customer
+    assert find_customer_by_username("alice") is customer
+    assert customer.account is account and customer.debit_card is debit_card
+    stored = db.query_one("SELECT customerUserName FROM customer WHERE customerID = %s", (customer.customerID,))
+    assert stored[0] == "alice"
+
+
+def test_registered_username_is_rejected(db, make_customer):
+    existing, _ = make_customer("taken")
+    results = onboarding.onboard_customers(db, [(1, customer_record("taken")), (2, customer_record("free"))])
+    assert [(r.status, r.message) for r in results] == [("rejected", "Error: Username already exists!"), ("created", "")]
+    assert results[1].customer[0].customerID != existing.customerID
+
+
+def test_malformed_jsonl_line_is_rejected_not_fatal(db, tmp_path):
+    path = tmp_path / "customers.jsonl"
+    path.write_text(json.dumps(customer_record("first")) + "\n{broken\n\"text\"\n"
+                    + json.dumps(customer_record("second")) + "\n")
+    results = onboarding.import_customer_file(db, str(path))
+    assert [(r.line, r.status) for r in results] == [(1, "created"), (2, "rejected"), (3, "rejected"), (4, "created")]
+    assert results[1].message.startswith("Malformed JSON")
+    assert find_customer_by_username("first") and find_customer_by_username("second")
+    report = tmp_path / "customers.report.csv"
+    onboarding.write_report(results, str(report))
+    assert len(report.read_text().splitlines()) == 5
+
+
+@pytest.mark.parametrize("balance", ["nan", "inf", "-inf", "10.005", "-1", "abc"])
+def test_invalid_balance_is_rejected_alone(db, balance):
+    records = [customer_record("before"), dict(customer_record("bad"), balance=balance), customer_record("after")]
+    results = onboarding.onboard_customers(db, enumerate(records, 1))
+    assert [r.status for r in results] == ["created", "rejected", "created"]
+    assert results[1].message.startswith("Error: Invalid balance")
+
+
+def test_balance_is_kept_as_exact_decimal(db):
+    results = onboarding.onboard_customers(db, [(1, dict(customer_record("cents"), balance="10.50")),
+                                                (2, dict(customer_record("whole"), balance="10.000"))])
+    balances = [result.customer[1].Balance for result in results]
+    assert balances == [Decimal("10.50"), Decimal("10.00")]
+    assert all(isinstance(balance, Decimal) for balance in balances)
+    account_id = results[0].customer[1].AccountID
+    assert db.query_one("SELECT Balance FROM account WHERE AccountID = %s", (str(account_id),))[0] == Decimal("10.50")
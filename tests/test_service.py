@@ -0,0 +1,174 @@
+import asyncio
+import json
+import re
+from decimal import Decimal
+import pytest
+import credentials
+from services import BankService, ServiceError
+from services.http_api import BankApi
+
+
+@pytest.fixture
+def service(db):
+    return BankService(db, credential_service=object())
+
+
+@pytest.mark.parametrize("amount", ["NaN", "sNaN", "Infinity", "-Infinity", "abc", "0", "-5"])
+def test_invalid_amounts_are_service_errors(service, make_customer, amount):
+    _, account = make_customer("saver", "10.00")
+    with pytest.raises(ServiceError):
+        service.deposit(account.AccountID, amount)
+    with pytest.raises(ServiceError):
+        service.withdraw(account.AccountID, amount)
+
+
+@pytest.mark.parametrize("balance", ["inf", "nan", "10.005"])
+def test_create_customer_rejects_invalid_balance(service, balance):
+    with pytest.raises(ServiceError):
+        service.create_customer("New Customer", "12345678901234", "new_customer", "pw", balance, "", "Saving",
+                                "2030-01-01", "4321")
+
+
+def call(api, method, path, body=None, token=None):
+    headers = {"authorization": f"Bearer {token}"} if token else {}
+    status, payload, _ = asyncio.run(api.dispatch(method, path, headers, json.dumps(body).encode() if body else b""))
+    return status, payload
+
+
+@pytest.fixture
+def api(service):
+    api = BankApi(service, token="operator-secret")
+    yield api
+    api.close()
+
+
+def test_http_nan_amount_is_a_bad_request(api, make_customer):
+    _, account = make_customer("saver", "10.00")
+    status, payload = call(api, "POST", f"/accounts/{account.AccountID}/deposit", {"amount": "NaN"}, "operator-secret")
+    assert status == 400 and payload == {"error": "Invalid amount!"}
+
+
+def test_http_requires_a_token(api, make_customer):
+    _, account = make_customer("saver", "10.00")
+    assert call(api, "GET", f"/accounts/{account.AccountID}/balance")[0] == 401
+    assert call(api, "POST", "/transfers", {"from_account": account.AccountID, "to_account": "2", "amount": "1"})[0] == 401
+    assert call(api, "GET", "/health")[0] == 200
+
+
+def customer_token(db, api, customer):
+    with db.transaction() as cursor:
+        cursor.execute("UPDATE customer SET customerPassword = %s WHERE customerID = %s",
+                       (credentials.hash_password("pw"), customer.customerID))
+    customer.customerPassword = None
+    api.service.credentials = credentials.CredentialService(workers=0)
+    status, login = call(api, "POST", "/login", {"role": "customer", "username": customer.customerUserName, "password": "pw"})
+    assert status == 200
+    return login["token"]
+
+
+def test_http_customer_session_is_limited_to_own_account(db, api, make_customer):
+    customer, account = make_customer("alice", "10.00")
+    other_customer, other = make_customer("bob", "10.00")
+    token = customer_token(db, api, customer)
+    assert call(api, "GET", f"/accounts/{account.AccountID}/balance", token=token)[0] == 200
+    assert call(api, "GET", f"/accounts/{other.AccountID}/balance", token=token)[0] == 403
+    assert call(api, "POST", f"/accounts/{other.AccountID}/withdraw", {"amount": "1"}, token)[0] == 403
+    assert call(api, "POST", "/transfers", {"from_account": other.AccountID, "to_account": account.AccountID,
+                                            "amount": "1"}, token)[0] == 403
+    assert call(api, "GET", f"/customers/{other_customer.customerID}/transactions", token=token)[0] == 403
+    assert call(api, "GET", "/metrics", token=token)[0] == 403
+    assert call(api, "POST", "/transfers", {"from_account": account.AccountID, "to_account": other.AccountID,
+                                            "amount": "1"}, token)[0] == 200
+    assert call(api, "POST", "/logout", token=token)[0] == 200
+    assert call(api, "GET", f"/accounts/{account.AccountID}/balance", token=token)[0] == 401
+
+
+def test_http_customer_cannot_deposit(db, api, make_customer):
+    customer, account = make_customer("alice", "10.00")
+    token = customer_token(db, api, customer)
+    assert call(api, "POST", f"/accounts/{account.AccountID}/deposit", {"amount": "100"}, token)[0] == 403
+    assert call(api, "POST", f"/accounts/{account.AccountID}/deposit", {"amount": "100"}, "operator-secret")[0] == 200
+    assert account.Balance == Decimal("110.00")
+
+
+def test_http_server_syncs_changes_from_other_processes(db, service, make_customer):
+    _, account = make_customer("alice", "10.00")
+    api = BankApi(service, token="operator-secret", sync_seconds=0.05)
+
+    async def scenario():
+        sync = asyncio.create_task(api.sync_forever())
+        await asyncio.sleep(0.2)
+        # Another terminal deposits straight into the database.
+        with db.transaction() as cursor:
+            cursor.execute("UPDATE account SET Balance = %s WHERE AccountID = %s", (Decimal("15.00"), str(account.AccountID)))
+        await asyncio.sleep(0.3)
+        sync.cancel()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        api.close()
+    assert service.balance(account.AccountID) == Decimal("15.00")
+
+
+def test_http_refuses_public_host_without_token(service):
+    api = BankApi(service, token="")
+    try:
+        with pytest.raises(ValueError):
+            asyncio.run(api.serve("0.0.0.0", 0))
+    finally:
+        api.close()
+
+
+def test_http_balance_deposit_and_transfer(api, make_customer):
+    customer, account = make_customer("saver", "10.00")
+    _, other = make_customer("payee")
+    assert call(api, "GET", f"/accounts/{account.AccountID}/balance", token="operator-secret") == \
+        (200, {"account": str(account.AccountID), "balance": "10.00", "type": "Saving"})
+    assert call(api, "POST", f"/accounts/{account.AccountID}/deposit", {"amount": "5"}, "operator-secret") == \
+        (200, {"account": str(account.AccountID), "balance": "15.00"})
+    status, payload = call(api, "POST", "/transfers", {"from_account": account.AccountID, "to_account": other.AccountID,
+                                                       "amount": "2.50"}, "operator-secret")
+    assert status == 200 and payload["from_balance"] == "12.50"
+    assert call(api, "GET", f"/accounts/{other.AccountID}/balance", token="operator-secret")[1]["balance"] == "2.50"
+    status, payload = call(api, "GET", f"/customers/{customer.customerID}/transactions?limit=1", token="operator-secret")
+    assert status == 200 and len(payload["transactions"]) == 1
+
+
+def test_http_errors(api, make_customer):
+    _, account = make_customer("saver", "10.00")
+    assert call(api, "GET", "/accounts/404404/balance", token="operator-secret")[0] == 404
+    assert call(api, "GET", "/transfers", token="operator-secret")[0] == 405
+    assert call(api, "GET", "/nowhere", token="operator-secret")[0] == 404
+    assert call(api, "POST", f"/accounts/{account.AccountID}/deposit", {}, "operator-secret") == \
+        (400, {"error": "Missing field: amount"})
+    status, _, _ = asyncio.run(api.dispatch("POST", "/transfers", {"authorization": "Bearer operator-secret"}, b"{"))
+    assert status == 400
+
+
+def test_http_rejects_a_missing_or_wrong_token(api, make_customer):
+    _, account = make_customer("saver", "10.00")
+    assert call(api, "GET", f"/accounts/{account.AccountID}/balance")[0] == 401
+    assert call(api, "GET", f"/accounts/{account.AccountID}/balance", token="guess")[0] == 401
+
+
+def test_http_keep_alive_connection_records_metrics(api, make_customer):
+    _, account = make_customer("saver", "10.00")
+
+    async def exchange():
+        server = await asyncio.start_server(api.handle_connection, "127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+        responses = []
+        for path in (f"/accounts/{account.AccountID}/balance", "/metrics"):
+            writer.write(f"GET {path} HTTP/1.1\r\nAuthorization: Bearer operator-secret\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(re.search(rb"Content-Length: (\d+)", head).group(1))
+            responses.append((head.split(b" ")[1], json.loads(await reader.readexactly(length))))
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    (balance_status, balance), (metrics_status, metrics) = asyncio.run(exchange())
+    assert balance_status == b"200" and balance["balance"] == "10.00"
+    assert metrics_status == b"200" and metrics["endpoints"]["balance"]["count"] == 1
@@ -0,0 +1,77 @@
+import os
+import stat
+import time
+import zlib
+from decimal import Decimal
+import credentials
+import snapshot
+from globals import account_objects, clear_all, find_customer_by_username
+from services import BankService
+
+
+def test_warm_start_restores_the_snapshot_and_syncs_changes(db, make_customer, tmp_path):
+    customer, account = make_customer("snap", "12.34")
+    db.load_data()
+    path = str(tmp_path / "bank.snapshot")
+    snapshot.save_snapshot(db, path)
+    time.sleep(0.01)
+    make_customer("later", "1.00")
+
+    clear_all()
+    assert snapshot.warm_start(db, path)
+    assert account_objects[str(account.AccountID)].Balance == Decimal("12.34")
+    assert find_customer_by_username("snap").debit_card is not None
+    assert find_customer_by_username("later") is not None
+
+
+def test_deleted_rows_force_a_full_load(db, make_customer, tmp_path):
+    customer, account = make_customer("gone")
+    db.load_data()
+    path = str(tmp_path / "bank.snapshot")
+    snapshot.save_snapshot(db, path)
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM debitcard WHERE customerID = %s", (customer.customerID,))
+        cursor.execute("DELETE FROM customer WHERE customerID = %s", (customer.customerID,))
+        cursor.execute("DELETE FROM account WHERE AccountID = %s", (account.AccountID,))
+
+    clear_all()
+    assert not snapshot.warm_start(db, path)
+    assert find_customer_by_username("gone") is None
+    assert snapshot.read_snapshot(path)["customers"] == []
+
+
+def test_snapshot_round_trip_without_secrets(db, make_customer, tmp_path):
+    db.load_data()
+    customer, account = make_customer("snap", "12.34")
+    with db.transaction() as cursor:
+        cursor.execute("UPDATE customer SET customerPassword = %s WHERE customerID = %s",
+                       (credentials.hash_password("secret"), customer.customerID))
+    db.load_data()
+    path = str(tmp_path / "bank.snapshot")
+    snapshot.save_snapshot(db, path)
+
+    if os.name == "posix":
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    with open(path, "rb") as f:
+        body = zlib.decompress(f.read()[len(snapshot.MAGIC):])
+    assert b"scrypt" not in body and b"\"1234\"" not in body
+
+    snapshot.restore(snapshot.read_snapshot(path))
+    assert account_objects[str(account.AccountID)].Balance == Decimal("12.34")
+    restored = find_customer_by_username("snap")
+    assert restored.customerPassword is None and restored.debit_card.cardPin is None
+    # The password hash is read from the database at login.
+    service = BankService(db, credentials.CredentialService(workers=0))
+    assert service.login_customer("snap", "secret") is restored
+
+    clear_all()
+    assert snapshot.warm_start(db, path)
+
+
+def test_snapshot_writable_by_others_is_ignored(db, tmp_path):
+    if os.name != "posix":
+        return
+    path = str(tmp_path / "bank.snapshot")
+    snapshot.save_snapshot(db, path)
+    os.chmod(path, 0o666)
+    assert snapshot.read_snapshot(path) is None
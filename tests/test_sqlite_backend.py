@@ -0,0 +1,75 @@
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+import pytest
+import backends.sqlite_backend  # noqa: F401  (must not change other connections)
+from backends import create_backend
+from backends.sqlite_backend import SQLiteBackend, translate
+from db import SYNC_TABLES
+
+
+def test_db_backend_setting_picks_the_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "picked.db"))
+    monkeypatch.setenv("DB_BACKEND", "SQLite")
+    backend = create_backend()
+    try:
+        assert isinstance(backend, SQLiteBackend)
+    finally:
+        backend.close()
+    with pytest.raises(ValueError):
+        create_backend("postgres")
+
+
+def test_mysql_placeholders_are_translated():
+    assert translate("UPDATE account SET Balance = %s WHERE AccountID = %s") == "UPDATE account SET Balance = ? WHERE AccountID = ?"
+
+
+def test_schema_and_update_tracking_are_created_on_first_use(db, make_customer):
+    tables = {name for (name,) in db.query("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert set(SYNC_TABLES) <= tables
+    _, account = make_customer("tracked", "1.00")
+    query = "SELECT updatedAt FROM account WHERE AccountID = %s"
+    before = db.query_one(query, (str(account.AccountID),))[0]
+    time.sleep(0.01)
+    db.adjust_balance(account.AccountID, "1.00")
+    assert db.query_one(query, (str(account.AccountID),))[0] > before
+
+
+def test_other_sqlite_connections_are_left_alone(db, make_customer):
+    make_customer("money", "12.50")
+    other = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+    try:
+        other.execute("CREATE TABLE t (x DECIMAL(15, 2))")
+        other.execute("INSERT INTO t VALUES (1250)")
+        assert other.execute("SELECT x FROM t").fetchone()[0] == 1250
+        with pytest.raises(sqlite3.ProgrammingError):
+            other.execute("SELECT ?", (Decimal("1.50"),))
+    finally:
+        other.close()
+    assert db.query_one("SELECT Balance FROM account")[0] == Decimal("12.50")
+    assert db.query_one("SELECT Balance FROM account", dictionary=True)["Balance"] == Decimal("12.50")
+
+
+def test_read_transaction_does_not_wait_for_a_writer(db, make_customer):
+    make_customer("reader")
+    holding, release = threading.Event(), threading.Event()
+
+    def writer():
+        with db.transaction() as cursor:
+            cursor.execute("UPDATE account SET AccountType = AccountType")
+            holding.set()
+            release.wait(10)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        assert holding.wait(5)
+        started = time.perf_counter()
+        with db.transaction(write=False) as cursor:
+            cursor.execute("SELECT COUNT(*) FROM account")
+            assert cursor.fetchone()[0] == 1
+        assert time.perf_counter() - started < 1
+    finally:
+        release.set()
+        thread.join()
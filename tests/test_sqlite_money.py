@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+
+def stored_balance(db, account_id):
+    return db.query_one("SELECT Balance, typeof(Balance) FROM account WHERE AccountID = %s", (str(account_id),))
+
+
+def test_balance_round_trips_exactly(db, make_customer):
+    _, account = make_customer("cents")
+    for _ in range(3):
+        db.adjust_balance(account.AccountID, "0.10")
+    db.adjust_balance(account.AccountID, "-0.30")
+    balance, storage = stored_balance(db, account.AccountID)
+    assert balance == Decimal("0.00")
+    assert storage == "integer"
+    assert account.Balance == Decimal("0.00")
+
+
+def test_exact_balance_can_be_withdrawn(db, make_customer):
+    _, account = make_customer("exact")
+    for _ in range(3):
+        db.adjust_balance(account.AccountID, "0.10")
+    db.adjust_balance(account.AccountID, "-0.30")
+    assert stored_balance(db, account.AccountID)[0] == Decimal("0.00")
+
+
+def test_many_cent_transfers_stay_exact(db, make_customer):
+    _, source = make_customer("source", "94450.41")
+    _, target = make_customer("target")
+    for _ in range(100):
+        db.transfer_funds(source.AccountID, target.AccountID, "0.01")
+    assert stored_balance(db, source.AccountID)[0] == Decimal("94449.41")
+    assert stored_balance(db, target.AccountID)[0] == Decimal("1.00")
+
+
+def test_migration_converts_legacy_balances(db, make_customer):
+    _, account = make_customer("legacy")
+    # A file written before money was stored in cents.
+    with db.transaction() as cursor:
+        cursor.execute("UPDATE account SET Balance = 12.3 WHERE AccountID = %s", (str(account.AccountID),))
+        db.backend.money_to_cents(cursor, "account", "Balance")
+    assert stored_balance(db, account.AccountID) == (Decimal("12.30"), "integer")
@@ -0,0 +1,46 @@
+from datetime import timedelta
+from decimal import Decimal
+from db import Database, SYNC_OVERLAP
+from globals import customer_objects, find_customer_by_username
+
+
+def test_sync_merges_rows_written_by_another_database(db, make_customer):
+    make_customer("synced", "10.00")
+    db.load_data()
+    customer = find_customer_by_username("synced")
+    account = customer.account
+    other = Database(backend="sqlite")
+    try:
+        with other.transaction() as cursor:
+            cursor.execute("UPDATE account SET Balance = %s WHERE AccountID = %s", (Decimal("25.00"), str(account.AccountID)))
+            cursor.execute("UPDATE customer SET customerUserName = %s WHERE customerID = %s", ("renamed", customer.customerID))
+            cursor.execute("INSERT INTO account (AccountID, AccountNumber, Balance, AccountType) VALUES (%s, %s, %s, %s)",
+                           ("990001", "1000009900011", Decimal("3.00"), "Current"))
+            cursor.execute("INSERT INTO customer (customerID, customerUserName, customerAccountID) VALUES (%s, %s, %s)",
+                           (990001, "newcomer", "990001"))
+    finally:
+        other.close()
+    assert db.sync_changes() >= 4
+    # Merged into the objects already registered, so widgets holding them see the change.
+    assert find_customer_by_username("renamed") is customer
+    assert find_customer_by_username("synced") is None
+    assert account.Balance == Decimal("25.00")
+    newcomer = find_customer_by_username("newcomer")
+    assert newcomer.account.Balance == Decimal("3.00")
+    assert len(customer_objects) == 2
+
+
+def test_sync_overlap_catches_late_commits(db, make_customer):
+    make_customer("first")
+    db.load_data()
+    high_water = db.high_water["customer"]
+    late, stale = high_water - SYNC_OVERLAP / 2, high_water - SYNC_OVERLAP - timedelta(seconds=5)
+    with db.transaction() as cursor:
+        # Rows whose updatedAt is older than the last sync, as when a slow
+        # transaction commits after a faster one.
+        for customer_id, username, updated_at in ((990002, "late", late), (990003, "stale", stale)):
+            cursor.execute("INSERT INTO customer (customerID, customerUserName, updatedAt) VALUES (%s, %s, %s)",
+                           (customer_id, username, updated_at))
+    db.sync_changes()
+    assert find_customer_by_username("late") is not None
+    assert find_customer_by_username("stale") is None
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+import pytest
+
+QtCore = pytest.importorskip("PyQt5.QtCore")
+from table_models import LazyTableModel, ActivityLogTableModel, make_proxy
+
+
+def logs(count):
+    return [SimpleNamespace(logID=i, userType="customer", userID=i % 7, actionType=f"action-{i}", amount=None,
+                            logTime="") for i in range(count)]
+
+
+@pytest.fixture
+def model():
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    model = ActivityLogTableModel()
+    model.batch_size = 10
+    model.set_rows(logs(35))
+    yield model
+    del app
+
+
+def test_values_is_abstract():
+    assert "values" in LazyTableModel.__abstractmethods__
+
+
+def test_rows_are_fetched_in_batches(model):
+    assert model.rowCount() == 10
+    assert model.canFetchMore()
+    model.fetchMore()
+    assert model.rowCount() == 20
+
+
+def test_filter_finds_rows_not_fetched_yet(model):
+    proxy = make_proxy(model)
+    proxy.setFilterFixedString("ACTION-33")
+    assert proxy.rowCount() == 1
+    assert proxy.index(0, 0).data() == "33"
+
+
+def test_sort_covers_rows_not_fetched_yet(model):
+    proxy = make_proxy(model)
+    proxy.sort(0, QtCore.Qt.DescendingOrder)
+    assert proxy.rowCount() == 35
+    assert proxy.index(0, 0).data() == "34"
+
+
+def test_sort_in_effect_loads_all_rows_after_reset(model):
+    proxy = make_proxy(model)
+    proxy.sort(0, QtCore.Qt.DescendingOrder)
+    model.set_rows(logs(25))
+    assert proxy.rowCount() == 25
+    assert proxy.index(0, 0).data() == "24"
+
+
+def test_unsorted_proxy_stays_lazy(model):
+    proxy = make_proxy(model)
+    proxy.sort(-1)
+    proxy.setFilterFixedString("")
+    assert proxy.rowCount() == 10
@@ -0,0 +1,70 @@
+from PyQt5 import QtCore
+import traceback
+
+# Tasks that are still running. Holding them here keeps their signal objects
+# alive until the result has been delivered back to the GUI thread.
+_pending = set()
+
+
+class TaskSignals(QtCore.QObject):
+    succeeded = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(object)
+    finished = QtCore.pyqtSignal()
+
+
+class DbTask(QtCore.QRunnable):
+    """Runs one blocking Database call on a pool thread and reports back via signals."""
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(e)
+        else:
+            self.signals.succeeded.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+def configure(max_threads):
+    # More threads than pooled connections would only queue on the pool.
+    QtCore.QThreadPool.globalInstance().setMaxThreadCount(max(1, max_threads))
+
+
+def run_in_background(fn, *args, on_success=None, on_error=None, busy=(), **kwargs):
+    """Run fn(*args, **kwargs) off the GUI thread.
+
+    The widgets in `busy` are disabled while the call is in flight. on_success
+    receives the return value and on_error the exception; both run on the GUI
+    thread.
+    """
+    task = DbTask(fn, *args, **kwargs)
+    busy = [widget for widget in busy if widget is not None]
+    for widget in busy:
+        widget.setEnabled(False)
+
+    def done():
+        for widget in busy:
+            widget.setEnabled(True)
+        _pending.discard(task)
+
+    if on_success is not None:
+        task.signals.succeeded.connect(on_success)
+    if on_error is not None:
+        task.signals.failed.connect(on_error)
+    task.signals.finished.connect(done)
+    _pending.add(task)
+    QtCore.QThreadPool.globalInstance().start(task)
+    return task
+
+
+def wait_for_done(timeout_ms=-1):
+    return QtCore.QThreadPool.globalInstance().waitForDone(timeout_ms)